@@ -0,0 +1,195 @@
+"""Baseline: the schema of the Supabase migrations up to 20261018120000_quiet_revocation
+
+Databases created from those migrations, scripts/init_db.py or the old
+create_all at import already have it: mark them with `alembic stamp 0001`
+before the first `alembic upgrade head`.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 14:22:08.266960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from backend.models.item import ITEM_ROW_VERSION_DDL
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        # For idx_items_search_key_trgm
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table('idempotency_keys',
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('response', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'key')
+    )
+    op.create_index('idx_idempotency_keys_created_at', 'idempotency_keys', ['created_at'], unique=False)
+    op.create_table('item_tombstones',
+    sa.Column('item_id', sa.Uuid(), nullable=False),
+    sa.Column('row_version', sa.BigInteger(), nullable=False),
+    sa.Column('warehouse_id', sa.Uuid(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('item_id', 'row_version')
+    )
+    op.create_index('idx_item_tombstones_warehouse_version', 'item_tombstones', ['warehouse_id', 'row_version'], unique=False)
+    op.create_table('token_revocations',
+    sa.Column('jti', sa.String(length=32), nullable=True),
+    sa.Column('username', sa.String(length=50), nullable=True),
+    sa.Column('issued_before', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_token_revocations_expires_at', 'token_revocations', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_token_revocations_id'), 'token_revocations', ['id'], unique=False)
+    op.create_table('users',
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('hashed_password', sa.String(length=255), nullable=False),
+    sa.Column('full_name', sa.String(length=100), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_table('warehouses',
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=20), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('location', sa.String(length=200), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('code'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_index(op.f('ix_warehouses_id'), 'warehouses', ['id'], unique=False)
+    op.create_table('items',
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('barcode', sa.String(length=100), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.Column('obra', sa.String(length=100), nullable=False),
+    sa.Column('n_factura', sa.String(length=50), nullable=False),
+    sa.Column('search_key', sa.Text(), nullable=True),
+    sa.Column('row_version', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('warehouse_id', sa.Uuid(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('stock >= 0', name='ck_items_stock_non_negative'),
+    sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_items_barcode_prefix', 'items', ['barcode'], unique=False, postgresql_ops={'barcode': 'varchar_pattern_ops'})
+    op.create_index('idx_items_search_key_trgm', 'items', ['search_key'], unique=False, postgresql_using='gin', postgresql_ops={'search_key': 'gin_trgm_ops'})
+    op.create_index('idx_items_warehouse_name', 'items', ['warehouse_id', 'name', 'id'], unique=False)
+    op.create_index('idx_items_warehouse_obra_name', 'items', ['warehouse_id', 'obra', 'name', 'id'], unique=False)
+    op.create_index('idx_items_warehouse_row_version', 'items', ['warehouse_id', 'row_version', 'id'], unique=False)
+    op.create_index('idx_name_barcode', 'items', ['name', 'barcode'], unique=False)
+    op.create_index(op.f('ix_items_barcode'), 'items', ['barcode'], unique=True)
+    op.create_index(op.f('ix_items_id'), 'items', ['id'], unique=False)
+    for statement in ITEM_ROW_VERSION_DDL.get(dialect, []):
+        op.execute(statement)
+    op.create_table('withdrawals',
+    sa.Column('withdrawal_date', sa.DateTime(), nullable=True),
+    sa.Column('obra', sa.String(length=100), nullable=False),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('warehouse_id', sa.Uuid(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_withdrawals_id'), 'withdrawals', ['id'], unique=False)
+    op.create_table('history',
+    sa.Column('action_type', sa.String(length=50), nullable=False),
+    sa.Column('item_name', sa.String(length=200), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('obra', sa.String(length=100), nullable=False),
+    sa.Column('n_factura', sa.String(length=50), nullable=False),
+    sa.Column('warehouse_name', sa.String(length=100), nullable=False),
+    sa.Column('user_name', sa.String(length=100), nullable=False),
+    sa.Column('action_date', sa.DateTime(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('item_id', sa.Uuid(), nullable=True),
+    sa.Column('user_id', sa.Uuid(), nullable=True),
+    sa.Column('warehouse_id', sa.Uuid(), nullable=True),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['warehouse_id'], ['warehouses.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_history_id'), 'history', ['id'], unique=False)
+    op.create_table('withdrawal_items',
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('withdrawal_id', sa.Uuid(), nullable=False),
+    sa.Column('item_id', sa.Uuid(), nullable=False),
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['item_id'], ['items.id'], ),
+    sa.ForeignKeyConstraint(['withdrawal_id'], ['withdrawals.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_withdrawal_items_id'), 'withdrawal_items', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_withdrawal_items_id'), table_name='withdrawal_items')
+    op.drop_table('withdrawal_items')
+    op.drop_index(op.f('ix_history_id'), table_name='history')
+    op.drop_table('history')
+    op.drop_index(op.f('ix_withdrawals_id'), table_name='withdrawals')
+    op.drop_table('withdrawals')
+    op.drop_index(op.f('ix_items_id'), table_name='items')
+    op.drop_index(op.f('ix_items_barcode'), table_name='items')
+    op.drop_index('idx_name_barcode', table_name='items')
+    op.drop_index('idx_items_warehouse_row_version', table_name='items')
+    op.drop_index('idx_items_warehouse_obra_name', table_name='items')
+    op.drop_index('idx_items_warehouse_name', table_name='items')
+    op.drop_index('idx_items_search_key_trgm', table_name='items', postgresql_using='gin', postgresql_ops={'search_key': 'gin_trgm_ops'})
+    op.drop_index('idx_items_barcode_prefix', table_name='items', postgresql_ops={'barcode': 'varchar_pattern_ops'})
+    op.drop_table('items')
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP FUNCTION IF EXISTS items_stamp_row_version()")
+        op.execute("DROP FUNCTION IF EXISTS items_record_tombstone()")
+    else:
+        op.execute("DROP TABLE IF EXISTS item_row_version")
+    op.drop_index(op.f('ix_warehouses_id'), table_name='warehouses')
+    op.drop_table('warehouses')
+    op.drop_index(op.f('ix_users_username'), table_name='users')
+    op.drop_index(op.f('ix_users_id'), table_name='users')
+    op.drop_table('users')
+    op.drop_index(op.f('ix_token_revocations_id'), table_name='token_revocations')
+    op.drop_index('idx_token_revocations_expires_at', table_name='token_revocations')
+    op.drop_table('token_revocations')
+    op.drop_index('idx_item_tombstones_warehouse_version', table_name='item_tombstones')
+    op.drop_table('item_tombstones')
+    op.drop_index('idx_idempotency_keys_created_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
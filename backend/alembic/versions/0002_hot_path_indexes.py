@@ -0,0 +1,49 @@
+"""Indexes for the history, withdrawal and item listings
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 14:40:00.000000
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY, so the
+tables keep taking writes while they build; each one runs outside a
+transaction. IF NOT EXISTS skips the ones a database already has (the
+history indexes of create_all and idx_withdrawal_items_withdrawal_id of the
+Supabase migrations). A concurrent build that fails leaves an INVALID index
+behind: drop it before running the upgrade again.
+
+items(warehouse_id, name, id) is already part of the baseline.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    # History of a warehouse / an item, newest first (HistoryService)
+    ('idx_history_warehouse_date', 'history', ['warehouse_id', 'action_date DESC', 'id DESC']),
+    ('idx_history_item_date', 'history', ['item_id', 'action_date DESC', 'id DESC']),
+    # Withdrawals of a warehouse, newest first, and the lines of each one (WithdrawalService)
+    ('idx_withdrawals_warehouse_date', 'withdrawals', ['warehouse_id', 'withdrawal_date DESC', 'id DESC']),
+    ('idx_withdrawal_items_withdrawal_id', 'withdrawal_items', ['withdrawal_id']),
+)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, [sa.text(column) for column in columns],
+                if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
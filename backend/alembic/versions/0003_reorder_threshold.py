@@ -0,0 +1,44 @@
+"""Per-item reorder threshold and the low-stock index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 15:30:00.000000
+
+Existing items get the default threshold of 10, the limit the terminals
+used to colour items as low on stock. On PostgreSQL 11+ adding a column
+with a constant default does not rewrite the table; the partial index is
+built concurrently like the ones of 0002.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('items', sa.Column('reorder_threshold', sa.Integer(), server_default=sa.text('10'), nullable=False))
+    # SQLite cannot add a constraint to a table without rebuilding it, which would drop the row version triggers
+    if op.get_bind().dialect.name != "sqlite":
+        op.create_check_constraint('ck_items_reorder_threshold_non_negative', 'items', 'reorder_threshold >= 0')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_items_low_stock', 'items', ['warehouse_id', 'stock', 'name', 'id'],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('stock < reorder_threshold'),
+            sqlite_where=sa.text('stock < reorder_threshold')
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_items_low_stock', table_name='items', if_exists=True, postgresql_concurrently=True)
+    if op.get_bind().dialect.name != "sqlite":
+        op.drop_constraint('ck_items_reorder_threshold_non_negative', 'items', type_='check')
+    op.drop_column('items', 'reorder_threshold')
@@ -0,0 +1,68 @@
+"""Keep items.search_key current with a trigger on PostgreSQL
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 16:10:00.000000
+
+Until now only the ORM filled search_key, so items inserted or edited from
+the Supabase dashboard, its REST API or plain SQL had a NULL or stale key
+and dropped out of search. The trigger recomputes it on every write that
+touches name, n_factura or barcode, and the keys that disagree with it are
+fixed once. SQLite keeps relying on the ORM hook.
+
+The DDL is copied from ITEM_SEARCH_KEY_DDL in backend/models/item.py as of
+this revision, so later edits to the model do not change what it creates.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_KEY_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION items_search_key(name text, n_factura text, barcode text) RETURNS text AS $$
+        SELECT lower(unaccent(coalesce(name, ''))) || ' ' ||
+               lower(unaccent(coalesce(n_factura, ''))) || ' ' ||
+               lower(unaccent(coalesce(barcode, '')))
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE OR REPLACE FUNCTION items_refresh_search_key() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_key := items_search_key(NEW.name, NEW.n_factura, NEW.barcode);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Databases built with create_all already have the trigger
+    "DROP TRIGGER IF EXISTS items_search_key ON items",
+    """
+    CREATE TRIGGER items_search_key BEFORE INSERT OR UPDATE OF name, n_factura, barcode, search_key ON items
+    FOR EACH ROW EXECUTE FUNCTION items_refresh_search_key()
+    """,
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    for statement in SEARCH_KEY_DDL:
+        op.execute(statement)
+    op.execute(
+        "UPDATE items SET search_key = items_search_key(name, n_factura, barcode) "
+        "WHERE search_key IS DISTINCT FROM items_search_key(name, n_factura, barcode)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP TRIGGER IF EXISTS items_search_key ON items")
+    op.execute("DROP FUNCTION IF EXISTS items_refresh_search_key()")
+    op.execute("DROP FUNCTION IF EXISTS items_search_key(text, text, text)")
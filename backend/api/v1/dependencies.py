@@ -1,26 +1,59 @@
+from typing import Any, Mapping, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from backend.database.session import get_db
-from backend.core.security import verify_token
+from backend.database.session import AnySession, get_session, run_in_session
+from backend.core.security import decode_token
+from backend.core.principal import UserSnapshot, user_cache
+from backend.core.revocation import revocation_list
 from backend.models.user import User
 
 security = HTTPBearer()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    username = verify_token(credentials.credentials)
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
+def _load_user(db: Session, username: str) -> Optional[UserSnapshot]:
+    db_user = db.query(User).filter(User.username == username).first()
+    user = UserSnapshot.from_model(db_user) if db_user else None
+    # Only the snapshot is needed, so the connection goes back to the pool before
+    # the endpoint queues for its own; holding it across both would let a burst
+    # of cold requests pin every connection
+    db.rollback()
+    return user
+
+def get_token_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> Mapping[str, Any]:
+    return decode_token(credentials.credentials)
+
+async def get_current_user(
+    claims: Mapping[str, Any] = Depends(get_token_claims),
+    db: AnySession = Depends(get_session)
+) -> UserSnapshot:
+    await revocation_list.ensure_fresh_async(db)
+    if revocation_list.is_revoked(claims):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
+            detail="Token has been revoked"
         )
+    # Tokens carry the user, so the database is only read for tokens issued
+    # before they did
+    user = UserSnapshot.from_claims(claims)
+    if user is not None:
+        return user
+    username = claims["sub"]
+    # Cached principals are resolved on the event loop, without a thread pool hop
+    user = user_cache.get(username)
+    if user is None:
+        user = await run_in_session(db, _load_user, username)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        if user.is_active:
+            user_cache.set(username, user)
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Inactive user"
         )
-    return user
\ No newline at end of file
+    return user
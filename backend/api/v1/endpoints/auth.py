@@ -1,24 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from datetime import timedelta
+from typing import Any, Mapping, Optional, Tuple
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
-from backend.database.session import get_db
+from backend.api.v1.dependencies import get_current_user, get_token_claims
+from backend.database.session import AnySession, get_session, run_in_session
 from backend.schemas.user import UserLogin, Token, User as UserSchema
 from backend.models.user import User
-from backend.core.security import verify_password, create_access_token
+from backend.core.security import create_access_token, password_verifier
+from backend.core.principal import UserSnapshot
+from backend.core.revocation import revocation_list
 from backend.config import settings
 
 limiter = Limiter(key_func=get_remote_address)
 router = APIRouter()
 
+def _load_login_user(db: Session, username: str) -> Optional[Tuple[UserSchema, str]]:
+    user = db.query(User).filter(User.username == username).first()
+    found = (UserSchema.from_orm(user), user.hashed_password) if user else None
+    # The password check takes far longer than the query; the connection goes back to the pool meanwhile
+    db.rollback()
+    return found
+
+def _upgrade_password_hash(db: Session, user_id, old_hash: str, new_hash: str) -> None:
+    # Skipped if the password was changed while this login was being checked
+    db.execute(
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+    )
+    db.commit()
+
 @router.post("/login", response_model=Token)
 @limiter.limit("5/minute")
-def login(request: Request, user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == user_credentials.username).first()
+async def login(request: Request, user_credentials: UserLogin, db: AnySession = Depends(get_session)):
+    found = await run_in_session(db, _load_login_user, user_credentials.username)
+    valid, new_hash = False, None
+    if found:
+        user, hashed_password = found
+        valid, new_hash = await password_verifier.verify_and_update(user_credentials.password, hashed_password)
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -30,13 +55,44 @@ def login(request: Request, user_credentials: UserLogin, db: Session = Depends(g
             detail="User account is inactive"
         )
     
+    # Stored with an outdated scheme or cost: replace it now that the plain password is known
+    if new_hash:
+        await run_in_session(db, _upgrade_password_hash, user.id, hashed_password, new_hash)
+    
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": str(user.id), "name": user.full_name, "adm": user.is_admin},
+        expires_delta=access_token_expires
     )
     
     return Token(
         access_token=access_token,
         token_type="bearer",
-        user=UserSchema.from_orm(user)
-    )
\ No newline at end of file
+        user=user
+    )
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    claims: Mapping[str, Any] = Depends(get_token_claims),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    await run_in_session(db, revocation_list.revoke_token, claims)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+@router.post("/users/{username}/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout_user(
+    username: str,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    def revoke(session: Session) -> None:
+        if not session.query(User.id).filter(User.username == username).first():
+            raise HTTPException(status_code=404, detail="User not found")
+        revocation_list.revoke_user(session, username)
+    
+    await run_in_session(db, revoke)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
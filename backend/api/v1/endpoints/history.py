@@ -1,39 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from backend.database.session import get_db
-from backend.schemas.history import History
-from backend.services.history_service import HistoryService
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Union
+from datetime import datetime
+from backend.database.session import AnySession, get_session
+from backend.models.history import History as HistoryModel
+from backend.schemas.history import History, HistoryPage
+from backend.services.async_services import AsyncHistoryService
 from backend.api.v1.dependencies import get_current_user
-from backend.models.user import User
+from backend.core.principal import UserSnapshot
+import uuid
 
 router = APIRouter()
 
-@router.get("/warehouse/{warehouse_id}", response_model=List[History])
-def get_history_by_warehouse(
-    warehouse_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def history_filters(
+    date_from: Optional[datetime] = Query(None, alias="from", description="Only rows at or after this date"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Only rows before this date"),
+    action_type: Optional[str] = Query(
+        None, pattern="^(withdrawal|addition|adjustment)$", description="Filter by action type"
+    )
+) -> Dict[str, Any]:
+    return {"date_from": date_from, "date_to": date_to, "action_type": action_type}
+
+def ndjson_response(records: Union[Iterator[HistoryModel], AsyncIterator[HistoryModel]]) -> StreamingResponse:
+    """One JSON object per line; rows are serialized as they come off the database cursor"""
+    if hasattr(records, "__aiter__"):
+        async def lines():
+            async for record in records:
+                yield History.model_validate(record).model_dump_json() + "\n"
+    else:
+        def lines():
+            for record in records:
+                yield History.model_validate(record).model_dump_json() + "\n"
+    # The session from get_session stays open until the response has been fully sent
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/warehouse/{warehouse_id}", response_model=HistoryPage)
+async def get_history_by_warehouse(
+    warehouse_id: uuid.UUID,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    per_page: int = Query(100, ge=1, le=500, description="Rows per page"),
+    filters: Dict[str, Any] = Depends(history_filters),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    history_service = AsyncHistoryService(db)
+    items, next_cursor = await history_service.get_history_by_warehouse(warehouse_id, cursor, per_page, **filters)
+    return HistoryPage(items=items, next_cursor=next_cursor)
+
+@router.get("/warehouse/{warehouse_id}/stream")
+async def stream_history_by_warehouse(
+    warehouse_id: uuid.UUID,
+    filters: Dict[str, Any] = Depends(history_filters),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    history_service = HistoryService(db)
-    return history_service.get_history_by_warehouse(warehouse_id)
-
-@router.get("/item/{item_id}", response_model=List[History])
-def get_history_by_item(
-    item_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    history_service = AsyncHistoryService(db)
+    return ndjson_response(history_service.iter_history(warehouse_id=warehouse_id, **filters))
+
+@router.get("/item/{item_id}", response_model=HistoryPage)
+async def get_history_by_item(
+    item_id: uuid.UUID,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    per_page: int = Query(100, ge=1, le=500, description="Rows per page"),
+    filters: Dict[str, Any] = Depends(history_filters),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    history_service = HistoryService(db)
-    return history_service.get_history_by_item(item_id)
+    history_service = AsyncHistoryService(db)
+    items, next_cursor = await history_service.get_history_by_item(item_id, cursor, per_page, **filters)
+    return HistoryPage(items=items, next_cursor=next_cursor)
 
-@router.get("/", response_model=List[History])
-def get_all_history(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+@router.get("/", response_model=HistoryPage)
+async def get_all_history(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    per_page: int = Query(100, ge=1, le=500, description="Rows per page"),
+    filters: Dict[str, Any] = Depends(history_filters),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    
-    history_service = HistoryService(db)
-    return history_service.get_all_history()
\ No newline at end of file
+
+    history_service = AsyncHistoryService(db)
+    items, next_cursor = await history_service.get_all_history(cursor, per_page, **filters)
+    return HistoryPage(items=items, next_cursor=next_cursor)
+
+@router.get("/stream")
+async def stream_all_history(
+    filters: Dict[str, Any] = Depends(history_filters),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+
+    history_service = AsyncHistoryService(db)
+    return ndjson_response(history_service.iter_history(**filters))
\ No newline at end of file
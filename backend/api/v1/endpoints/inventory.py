@@ -1,77 +1,158 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from pydantic import BaseModel
-from backend.database.session import get_db
-from backend.schemas.item import Item, ItemCreate, ItemUpdate
-from backend.services.inventory_service import InventoryService
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, UploadFile
+from typing import Optional
+from pydantic import BaseModel, Field
+import uuid
+from backend.database.session import AnySession, get_session
+from backend.schemas.item import (
+    Item, ItemCreate, ItemUpdate, ItemPage, ItemChanges, ItemImportReport, BarcodeResolveRequest, BarcodeResolution,
+    LowStockReport
+)
+from backend.services.async_services import AsyncInventoryService, AsyncImportService, AsyncStockReportService
+from backend.services.import_service import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, detect_format
+from backend.services.inventory_service import DEFAULT_CHANGES_LIMIT, MAX_CHANGES_LIMIT
+from backend.services.stock_report_service import DEFAULT_LOW_STOCK_ITEMS, MAX_LOW_STOCK_ITEMS
+from backend.services.barcode_cache import barcode_cache
 from backend.api.v1.dependencies import get_current_user
-from backend.models.user import User
+from backend.core.principal import UserSnapshot
 
 router = APIRouter()
 
 class AddStockRequest(BaseModel):
-    quantity: int
+    quantity: int = Field(..., gt=0)
+
+class ReorderThresholdRequest(BaseModel):
+    reorder_threshold: int = Field(..., ge=0)
 
 @router.post("/items", response_model=Item)
-def create_item(
+async def create_item(
     item: ItemCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    inventory_service = AsyncInventoryService(db)
+    return await inventory_service.create_item(item)
+
+@router.post("/items/import", response_model=ItemImportReport)
+async def import_items(
+    warehouse_id: uuid.UUID = Query(..., description="Warehouse receiving the items"),
+    file: UploadFile = File(..., description="CSV with a header row, or NDJSON"),
+    format: Optional[str] = Query(None, description="csv or ndjson; taken from the file extension if omitted"),
+    chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE, description="Rows per transaction"),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    inventory_service = InventoryService(db)
-    return inventory_service.create_item(item)
+    fmt = detect_format(file.filename, format)
+    import_service = AsyncImportService(db)
+    try:
+        return await import_service.import_items(file.file, fmt, warehouse_id, current_user, chunk_size)
+    finally:
+        await file.close()
 
 @router.post("/items/{item_id}/add_stock", response_model=Item)
-def add_stock_to_item(
-    item_id: str,
+async def add_stock_to_item(
+    item_id: uuid.UUID,
     request: AddStockRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    inventory_service = InventoryService(db)
-    return inventory_service.add_item_stock(item_id, request.quantity, current_user)
+    inventory_service = AsyncInventoryService(db)
+    return await inventory_service.add_item_stock(item_id, request.quantity, current_user, idempotency_key)
+
+@router.put("/items/{item_id}/reorder-threshold", response_model=Item)
+async def set_reorder_threshold(
+    item_id: uuid.UUID,
+    request: ReorderThresholdRequest,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Stock below which the item is reported as low; 0 never reports it"""
+    inventory_service = AsyncInventoryService(db)
+    return await inventory_service.set_reorder_threshold(item_id, request.reorder_threshold)
 
 @router.get("/items/barcode/{barcode}", response_model=Item)
-def get_item_by_barcode(
+async def get_item_by_barcode(
     barcode: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    inventory_service = AsyncInventoryService(db)
+    return await inventory_service.get_item_by_barcode(barcode)
+
+@router.post("/items/barcodes:resolve", response_model=BarcodeResolution)
+async def resolve_barcodes(
+    request: BarcodeResolveRequest,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    inventory_service = InventoryService(db)
-    return inventory_service.get_item_by_barcode(barcode)
+    inventory_service = AsyncInventoryService(db)
+    return await inventory_service.get_items_by_barcodes(request.barcodes)
 
-@router.get("/items/warehouse/{warehouse_id}", response_model=List[Item])
-def get_items_by_warehouse(
-    warehouse_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
+@router.get("/items/warehouse/{warehouse_id}", response_model=ItemPage)
+async def get_items_by_warehouse(
+    warehouse_id: uuid.UUID,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
     per_page: int = Query(50, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    inventory_service = InventoryService(db)
-    return inventory_service.get_items_by_warehouse(warehouse_id, page, per_page)
+    inventory_service = AsyncInventoryService(db)
+    items, next_cursor = await inventory_service.get_items_by_warehouse(warehouse_id, cursor, per_page)
+    return ItemPage(items=items, next_cursor=next_cursor)
 
-@router.get("/items/search", response_model=List[Item])
-def search_items(
+@router.get("/items/changes", response_model=ItemChanges)
+async def get_item_changes(
+    warehouse_id: uuid.UUID = Query(..., description="Warehouse whose items to follow"),
+    since: int = Query(0, ge=0, description="next_since of the previous response; 0 for everything"),
+    limit: int = Query(DEFAULT_CHANGES_LIMIT, ge=1, le=MAX_CHANGES_LIMIT, description="Entries per response"),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    inventory_service = AsyncInventoryService(db)
+    return await inventory_service.get_item_changes(warehouse_id, since, limit)
+
+@router.get("/items/search", response_model=ItemPage)
+async def search_items(
     q: str = Query(..., description="Search query"),
-    warehouse_id: Optional[str] = Query(None, description="Filter by warehouse"),
-    page: int = Query(1, ge=1, description="Page number"),
+    warehouse_id: Optional[uuid.UUID] = Query(None, description="Filter by warehouse"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
     per_page: int = Query(50, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    inventory_service = InventoryService(db)
-    return inventory_service.search_items(q, warehouse_id, page, per_page)
+    inventory_service = AsyncInventoryService(db)
+    items, next_cursor = await inventory_service.search_items(q, warehouse_id, cursor, per_page)
+    return ItemPage(items=items, next_cursor=next_cursor)
 
-@router.get("/items/obra/{obra}/warehouse/{warehouse_id}", response_model=List[Item])
-def get_items_by_obra(
+@router.get("/items/obra/{obra}/warehouse/{warehouse_id}", response_model=ItemPage)
+async def get_items_by_obra(
     obra: str,
-    warehouse_id: str,
-    page: int = Query(1, ge=1, description="Page number"),
+    warehouse_id: uuid.UUID,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
     per_page: int = Query(50, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    inventory_service = AsyncInventoryService(db)
+    items, next_cursor = await inventory_service.get_items_by_obra(obra, warehouse_id, cursor, per_page)
+    return ItemPage(items=items, next_cursor=next_cursor)
+
+@router.get("/low-stock", response_model=LowStockReport)
+async def get_low_stock(
+    warehouse_id: uuid.UUID = Query(..., description="Warehouse to report on"),
+    limit: int = Query(DEFAULT_LOW_STOCK_ITEMS, ge=1, le=MAX_LOW_STOCK_ITEMS, description="Items listed"),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Items below their reorder threshold, emptiest first; total counts them all"""
+    report_service = AsyncStockReportService(db)
+    return await report_service.get_low_stock(warehouse_id, limit)
+
+@router.get("/cache/stats")
+async def get_barcode_cache_stats(
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    inventory_service = InventoryService(db)
-    return inventory_service.get_items_by_obra(obra, warehouse_id, page, per_page)
\ No newline at end of file
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    return barcode_cache.stats()
@@ -1,44 +1,122 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from backend.database.session import get_db
-from backend.schemas.warehouse import Warehouse, WarehouseCreate
+from typing import List, Optional
+from backend.database.session import AnySession, get_session, run_in_session
+from backend.schemas.warehouse import Warehouse, WarehouseCreate, WarehouseUpdate, WarehouseSummary
 from backend.models.warehouse import Warehouse as WarehouseModel
+from backend.services.async_services import AsyncStockReportService
+from backend.services.stock_events import stock_events
+from backend.services.warehouse_registry import warehouse_registry
+from backend.config import settings
 from backend.api.v1.dependencies import get_current_user
-from backend.models.user import User
+from backend.core.principal import UserSnapshot
+import uuid
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Warehouse])
-def get_warehouses(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_warehouses(
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    warehouses = db.query(WarehouseModel).filter(WarehouseModel.is_active == True).all()
-    return warehouses
+    return await warehouse_registry.list_active_async(db)
 
 @router.post("/", response_model=Warehouse)
-def create_warehouse(
+async def create_warehouse(
     warehouse: WarehouseCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
-    db_warehouse = WarehouseModel(**warehouse.dict())
-    db.add(db_warehouse)
-    db.commit()
-    db.refresh(db_warehouse)
-    return db_warehouse
+    def create(session: Session) -> Warehouse:
+        db_warehouse = WarehouseModel(**warehouse.dict())
+        session.add(db_warehouse)
+        session.commit()
+        session.refresh(db_warehouse)
+        return warehouse_registry.put(db_warehouse)
+    
+    return await run_in_session(db, create)
 
 @router.get("/{warehouse_id}", response_model=Warehouse)
-def get_warehouse(
-    warehouse_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+async def get_warehouse(
+    warehouse_id: uuid.UUID,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    warehouse = db.query(WarehouseModel).filter(WarehouseModel.id == warehouse_id).first()
+    warehouse = await warehouse_registry.get_async(warehouse_id, db)
     if not warehouse:
         raise HTTPException(status_code=404, detail="Warehouse not found")
-    return warehouse
\ No newline at end of file
+    return warehouse
+
+@router.put("/{warehouse_id}", response_model=Warehouse)
+async def update_warehouse(
+    warehouse_id: uuid.UUID,
+    warehouse: WarehouseUpdate,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    def update(session: Session) -> Warehouse:
+        db_warehouse = session.query(WarehouseModel).filter(WarehouseModel.id == warehouse_id).first()
+        if not db_warehouse:
+            raise HTTPException(status_code=404, detail="Warehouse not found")
+        
+        for field, value in warehouse.dict(exclude_unset=True).items():
+            setattr(db_warehouse, field, value)
+        session.commit()
+        session.refresh(db_warehouse)
+        return warehouse_registry.put(db_warehouse)
+    
+    return await run_in_session(db, update)
+
+@router.get("/{warehouse_id}/summary", response_model=WarehouseSummary)
+async def get_warehouse_summary(
+    warehouse_id: uuid.UUID,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Item count, total stock and out-of-stock and low-stock counts, computed in one query"""
+    if not await warehouse_registry.get_async(warehouse_id, db):
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+    report_service = AsyncStockReportService(db)
+    return await report_service.get_summary(warehouse_id)
+
+@router.get("/{warehouse_id}/events")
+async def stream_stock_events(
+    warehouse_id: uuid.UUID,
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
+):
+    """Server-sent events with the stock changes of a warehouse.
+    
+    The stream opens with a `ready` event, then carries `stock` events
+    (item_id, barcode, stock, delta) and `resync` events, after which the
+    client should read /inventory/items/changes. Idle streams get a comment
+    line every stock_events_heartbeat_seconds.
+    """
+    def find(session: Session) -> Optional[Warehouse]:
+        warehouse = warehouse_registry.get(warehouse_id, session)
+        # The stream outlives the request: its session must not keep a connection
+        session.rollback()
+        return warehouse
+    
+    if not await run_in_session(db, find):
+        raise HTTPException(status_code=404, detail="Warehouse not found")
+    
+    async def frames():
+        with stock_events.subscribe(warehouse_id) as subscription:
+            yield "event: ready\ndata: {}\n\n"
+            while True:
+                frame = await subscription.get(settings.stock_events_heartbeat_seconds)
+                yield frame if frame is not None else ": ping\n\n"
+    
+    return StreamingResponse(
+        frames(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,28 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from backend.database.session import get_db
-from backend.schemas.withdrawal import Withdrawal, WithdrawalCreate
-from backend.services.withdrawal_service import WithdrawalService
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from typing import Optional
+from datetime import datetime
+from backend.database.session import AnySession, get_session
+from backend.schemas.withdrawal import Withdrawal, WithdrawalCreate, WithdrawalPage
+from backend.services.async_services import AsyncWithdrawalService
 from backend.api.v1.dependencies import get_current_user
-from backend.models.user import User
+from backend.core.principal import UserSnapshot
+import uuid
 
 router = APIRouter()
 
 @router.post("/", response_model=Withdrawal)
-def create_withdrawal(
+async def create_withdrawal(
     withdrawal: WithdrawalCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None, max_length=255),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    withdrawal_service = WithdrawalService(db)
-    return withdrawal_service.create_withdrawal(withdrawal, current_user.id)
+    """A retry with the same Idempotency-Key returns the first response instead of withdrawing again"""
+    withdrawal_service = AsyncWithdrawalService(db)
+    return await withdrawal_service.create_withdrawal(withdrawal, current_user, idempotency_key)
 
-@router.get("/warehouse/{warehouse_id}", response_model=List[Withdrawal])
-def get_withdrawals_by_warehouse(
-    warehouse_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+@router.get("/warehouse/{warehouse_id}", response_model=WithdrawalPage)
+async def get_withdrawals_by_warehouse(
+    warehouse_id: uuid.UUID,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page"),
+    per_page: int = Query(50, ge=1, le=200, description="Withdrawals per page"),
+    date_from: Optional[datetime] = Query(None, alias="from", description="Only withdrawals at or after this date"),
+    date_to: Optional[datetime] = Query(None, alias="to", description="Only withdrawals before this date"),
+    db: AnySession = Depends(get_session),
+    current_user: UserSnapshot = Depends(get_current_user)
 ):
-    withdrawal_service = WithdrawalService(db)
-    return withdrawal_service.get_withdrawals_by_warehouse(warehouse_id)
\ No newline at end of file
+    """Newest first; follow next_cursor for older withdrawals"""
+    withdrawal_service = AsyncWithdrawalService(db)
+    items, next_cursor = await withdrawal_service.get_withdrawals_by_warehouse(
+        warehouse_id, cursor, per_page, date_from=date_from, date_to=date_to
+    )
+    return WithdrawalPage(items=items, next_cursor=next_cursor)
\ No newline at end of file
@@ -26,6 +26,14 @@ class Settings(BaseSettings):
     # Database
     database_url: str = ""
     
+    # Serve requests on an async engine (asyncpg / aiosqlite) instead of the thread pool
+    async_database: bool = False
+    async_pool_size: int = 20
+    async_max_overflow: int = 40
+    # Create missing tables when the API starts (development); otherwise the schema
+    # comes from the migrations or scripts/init_db.py
+    create_tables_on_startup: bool = False
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Encode database URL to handle special characters
@@ -37,6 +45,45 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     
+    # Password hashing: scheme of new hashes ("bcrypt" or "argon2", which is argon2id and
+    # needs argon2-cffi) and bcrypt cost; older hashes are upgraded on the next login
+    password_hash_scheme: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    # Processes checking passwords at login (0 checks them in the thread pool) and
+    # logins allowed to wait for one before answering 503
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 64
+    
+    # Authenticated user cache, for tokens issued without user claims (0 disables it)
+    user_cache_ttl_seconds: int = 60
+    user_cache_size: int = 1024
+    
+    # Verified access tokens, each kept until it expires (at most the TTL; 0 disables it)
+    token_cache_ttl_seconds: int = 86400
+    token_cache_size: int = 4096
+    # Seconds before a revocation made on another worker is enforced by this one
+    token_revocation_refresh_seconds: int = 5
+    
+    # Barcode lookup cache used by the scan path (0 disables it)
+    barcode_cache_ttl_seconds: int = 30
+    barcode_cache_size: int = 10000
+    
+    # Warehouse summaries and low-stock reports; stock events evict them, from other workers
+    # too (pg_notify on PostgreSQL), and the TTL bounds staleness if an event is lost (0 disables it)
+    stock_report_cache_ttl_seconds: int = 5
+    stock_report_cache_size: int = 1024
+    
+    # In-memory warehouse registry, reloaded after this many seconds
+    warehouse_registry_ttl_seconds: int = 300
+    
+    # Server-sent stock events: frames buffered per terminal before it is told to resync,
+    # and seconds between keep-alive comments on an idle stream
+    stock_events_queue_size: int = 256
+    stock_events_heartbeat_seconds: int = 15
+    
+    # Responses of writes sent with an Idempotency-Key are replayed for this long
+    idempotency_key_ttl_hours: int = 24
+    
     # Application
     debug: bool = True
     api_host: str = "0.0.0.0"
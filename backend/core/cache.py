@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Iterable, Optional
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL.
+
+    A ttl of 0 disables the cache: every lookup misses and nothing is stored.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# How long an eviction is remembered; longer than any single query that fills an EvictingCache
+EVICTION_WINDOW_SECONDS = 30
+
+
+class EvictingCache:
+    """TTL cache of values read from the database and evicted by writers.
+
+    Writers evict the entries they make stale after committing instead of
+    overwriting them, so two concurrent writers can never leave the older
+    value behind. A read that started before an eviction of its key is not
+    allowed to store what it read, which closes the window where a slow read
+    would re-cache a value that was just changed. clear() counts as an
+    eviction of every key.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._values = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._evicted_at = TTLCache(maxsize=maxsize, ttl=EVICTION_WINDOW_SECONDS)
+        self._cleared_at: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def ttl(self) -> float:
+        return self._values.ttl
+
+    @ttl.setter
+    def ttl(self, value: float) -> None:
+        self._values.ttl = value
+
+    def get(self, key: Hashable) -> Any:
+        return self._values.get(key)
+
+    def get_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """Cached values among keys; misses are left out"""
+        found = {}
+        for key in keys:
+            value = self._values.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def begin_read(self) -> float:
+        """Timestamp to pass to store() for a value about to be read from the database"""
+        return time.monotonic()
+
+    def store(self, key: Hashable, value: Any, read_started: Optional[float] = None) -> Any:
+        with self._lock:
+            evicted_at = self._evicted_at.get(key)
+            if self._cleared_at is not None and (evicted_at is None or evicted_at < self._cleared_at):
+                evicted_at = self._cleared_at
+            if read_started is None or evicted_at is None or evicted_at < read_started:
+                self._values.set(key, value)
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                self._evicted_at.set(key, now)
+                self._values.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cleared_at = time.monotonic()
+            self._values.clear()
+
+    def reset_stats(self) -> None:
+        self._values.reset_stats()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._values.stats()
@@ -27,4 +27,31 @@ class WarehouseNotFoundException(HTTPException):
 class UnauthorizedWarehouseAccessException(HTTPException):
     def __init__(self):
         detail = "Cannot perform withdrawals from a different warehouse location"
-        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
\ No newline at end of file
+        super().__init__(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+class WithdrawalValidationException(HTTPException):
+    def __init__(self, errors: list):
+        detail = {
+            "message": "Withdrawal rejected, no changes were applied",
+            "errors": errors
+        }
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+class StockConflictException(HTTPException):
+    def __init__(self):
+        detail = "Stock changed while the operation was running, please retry"
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+class InvalidCursorException(HTTPException):
+    def __init__(self):
+        detail = "Invalid or expired pagination cursor"
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+class ImportFormatException(HTTPException):
+    def __init__(self, detail: str):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+class IdempotencyKeyReusedException(HTTPException):
+    def __init__(self):
+        detail = "Idempotency-Key was already used for a different request"
+        super().__init__(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
@@ -0,0 +1,88 @@
+from sqlalchemy import tuple_, literal
+from sqlalchemy.orm import Query
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from datetime import datetime
+from backend.core.exceptions import InvalidCursorException
+import base64
+import binascii
+import json
+import uuid
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _from_json(column, value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (uuid.UUID, datetime) and not isinstance(value, str):
+        raise TypeError(f"expected a string for {column}")
+    if python_type is uuid.UUID:
+        return uuid.UUID(value)
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row of a page"""
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match the sort key")
+        return [_from_json(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError, binascii.Error):
+        raise InvalidCursorException()
+
+
+def keyset_paginate(
+    query: Query,
+    columns: Sequence,
+    cursor: Optional[str],
+    per_page: int,
+    descending: bool = False,
+    sort_values: Optional[Callable[[Any], Sequence[Any]]] = None
+) -> Tuple[list, Optional[str]]:
+    """Page through query ordered by columns, which must end in a unique key.
+
+    Instead of OFFSET, the page starts right after the row encoded in the
+    cursor, so deep pages cost the same as the first one and rows are never
+    skipped or repeated when other rows change. Returns (rows, next_cursor);
+    next_cursor is None on the last page.
+
+    Columns may be SQL expressions (e.g. a rank); sort_values then extracts
+    the sort key from a result row, since it cannot be read by attribute name.
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key = tuple_(*columns)
+        boundary = tuple_(*[literal(value, column.type) for column, value in zip(columns, values)])
+        query = query.filter(key < boundary if descending else key > boundary)
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        if sort_values:
+            last_values = sort_values(rows[-1])
+        else:
+            last_values = [getattr(rows[-1], column.key) for column in columns]
+        next_cursor = encode_cursor(last_values)
+    return rows, next_cursor
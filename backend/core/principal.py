@@ -0,0 +1,84 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Mapping, Optional
+from sqlalchemy import event, inspect
+from backend.config import settings
+from backend.core.cache import TTLCache
+from backend.core.revocation import revoke_user_tokens
+from backend.models.user import User
+import uuid
+
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Immutable copy of the authenticated user, safe to share between requests"""
+    id: uuid.UUID
+    username: str
+    full_name: str
+    is_active: bool
+    is_admin: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_claims(cls, claims: Mapping[str, Any]) -> Optional["UserSnapshot"]:
+        """The user a token was issued to, from its claims; None for tokens issued without them
+
+        Tokens are only issued to active users, and deactivating a user revokes
+        their tokens (through the ORM listener below, or through the revocation
+        list, which rejects every token of a user inactive in the database), so
+        a token that passes the revocation check belongs to an active user.
+        """
+        if "uid" not in claims:
+            return None
+        return cls(
+            id=uuid.UUID(claims["uid"]),
+            username=claims["sub"],
+            full_name=claims["name"],
+            is_active=True,
+            is_admin=bool(claims["adm"])
+        )
+
+    @classmethod
+    def from_model(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_admin=bool(user.is_admin),
+            created_at=user.created_at
+        )
+
+
+# Authenticated users keyed by token subject (username)
+user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds)
+
+
+# Changing any of these revokes the tokens already issued to the user
+TOKEN_FIELDS = ("username", "full_name", "is_active", "is_admin", "hashed_password")
+
+
+def invalidate_user(username: str) -> None:
+    """Drop a cached principal, e.g. after the user is deactivated"""
+    user_cache.pop(username)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_change(mapper, connection, target):
+    # Any ORM change to a user (deactivation, admin flag, rename) evicts it
+    invalidate_user(target.username)
+    state = inspect(target)
+    for previous_username in state.attrs.username.history.deleted:
+        invalidate_user(previous_username)
+    # Tokens carry the user's name and role, so they must not outlive a change to them
+    if any(state.attrs[name].history.deleted for name in TOKEN_FIELDS):
+        for username in {target.username, *state.attrs.username.history.deleted}:
+            revoke_user_tokens(connection, username)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_on_delete(mapper, connection, target):
+    # A deleted user keeps no valid tokens, whatever else changed in the flush
+    for username in {target.username, *inspect(target).attrs.username.history.deleted}:
+        invalidate_user(username)
+        revoke_user_tokens(connection, username)
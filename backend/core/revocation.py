@@ -0,0 +1,103 @@
+from datetime import datetime
+from threading import Lock
+from types import MappingProxyType
+from typing import Any, FrozenSet, Mapping, Optional
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.security import MAX_TOKEN_LIFETIME, epoch_seconds
+from backend.database.concurrency import AnySession, run_in_session
+from backend.models.token_revocation import TokenRevocation
+from backend.models.user import User
+import time
+
+
+def revoke_user_tokens(connection: Connection, username: str) -> datetime:
+    """Reject every token of username issued until now, in the caller's transaction; returns now"""
+    now = datetime.utcnow()
+    connection.execute(insert(TokenRevocation).values(
+        username=username,
+        issued_before=now,
+        expires_at=now + MAX_TOKEN_LIFETIME
+    ))
+    return now
+
+
+class RevocationList:
+    """Process-wide snapshot of the revocations whose tokens have not expired yet.
+
+    Every authenticated request checks its token against the snapshot in
+    memory. It is replaced as a whole (copy-on-write) when it is older than
+    refresh seconds, so a revocation made by another worker is enforced within
+    that time; revocations made by this process apply at once. Users that are
+    inactive in the database have all their tokens rejected, which also covers
+    deactivations made outside the ORM (SQL consoles, other services).
+    """
+
+    def __init__(self, refresh: float):
+        self.refresh = refresh
+        self._jtis: FrozenSet[str] = frozenset()
+        self._users: Mapping[str, float] = MappingProxyType({})
+        self._loaded_at: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh
+
+    def load(self, db: Session) -> None:
+        rows = db.query(TokenRevocation.jti, TokenRevocation.username, TokenRevocation.issued_before).filter(
+            TokenRevocation.expires_at > datetime.utcnow()
+        ).all()
+        inactive = [username for username, in db.query(User.username).filter(User.is_active.is_(False))]
+        # Runs inside the request's session; the connection must not stay checked out
+        db.rollback()
+        users = {}
+        for row in rows:
+            if row.username and row.issued_before:
+                users[row.username] = max(users.get(row.username, 0), epoch_seconds(row.issued_before))
+        users.update(dict.fromkeys(inactive, float("inf")))
+        with self._lock:
+            self._jtis = frozenset(row.jti for row in rows if row.jti)
+            self._users = MappingProxyType(users)
+            self._loaded_at = time.monotonic()
+
+    async def ensure_fresh_async(self, db: AnySession) -> None:
+        if not self.stale:
+            return
+        # Requests arriving during the reload keep using the current snapshot
+        self._loaded_at = time.monotonic()
+        await run_in_session(db, self.load)
+
+    def is_revoked(self, claims: Mapping[str, Any]) -> bool:
+        if claims.get("jti") in self._jtis:
+            return True
+        issued_before = self._users.get(claims["sub"])
+        return issued_before is not None and claims.get("iat", 0) <= issued_before
+
+    def revoke_token(self, db: Session, claims: Mapping[str, Any]) -> None:
+        """Reject one token (logout) until it expires; tokens issued without a jti revoke all of the user's"""
+        if not claims.get("jti"):
+            return self.revoke_user(db, claims["sub"])
+        expires_at = datetime.utcfromtimestamp(claims["exp"])
+        db.add(TokenRevocation(jti=claims["jti"], username=claims["sub"], expires_at=expires_at))
+        self._purge_expired(db)
+        db.commit()
+        with self._lock:
+            self._jtis = self._jtis | {claims["jti"]}
+
+    def revoke_user(self, db: Session, username: str) -> None:
+        """Reject every token of username issued until now (forced logout)"""
+        issued_before = revoke_user_tokens(db.connection(), username)
+        self._purge_expired(db)
+        db.commit()
+        with self._lock:
+            self._users = MappingProxyType(dict(self._users, **{username: epoch_seconds(issued_before)}))
+
+    @staticmethod
+    def _purge_expired(db: Session) -> None:
+        db.execute(delete(TokenRevocation).where(TokenRevocation.expires_at <= datetime.utcnow()))
+
+
+revocation_list = RevocationList(refresh=settings.token_revocation_refresh_seconds)
@@ -1,41 +1,158 @@
+from calendar import timegm
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from backend.config import settings
+from backend.core.cache import TTLCache
+import asyncio
+import hashlib
+import multiprocessing
+import time
+import uuid
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+def build_password_context(scheme: str, bcrypt_rounds: int) -> CryptContext:
+    """Hash new passwords with scheme; any other scheme, or bcrypt below bcrypt_rounds, needs an update"""
+    return CryptContext(
+        schemes=list(dict.fromkeys([scheme, "bcrypt"])),
+        default=scheme,
+        deprecated="auto",
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds
+    )
+
+pwd_context = build_password_context(settings.password_hash_scheme, settings.bcrypt_rounds)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """(valid, new hash); the new hash is set when the stored one uses an outdated scheme or cost"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+def _init_password_worker(scheme: str, bcrypt_rounds: int) -> None:
+    # Workers are spawned, so they take the context of the parent rather than re-reading the settings
+    global pwd_context
+    pwd_context = build_password_context(scheme, bcrypt_rounds)
+
+
+class PasswordVerifier:
+    """Password checks for the login endpoint, off the event loop and the request thread pool.
+    
+    A bcrypt or argon2 check is a few hundred milliseconds of CPU. They run in
+    a small process pool, so a burst of logins (shift start) takes at most
+    `workers` cores and never the threads that serve every other endpoint.
+    Logins beyond max_pending waiting for a worker are answered 503 right away.
+    With workers=0 checks run in the thread pool.
+    """
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_password_worker,
+                initargs=(settings.password_hash_scheme, settings.bcrypt_rounds)
+            )
+        return self._executor
+    
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        if self._pending >= self.max_pending:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many logins in progress, please retry",
+                headers={"Retry-After": "1"}
+            )
+        self._pending += 1
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(verify_and_update_password, plain_password, hashed_password)
+            loop = asyncio.get_running_loop()
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(), verify_and_update_password, plain_password, hashed_password
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory): start a new pool and retry once
+                self.shutdown()
+                return await loop.run_in_executor(
+                    self._get_executor(), verify_and_update_password, plain_password, hashed_password
+                )
+        finally:
+            self._pending -= 1
+    
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_verifier = PasswordVerifier(settings.password_hash_workers, settings.password_hash_max_pending)
+
+# Longest a token can live: the login lifetime or the default of create_access_token
+MAX_TOKEN_LIFETIME = max(timedelta(minutes=settings.access_token_expire_minutes), timedelta(hours=24))
+
+# Claims of verified tokens by sha256 of the token; an entry never outlives its token
+token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds)
+
+def epoch_seconds(value: datetime) -> float:
+    """Seconds since the epoch of a naive UTC datetime, microseconds included"""
+    return timegm(value.utctimetuple()) + value.microsecond / 1_000_000
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+    """Signed token with data as claims, plus exp, iat and a jti that identifies it for revocation"""
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(hours=24)  # 24 horas sin timeout
+        expire = issued_at + timedelta(hours=24)  # 24 horas sin timeout
     
-    to_encode.update({"exp": expire})
+    # A fractional iat tells a token issued right after a revocation from one issued in the same second before it
+    to_encode.update({"exp": expire, "iat": epoch_seconds(issued_at), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str):
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials"
+    )
+
+def decode_token(token: str) -> Mapping[str, Any]:
+    """Claims of a valid token, read-only.
+    
+    The signature and claims are checked the first time a token is seen;
+    later requests with it are answered from token_cache until it expires.
+    Revocation is not checked here, see backend.core.revocation.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None and claims["exp"] > time.time():
+        return claims
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials"
-            )
-        return username
     except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
-        )
\ No newline at end of file
+        raise _credentials_exception()
+    if payload.get("sub") is None or payload.get("exp") is None:
+        raise _credentials_exception()
+    claims = MappingProxyType(payload)
+    token_cache.set(key, claims, ttl=claims["exp"] - time.time())
+    return claims
+
+def verify_token(token: str):
+    return decode_token(token)["sub"]
\ No newline at end of file
@@ -0,0 +1,18 @@
+from typing import Optional
+import unicodedata
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """Lowercase and strip accents, so "Martíllo" and "MARTILLO" match.
+
+    Mirrors the items_search_key() function that maintains the column on PostgreSQL.
+    """
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def build_search_key(name: Optional[str], n_factura: Optional[str], barcode: Optional[str]) -> str:
+    """Single normalized column covering every searchable field of an item"""
+    return " ".join(normalize_search_text(part) for part in (name, n_factura, barcode))
@@ -1,8 +1,25 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from backend.config import settings
 
+# Async drivers used when async_database is enabled
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """Swap the driver of a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for {parsed.get_backend_name()}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
 engine = create_engine(
     settings.database_url,
     pool_size=10,           # Agregar
@@ -12,4 +29,23 @@ engine = create_engine(
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.async_database:
+    async_url = to_async_url(settings.database_url)
+    pool_options = dict(
+        pool_size=settings.async_pool_size,
+        max_overflow=settings.async_max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+    if async_url.startswith("sqlite"):
+        # aiosqlite (used for tests) defaults to NullPool, i.e. a new connection per request
+        pool_options["poolclass"] = AsyncAdaptedQueuePool
+    async_engine = create_async_engine(async_url, **pool_options)
+    # Objects stay readable after commit; lazy loads are not possible outside run_sync
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
 Base = declarative_base()
\ No newline at end of file
@@ -0,0 +1,17 @@
+from typing import Any, Callable, TypeVar, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+T = TypeVar("T")
+AnySession = Union[Session, AsyncSession]
+
+async def run_in_session(db: AnySession, fn: Callable[..., T], *args: Any) -> T:
+    """Run sync ORM code fn(session, *args) without blocking the event loop.
+    
+    On an AsyncSession it runs through run_sync, so the database I/O is awaited
+    on the async driver; on a regular Session it runs in the thread pool.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
\ No newline at end of file
@@ -1,9 +1,40 @@
+from typing import AsyncIterator, Optional
+import anyio
 from sqlalchemy.orm import Session
-from backend.database.base import SessionLocal
+from backend.database.base import SessionLocal, AsyncSessionLocal
+from backend.database.concurrency import AnySession, run_in_session
+
+# Closing a session must never wait behind requests that are waiting for its connection
+SESSION_CLOSE_THREADS = 20
+_close_limiter: Optional[anyio.CapacityLimiter] = None
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_session() -> AsyncIterator[AnySession]:
+    """Session for async endpoints: an AsyncSession when async_database is on, a regular Session otherwise"""
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await _close_session(db)
+
+async def _close_session(db: Session) -> None:
+    """Return the connection on threads of its own.
+    
+    With the shared thread pool, once every worker is blocked waiting for a
+    pooled connection, the sessions holding those connections can never get a
+    thread to close on, and the process stalls until the pool timeout.
+    """
+    global _close_limiter
+    if _close_limiter is None:
+        _close_limiter = anyio.CapacityLimiter(SESSION_CLOSE_THREADS)
+    await anyio.to_thread.run_sync(db.close, limiter=_close_limiter)
\ No newline at end of file
@@ -1,14 +1,29 @@
-from supabase import create_client, Client
+from functools import lru_cache
+from typing import TYPE_CHECKING
 from backend.config import settings
 
-def get_supabase_client() -> Client:
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Clients are built on first use: importing the package and creating a client
+# both cost time on every worker start, and most workers never need one
+
+@lru_cache(maxsize=None)
+def get_supabase_client() -> "Client":
     """Get Supabase client instance"""
+    from supabase import create_client
     return create_client(settings.supabase_url, settings.supabase_anon_key)
 
-def get_supabase_admin_client() -> Client:
+@lru_cache(maxsize=None)
+def get_supabase_admin_client() -> "Client":
     """Get Supabase admin client instance"""
+    from supabase import create_client
     return create_client(settings.supabase_url, settings.supabase_service_role_key)
 
-# Global client instances
-supabase_client = get_supabase_client()
-supabase_admin = get_supabase_admin_client()
\ No newline at end of file
+def __getattr__(name: str):
+    # The former global instances, still importable by name
+    if name == "supabase_client":
+        return get_supabase_client()
+    if name == "supabase_admin":
+        return get_supabase_admin_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,11 +5,12 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from backend.api.v1.endpoints import auth, inventory, withdrawals, warehouses, history
 from backend.config import settings
-from backend.database.base import engine
+from backend.core.security import password_verifier
+from backend.database.base import engine, SessionLocal, async_engine
 from backend.models import Base
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from backend.services.stock_events import stock_events
+from backend.services.warehouse_registry import warehouse_registry
+import asyncio
 
 # Create rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -40,6 +41,37 @@ app.include_router(inventory.router, prefix="/api/v1/inventory", tags=["inventor
 app.include_router(withdrawals.router, prefix="/api/v1/withdrawals", tags=["withdrawals"])
 app.include_router(history.router, prefix="/api/v1/history", tags=["history"])
 
+@app.on_event("startup")
+def create_tables():
+    # Registered first: the other startup steps read the tables
+    if settings.create_tables_on_startup:
+        Base.metadata.create_all(bind=engine)
+
+@app.on_event("startup")
+def load_warehouse_registry():
+    db = SessionLocal()
+    try:
+        warehouse_registry.load(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def start_stock_events():
+    stock_events.start(asyncio.get_running_loop(), engine)
+
+@app.on_event("shutdown")
+def stop_stock_events():
+    stock_events.stop()
+
+@app.on_event("shutdown")
+def stop_password_verifier():
+    password_verifier.shutdown()
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
 @app.get("/")
 def read_root():
     return {"message": "Multi-Warehouse Inventory System API"}
@@ -1,8 +1,10 @@
 from .base import Base
 from .user import User
 from .warehouse import Warehouse
-from .item import Item
+from .item import Item, ItemTombstone
 from .withdrawal import Withdrawal
 from .history import History
+from .idempotency import IdempotencyKey
+from .token_revocation import TokenRevocation
 
-__all__ = ["Base", "User", "Warehouse", "Item", "Withdrawal", "History"]
\ No newline at end of file
+__all__ = ["Base", "User", "Warehouse", "Item", "ItemTombstone", "Withdrawal", "History", "IdempotencyKey", "TokenRevocation"]
\ No newline at end of file
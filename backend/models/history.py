@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Text, ForeignKey, Index, desc
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -25,4 +25,9 @@ class History(BaseModel):
     # Relationships
     item = relationship("Item")
     user = relationship("User")
-    warehouse = relationship("Warehouse")
\ No newline at end of file
+    warehouse = relationship("Warehouse")
+    
+    __table_args__ = (
+        Index('idx_history_warehouse_date', 'warehouse_id', desc('action_date'), desc('id')),  # Historial por bodega
+        Index('idx_history_item_date', 'item_id', desc('action_date'), desc('id')),            # Historial por item
+    )
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, DateTime, Text, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from .base import Base
+
+class IdempotencyKey(Base):
+    """A write sent with an Idempotency-Key header and the response it produced"""
+    __tablename__ = "idempotency_keys"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of the endpoint and the request body
+    response = Column(Text)  # JSON; set in the transaction of the write
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_idempotency_keys_created_at', 'created_at'),  # Purga por antigüedad
+    )
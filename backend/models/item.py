@@ -1,7 +1,14 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Text, Numeric, Index
+from sqlalchemy import (
+    Column, String, Integer, BigInteger, DateTime, ForeignKey, Text, Numeric, Index, CheckConstraint,
+    DDL, FetchedValue, event, func, text
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
-from .base import BaseModel
+from backend.core.text_search import build_search_key
+from .base import Base, BaseModel
+
+# Items below this stock are reported as low unless given a threshold of their own
+DEFAULT_REORDER_THRESHOLD = 10
 
 class Item(BaseModel):
     __tablename__ = "items"
@@ -10,8 +17,14 @@ class Item(BaseModel):
     description = Column(Text)
     barcode = Column(String(100), unique=True, nullable=False, index=True)
     stock = Column(Integer, default=0)
+    reorder_threshold = Column(
+        Integer, nullable=False, default=DEFAULT_REORDER_THRESHOLD, server_default=text(str(DEFAULT_REORDER_THRESHOLD))
+    )  # Low stock when stock < reorder_threshold; 0 never reports the item
     obra = Column(String(100), nullable=False)
     n_factura = Column(String(50), nullable=False)
+    search_key = Column(Text)  # name + n_factura + barcode, lowercase and without accents
+    # Set by the database on every insert/update, see ITEM_ROW_VERSION_DDL
+    row_version = Column(BigInteger, nullable=False, server_default=text("0"), server_onupdate=FetchedValue())
     
     # Foreign Keys
     warehouse_id = Column(UUID(as_uuid=True), ForeignKey("warehouses.id"), nullable=False)
@@ -21,6 +34,149 @@ class Item(BaseModel):
     withdrawal_items = relationship("WithdrawalItem", back_populates="item")
 
     __table_args__ = (
-        Index('idx_warehouse_obra', 'warehouse_id', 'obra'),  # Para búsquedas por bodega+obra
+        Index('idx_items_warehouse_name', 'warehouse_id', 'name', 'id'),  # Paginación keyset por bodega
+        Index('idx_items_warehouse_obra_name', 'warehouse_id', 'obra', 'name', 'id'),  # Paginación por bodega+obra
         Index('idx_name_barcode', 'name', 'barcode'),        # Para búsquedas de texto
-    )
\ No newline at end of file
+        Index('idx_items_search_key_trgm', 'search_key',
+              postgresql_using='gin', postgresql_ops={'search_key': 'gin_trgm_ops'}),  # Búsqueda por subcadena
+        Index('idx_items_barcode_prefix', 'barcode',
+              postgresql_ops={'barcode': 'varchar_pattern_ops'}),  # Búsqueda por prefijo de código
+        Index('idx_items_warehouse_row_version', 'warehouse_id', 'row_version', 'id'),  # Feed de cambios
+        Index('idx_items_low_stock', 'warehouse_id', 'stock', 'name', 'id',
+              postgresql_where=text('stock < reorder_threshold'),
+              sqlite_where=text('stock < reorder_threshold')),  # Reporte de stock bajo
+        CheckConstraint('stock >= 0', name='ck_items_stock_non_negative'),  # Nunca sobre-vender
+        CheckConstraint('reorder_threshold >= 0', name='ck_items_reorder_threshold_non_negative'),
+    )
+
+
+class ItemTombstone(Base):
+    """An item that left a warehouse (deleted or moved), for the change feed"""
+    __tablename__ = "item_tombstones"
+    
+    item_id = Column(UUID(as_uuid=True), primary_key=True)
+    row_version = Column(BigInteger, primary_key=True)
+    warehouse_id = Column(UUID(as_uuid=True), nullable=False)
+    deleted_at = Column(DateTime, server_default=func.now())
+    
+    __table_args__ = (
+        Index('idx_item_tombstones_warehouse_version', 'warehouse_id', 'row_version'),
+    )
+
+
+# On PostgreSQL the items_search_key trigger below overwrites this, so rows
+# written outside the ORM are searchable too; SQLite relies on this hook
+@event.listens_for(Item, "before_insert")
+@event.listens_for(Item, "before_update")
+def _refresh_search_key(mapper, connection, target):
+    target.search_key = build_search_key(target.name, target.n_factura, target.barcode)
+
+
+# The trigram index and the search key trigger need their extensions before the table is created
+for _extension in ("pg_trgm", "unaccent"):
+    event.listen(
+        Item.__table__,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {_extension}").execute_if(dialect="postgresql")
+    )
+
+# search_key is recomputed by a trigger on every write path, like row_version;
+# items_search_key() is the SQL twin of build_search_key
+ITEM_SEARCH_KEY_DDL = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION items_search_key(name text, n_factura text, barcode text) RETURNS text AS $$
+            SELECT lower(unaccent(coalesce(name, ''))) || ' ' ||
+                   lower(unaccent(coalesce(n_factura, ''))) || ' ' ||
+                   lower(unaccent(coalesce(barcode, '')))
+        $$ LANGUAGE sql STABLE
+        """,
+        """
+        CREATE OR REPLACE FUNCTION items_refresh_search_key() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_key := items_search_key(NEW.name, NEW.n_factura, NEW.barcode);
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER items_search_key BEFORE INSERT OR UPDATE OF name, n_factura, barcode, search_key ON items
+        FOR EACH ROW EXECUTE FUNCTION items_refresh_search_key()
+        """,
+    ],
+}
+
+# Row versions are stamped by triggers so every write path gets one: ORM
+# flushes, the guarded stock UPDATEs, the import upsert and edits made
+# directly in the database. On PostgreSQL the version is the id of the
+# writing transaction; the change feed only returns versions below the
+# oldest transaction still running, so one committing late is never skipped.
+# SQLite has a single writer and uses a counter.
+ITEM_ROW_VERSION_DDL = {
+    "postgresql": [
+        """
+        CREATE OR REPLACE FUNCTION items_stamp_row_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.row_version := pg_current_xact_id()::text::bigint;
+            IF TG_OP = 'UPDATE' AND NEW.warehouse_id IS DISTINCT FROM OLD.warehouse_id THEN
+                INSERT INTO item_tombstones (item_id, warehouse_id, row_version)
+                VALUES (OLD.id, OLD.warehouse_id, NEW.row_version) ON CONFLICT DO NOTHING;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE OR REPLACE FUNCTION items_record_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO item_tombstones (item_id, warehouse_id, row_version)
+            VALUES (OLD.id, OLD.warehouse_id, pg_current_xact_id()::text::bigint) ON CONFLICT DO NOTHING;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER items_row_version BEFORE INSERT OR UPDATE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_stamp_row_version()
+        """,
+        """
+        CREATE TRIGGER items_tombstone AFTER DELETE ON items
+        FOR EACH ROW EXECUTE FUNCTION items_record_tombstone()
+        """,
+    ],
+    "sqlite": [
+        "CREATE TABLE IF NOT EXISTS item_row_version (value INTEGER NOT NULL)",
+        "INSERT INTO item_row_version (value) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM item_row_version)",
+        """
+        CREATE TRIGGER items_row_version_insert AFTER INSERT ON items
+        BEGIN
+            UPDATE item_row_version SET value = value + 1;
+            UPDATE items SET row_version = (SELECT value FROM item_row_version) WHERE id = NEW.id;
+        END
+        """,
+        """
+        CREATE TRIGGER items_row_version_update AFTER UPDATE ON items
+        WHEN NEW.row_version = OLD.row_version
+        BEGIN
+            UPDATE item_row_version SET value = value + 1;
+            UPDATE items SET row_version = (SELECT value FROM item_row_version) WHERE id = NEW.id;
+            INSERT INTO item_tombstones (item_id, warehouse_id, row_version)
+            SELECT OLD.id, OLD.warehouse_id, value FROM item_row_version
+            WHERE NEW.warehouse_id IS NOT OLD.warehouse_id;
+        END
+        """,
+        """
+        CREATE TRIGGER items_tombstone AFTER DELETE ON items
+        BEGIN
+            UPDATE item_row_version SET value = value + 1;
+            INSERT INTO item_tombstones (item_id, warehouse_id, row_version)
+            SELECT OLD.id, OLD.warehouse_id, value FROM item_row_version;
+        END
+        """,
+    ],
+}
+
+for _ddl in (ITEM_ROW_VERSION_DDL, ITEM_SEARCH_KEY_DDL):
+    for _dialect, _statements in _ddl.items():
+        for _statement in _statements:
+            event.listen(Item.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
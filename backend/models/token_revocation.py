@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime, Index
+from .base import BaseModel
+
+class TokenRevocation(BaseModel):
+    """Access tokens rejected before their expiry: one token (logout) or every token of a user issued before a time"""
+    __tablename__ = "token_revocations"
+    
+    jti = Column(String(32))
+    username = Column(String(50))
+    issued_before = Column(DateTime)
+    expires_at = Column(DateTime, nullable=False)  # Once past, every token it covers has expired
+    
+    __table_args__ = (
+        Index('idx_token_revocations_expires_at', 'expires_at'),
+    )
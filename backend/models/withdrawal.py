@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Text, Index, desc
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -19,6 +19,10 @@ class Withdrawal(BaseModel):
     user = relationship("User", back_populates="withdrawals")
     warehouse = relationship("Warehouse", back_populates="withdrawals")
     items = relationship("WithdrawalItem", back_populates="withdrawal")
+    
+    __table_args__ = (
+        Index('idx_withdrawals_warehouse_date', 'warehouse_id', desc('withdrawal_date'), desc('id')),  # Retiros por bodega
+    )
 
 class WithdrawalItem(BaseModel):
     __tablename__ = "withdrawal_items"
@@ -31,4 +35,8 @@ class WithdrawalItem(BaseModel):
     
     # Relationships
     withdrawal = relationship("Withdrawal", back_populates="items")
-    item = relationship("Item", back_populates="withdrawal_items")
\ No newline at end of file
+    item = relationship("Item", back_populates="withdrawal_items")
+    
+    __table_args__ = (
+        Index('idx_withdrawal_items_withdrawal_id', 'withdrawal_id'),  # Líneas de un retiro
+    )
\ No newline at end of file
@@ -1,13 +1,18 @@
 from .user import User, UserCreate, UserLogin, Token
-from .warehouse import Warehouse, WarehouseCreate
-from .item import Item, ItemCreate, ItemUpdate
+from .warehouse import Warehouse, WarehouseCreate, WarehouseUpdate, WarehouseSummary
+from .item import (
+    Item, ItemCreate, ItemUpdate, ItemPage, ItemChange, ItemChanges, BarcodeResolveRequest, BarcodeResolution,
+    ItemImportRow, ItemImportError, ItemImportReport, LowStockReport
+)
 from .withdrawal import Withdrawal, WithdrawalCreate, WithdrawalItem
-from .history import History
+from .history import History, HistoryPage
 
 __all__ = [
     "User", "UserCreate", "UserLogin", "Token",
-    "Warehouse", "WarehouseCreate",
-    "Item", "ItemCreate", "ItemUpdate",
+    "Warehouse", "WarehouseCreate", "WarehouseUpdate", "WarehouseSummary",
+    "Item", "ItemCreate", "ItemUpdate", "ItemPage", "ItemChange", "ItemChanges",
+    "BarcodeResolveRequest", "BarcodeResolution",
+    "ItemImportRow", "ItemImportError", "ItemImportReport", "LowStockReport",
     "Withdrawal", "WithdrawalCreate", "WithdrawalItem",
-    "History"
+    "History", "HistoryPage"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
@@ -18,4 +18,8 @@ class History(HistoryBase):
     action_date: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class HistoryPage(BaseModel):
+    items: List[History]
+    next_cursor: Optional[str] = None
\ No newline at end of file
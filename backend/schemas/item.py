@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 import uuid
 
@@ -13,7 +13,8 @@ class ItemBase(BaseModel):
     warehouse_id: uuid.UUID
 
 class ItemCreate(ItemBase):
-    pass
+    # None keeps the column default (DEFAULT_REORDER_THRESHOLD of backend.models.item)
+    reorder_threshold: Optional[int] = Field(None, ge=0)
 
 class ItemUpdate(BaseModel):
     name: Optional[str] = None
@@ -21,10 +22,78 @@ class ItemUpdate(BaseModel):
     stock: Optional[int] = None
     obra: Optional[str] = None
     n_factura: Optional[str] = None
+    reorder_threshold: Optional[int] = Field(None, ge=0)
 
 class Item(ItemBase):
     id: uuid.UUID
     created_at: datetime
+    # Defaulted so responses stored before the column existed (idempotency keys) still load
+    reorder_threshold: int = 10
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ItemPage(BaseModel):
+    items: List[Item]
+    next_cursor: Optional[str] = None
+
+class ItemChange(BaseModel):
+    """Item as sent by the change feed; the warehouse is the one the feed was asked for"""
+    id: uuid.UUID
+    name: str
+    description: Optional[str] = None
+    barcode: str
+    stock: int
+    obra: str
+    n_factura: str
+    reorder_threshold: int
+    row_version: int
+    
+    class Config:
+        from_attributes = True
+
+class ItemChanges(BaseModel):
+    """Changes of a warehouse's items with a version in [since, next_since).
+    
+    Apply deletes before upserts: an item that left the warehouse and came
+    back appears in both. has_more means next_since can be asked right away.
+    """
+    upserts: List[ItemChange]
+    deletes: List[uuid.UUID]
+    next_since: int
+    has_more: bool
+
+class LowStockReport(BaseModel):
+    """Items of a warehouse below their reorder threshold, emptiest first; total counts them all"""
+    warehouse_id: uuid.UUID
+    total: int
+    items: List[Item]
+
+class BarcodeResolveRequest(BaseModel):
+    barcodes: List[str] = Field(..., min_length=1, max_length=500)
+
+class BarcodeResolution(BaseModel):
+    """Items found and barcodes not found, both in request order without repeats"""
+    items: List[Item]
+    missing: List[str]
+
+class ItemImportRow(BaseModel):
+    """One row of a bulk import file; stock is added to the item if the barcode exists"""
+    name: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = None
+    barcode: str = Field(..., min_length=1, max_length=100)
+    stock: int = Field(0, ge=0)
+    obra: Optional[str] = Field(None, max_length=100)
+    n_factura: Optional[str] = Field(None, max_length=50)
+
+class ItemImportError(BaseModel):
+    row: int
+    barcode: Optional[str] = None
+    error: str
+
+class ItemImportReport(BaseModel):
+    total_rows: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ItemImportError] = []
\ No newline at end of file
@@ -13,9 +13,24 @@ class WarehouseBase(BaseModel):
 class WarehouseCreate(WarehouseBase):
     pass
 
+class WarehouseUpdate(BaseModel):
+    name: Optional[str] = None
+    code: Optional[str] = None
+    description: Optional[str] = None
+    location: Optional[str] = None
+    is_active: Optional[bool] = None
+
 class Warehouse(WarehouseBase):
     id: uuid.UUID
     created_at: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class WarehouseSummary(BaseModel):
+    """Stock totals of a warehouse; low_stock_count matches the total of /inventory/low-stock, out-of-stock items included"""
+    warehouse_id: uuid.UUID
+    item_count: int
+    total_stock: int
+    out_of_stock_count: int
+    low_stock_count: int
\ No newline at end of file
@@ -32,4 +32,8 @@ class Withdrawal(WithdrawalBase):
     items: List[WithdrawalItem]
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class WithdrawalPage(BaseModel):
+    items: List[Withdrawal]
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""Async fronts for the inventory, import, withdrawal, history and stock report services.
+
+The business logic lives once, in the sync services. These wrappers run it
+through run_in_session: on AsyncSession.run_sync when async_database is on,
+in the thread pool otherwise. Results are converted to schemas inside the
+session call, so nothing is lazy-loaded after control returns to the event
+loop.
+"""
+
+from typing import AsyncIterator, BinaryIO, Iterator, List, Optional, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from backend.database.concurrency import AnySession, run_in_session
+from backend.core.exceptions import WarehouseNotFoundException
+from backend.core.principal import UserSnapshot
+from backend.models.history import History
+from backend.schemas.item import (
+    Item as ItemSchema, ItemCreate, ItemImportReport, BarcodeResolution, ItemChanges, LowStockReport
+)
+from backend.schemas.history import History as HistorySchema
+from backend.schemas.warehouse import WarehouseSummary
+from backend.schemas.withdrawal import Withdrawal as WithdrawalSchema, WithdrawalCreate
+from backend.services.barcode_cache import barcode_cache
+from backend.services.history_service import HistoryService
+from backend.services.idempotency_service import IdempotencyService, IdempotentRequest
+from backend.services.import_service import ImportService, DEFAULT_CHUNK_SIZE, iter_upload_rows, read_chunk
+from backend.services.inventory_service import InventoryService
+from backend.services.stock_report_service import StockReportService, DEFAULT_LOW_STOCK_ITEMS
+from backend.services.warehouse_registry import warehouse_registry
+from backend.services.withdrawal_service import WithdrawalService
+
+ItemPage = Tuple[List[ItemSchema], Optional[str]]
+HistoryPage = Tuple[List[HistorySchema], Optional[str]]
+WithdrawalPage = Tuple[List[WithdrawalSchema], Optional[str]]
+
+
+def _item_page(page) -> ItemPage:
+    items, next_cursor = page
+    return [ItemSchema.model_validate(item) for item in items], next_cursor
+
+
+def _history_page(page) -> HistoryPage:
+    records, next_cursor = page
+    return [HistorySchema.model_validate(record) for record in records], next_cursor
+
+
+class AsyncInventoryService:
+    def __init__(self, db: AnySession):
+        self.db = db
+
+    async def create_item(self, item_data: ItemCreate) -> ItemSchema:
+        def create(session):
+            return ItemSchema.model_validate(InventoryService(session).create_item(item_data))
+        return await run_in_session(self.db, create)
+
+    async def add_item_stock(
+        self, item_id: str, quantity: int, user: UserSnapshot, idempotency_key: Optional[str] = None
+    ) -> ItemSchema:
+        request = IdempotentRequest.build(user.id, idempotency_key, f"add_stock:{item_id}", {"quantity": quantity})
+        def add(session):
+            return IdempotencyService(session).execute(
+                request,
+                lambda claim: ItemSchema.model_validate(
+                    InventoryService(session).add_item_stock(item_id, quantity, user, claim)
+                ),
+                ItemSchema
+            )
+        return await run_in_session(self.db, add)
+
+    async def get_item_by_barcode(self, barcode: str) -> ItemSchema:
+        # Cache hits are answered on the event loop without touching the session
+        cached = barcode_cache.get(barcode)
+        if cached is not None:
+            return cached
+        return await run_in_session(self.db, lambda session: InventoryService(session).fetch_item_by_barcode(barcode))
+
+    async def get_items_by_barcodes(self, barcodes: List[str]) -> BarcodeResolution:
+        barcodes = list(dict.fromkeys(barcodes))
+        found = barcode_cache.get_many(barcodes)
+        pending = [barcode for barcode in barcodes if barcode not in found]
+        if pending:
+            found.update(await run_in_session(
+                self.db, lambda session: InventoryService(session).fetch_items_by_barcodes(pending)
+            ))
+        return InventoryService.barcode_resolution(barcodes, found)
+
+    async def get_items_by_warehouse(
+        self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 50
+    ) -> ItemPage:
+        def page(session):
+            return _item_page(InventoryService(session).get_items_by_warehouse(warehouse_id, cursor, per_page))
+        return await run_in_session(self.db, page)
+
+    async def search_items(
+        self, query: str, warehouse_id: Optional[str] = None, cursor: Optional[str] = None, per_page: int = 50
+    ) -> ItemPage:
+        def page(session):
+            return _item_page(InventoryService(session).search_items(query, warehouse_id, cursor, per_page))
+        return await run_in_session(self.db, page)
+
+    async def update_item_stock(self, item_id: str, new_stock: int) -> ItemSchema:
+        def update(session):
+            return ItemSchema.model_validate(InventoryService(session).update_item_stock(item_id, new_stock))
+        return await run_in_session(self.db, update)
+
+    async def set_reorder_threshold(self, item_id: str, reorder_threshold: int) -> ItemSchema:
+        def update(session):
+            return ItemSchema.model_validate(
+                InventoryService(session).set_reorder_threshold(item_id, reorder_threshold)
+            )
+        return await run_in_session(self.db, update)
+
+    async def get_items_by_obra(
+        self, obra: str, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 50
+    ) -> ItemPage:
+        def page(session):
+            return _item_page(InventoryService(session).get_items_by_obra(obra, warehouse_id, cursor, per_page))
+        return await run_in_session(self.db, page)
+
+    async def get_item_changes(self, warehouse_id: str, since: int, limit: int) -> ItemChanges:
+        return await run_in_session(
+            self.db, lambda session: InventoryService(session).get_item_changes(warehouse_id, since, limit)
+        )
+
+
+class AsyncImportService:
+    def __init__(self, db: AnySession):
+        self.db = db
+
+    async def import_items(
+        self,
+        stream: BinaryIO,
+        fmt: str,
+        warehouse_id: str,
+        user: UserSnapshot,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> ItemImportReport:
+        warehouse = await warehouse_registry.get_async(warehouse_id, self.db)
+        if not warehouse:
+            raise WarehouseNotFoundException(warehouse_id)
+
+        report = ItemImportReport()
+        rows = iter_upload_rows(stream, fmt)
+        while True:
+            # Reading the spooled upload and validating it is blocking work of its own;
+            # the session is only held for the upsert
+            read, valid, errors = await run_in_threadpool(read_chunk, rows, chunk_size)
+            if not read:
+                break
+            ImportService.add_to_report(report, read, errors)
+            ImportService.add_to_report(report, 0, *await run_in_session(
+                self.db, lambda session: ImportService(session).import_chunk(valid, warehouse, user)
+            ))
+        report.errors.sort(key=lambda error: error.row)
+        return report
+
+
+class AsyncWithdrawalService:
+    def __init__(self, db: AnySession):
+        self.db = db
+
+    async def create_withdrawal(
+        self, withdrawal_data: WithdrawalCreate, user: UserSnapshot, idempotency_key: Optional[str] = None
+    ) -> WithdrawalSchema:
+        request = IdempotentRequest.build(
+            user.id, idempotency_key, "withdrawal", withdrawal_data.model_dump(mode="json")
+        )
+        def create(session):
+            return IdempotencyService(session).execute(
+                request,
+                lambda claim: WithdrawalService(session).create_withdrawal(withdrawal_data, user, claim),
+                WithdrawalSchema
+            )
+        return await run_in_session(self.db, create)
+
+    async def get_withdrawals_by_warehouse(
+        self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 50, **filters
+    ) -> WithdrawalPage:
+        def page(session):
+            service = WithdrawalService(session)
+            withdrawals, next_cursor = service.get_withdrawals_by_warehouse(warehouse_id, cursor, per_page, **filters)
+            return [service.convert_to_withdrawal_schema(withdrawal) for withdrawal in withdrawals], next_cursor
+        return await run_in_session(self.db, page)
+
+
+class AsyncStockReportService:
+    def __init__(self, db: AnySession):
+        self.db = db
+
+    async def get_summary(self, warehouse_id: str) -> WarehouseSummary:
+        # Cache hits are answered on the event loop without touching the session
+        cached = StockReportService.cached_summary(warehouse_id)
+        if cached is not None:
+            return cached
+        return await run_in_session(self.db, lambda session: StockReportService(session).get_summary(warehouse_id))
+
+    async def get_low_stock(self, warehouse_id: str, limit: int = DEFAULT_LOW_STOCK_ITEMS) -> LowStockReport:
+        cached = StockReportService.cached_low_stock(warehouse_id, limit)
+        if cached is not None:
+            return cached
+        return await run_in_session(
+            self.db, lambda session: StockReportService(session).get_low_stock(warehouse_id, limit)
+        )
+
+
+class AsyncHistoryService:
+    def __init__(self, db: AnySession):
+        self.db = db
+
+    async def get_history_by_warehouse(
+        self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 100, **filters
+    ) -> HistoryPage:
+        def page(session):
+            return _history_page(
+                HistoryService(session).get_history_by_warehouse(warehouse_id, cursor, per_page, **filters)
+            )
+        return await run_in_session(self.db, page)
+
+    async def get_history_by_item(
+        self, item_id: str, cursor: Optional[str] = None, per_page: int = 100, **filters
+    ) -> HistoryPage:
+        def page(session):
+            return _history_page(HistoryService(session).get_history_by_item(item_id, cursor, per_page, **filters))
+        return await run_in_session(self.db, page)
+
+    async def get_all_history(self, cursor: Optional[str] = None, per_page: int = 100, **filters) -> HistoryPage:
+        def page(session):
+            return _history_page(HistoryService(session).get_all_history(cursor, per_page, **filters))
+        return await run_in_session(self.db, page)
+
+    def iter_history(self, batch_size: int = 500, **filters) -> Union[Iterator[History], AsyncIterator[History]]:
+        """Rows newest first; an async iterator over a server-side cursor on the async engine"""
+        if isinstance(self.db, AsyncSession):
+            return self._stream_history(batch_size, **filters)
+        return HistoryService(self.db).iter_history(batch_size, **filters)
+
+    async def _stream_history(self, batch_size: int, **filters) -> AsyncIterator[History]:
+        # Building the query does no I/O, so the sync facade of the session is enough
+        statement = HistoryService(self.db.sync_session)._filtered_query(**filters).order_by(
+            History.action_date.desc(), History.id.desc()
+        ).statement.execution_options(yield_per=batch_size)
+        result = await self.db.stream_scalars(statement)
+        async for record in result:
+            yield record
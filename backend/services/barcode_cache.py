@@ -0,0 +1,23 @@
+"""Process-wide barcode -> item snapshot cache for the scan path.
+
+Stock writes evict the barcodes they change once committed. Writes made by
+other workers arrive as stock events (LISTEN/NOTIFY on PostgreSQL) and
+evict their barcodes the same way.
+"""
+
+from typing import Any, Dict, List, Optional
+from backend.config import settings
+from backend.core.cache import EvictingCache
+from backend.services.stock_events import stock_events
+
+
+def barcodes_of_event(event: Dict[str, Any]) -> Optional[List[str]]:
+    # A resync does not say which barcodes changed: the whole cache goes
+    return [event["barcode"]] if event["type"] == "stock" else None
+
+
+barcode_cache = EvictingCache(
+    maxsize=settings.barcode_cache_size,
+    ttl=settings.barcode_cache_ttl_seconds
+)
+stock_events.watch(barcode_cache, barcodes_of_event)
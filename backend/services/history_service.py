@@ -1,10 +1,15 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, Query
+from typing import Iterator, List, Optional, Tuple
 from datetime import datetime
 from backend.models.history import History
 from backend.models.item import Item
 from backend.models.user import User
 from backend.models.warehouse import Warehouse
+from backend.core.pagination import keyset_paginate
+
+# Newest first; id breaks ties between rows written in the same instant
+HISTORY_SORT_KEY = (History.action_date, History.id)
+
 
 class HistoryService:
     def __init__(self, db: Session):
@@ -19,7 +24,26 @@ class HistoryService:
         warehouse: Warehouse,
         notes: Optional[str] = None
     ) -> History:
-        history_record = History(
+        history_record = self.build_history_record(
+            action_type, item, quantity, user, warehouse, notes
+        )
+        
+        self.db.add(history_record)
+        self.db.commit()
+        self.db.refresh(history_record)
+        return history_record
+    
+    def build_history_record(
+        self,
+        action_type: str,
+        item: Item,
+        quantity: int,
+        user: User,
+        warehouse: Warehouse,
+        notes: Optional[str] = None
+    ) -> History:
+        """Build a history row without adding it to the session, for batched writes"""
+        return History(
             action_type=action_type,
             item_name=item.name,
             quantity=quantity,
@@ -33,21 +57,49 @@ class HistoryService:
             user_id=user.id,
             warehouse_id=warehouse.id
         )
-        
-        self.db.add(history_record)
-        self.db.commit()
-        self.db.refresh(history_record)
-        return history_record
     
-    def get_history_by_warehouse(self, warehouse_id: str) -> List[History]:
-        return self.db.query(History).filter(
-            History.warehouse_id == warehouse_id
-        ).order_by(History.action_date.desc()).all()
+    def _filtered_query(
+        self,
+        warehouse_id: Optional[str] = None,
+        item_id: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action_type: Optional[str] = None
+    ) -> Query:
+        query = self.db.query(History)
+        if warehouse_id:
+            query = query.filter(History.warehouse_id == warehouse_id)
+        if item_id:
+            query = query.filter(History.item_id == item_id)
+        if date_from:
+            query = query.filter(History.action_date >= date_from)
+        if date_to:
+            query = query.filter(History.action_date < date_to)
+        if action_type:
+            query = query.filter(History.action_type == action_type)
+        return query
+    
+    def get_history_by_warehouse(
+        self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 100, **filters
+    ) -> Tuple[List[History], Optional[str]]:
+        query = self._filtered_query(warehouse_id=warehouse_id, **filters)
+        return keyset_paginate(query, HISTORY_SORT_KEY, cursor, per_page, descending=True)
     
-    def get_history_by_item(self, item_id: str) -> List[History]:
-        return self.db.query(History).filter(
-            History.item_id == item_id
-        ).order_by(History.action_date.desc()).all()
+    def get_history_by_item(
+        self, item_id: str, cursor: Optional[str] = None, per_page: int = 100, **filters
+    ) -> Tuple[List[History], Optional[str]]:
+        query = self._filtered_query(item_id=item_id, **filters)
+        return keyset_paginate(query, HISTORY_SORT_KEY, cursor, per_page, descending=True)
     
-    def get_all_history(self) -> List[History]:
-        return self.db.query(History).order_by(History.action_date.desc()).all()
\ No newline at end of file
+    def get_all_history(
+        self, cursor: Optional[str] = None, per_page: int = 100, **filters
+    ) -> Tuple[List[History], Optional[str]]:
+        query = self._filtered_query(**filters)
+        return keyset_paginate(query, HISTORY_SORT_KEY, cursor, per_page, descending=True)
+    
+    def iter_history(self, batch_size: int = 500, **filters) -> Iterator[History]:
+        """Stream matching rows newest first from a server-side cursor, batch_size rows in memory at a time"""
+        query = self._filtered_query(**filters).order_by(
+            History.action_date.desc(), History.id.desc()
+        )
+        yield from query.yield_per(batch_size)
@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Type, TypeVar
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.core.exceptions import IdempotencyKeyReusedException
+from backend.models.idempotency import IdempotencyKey
+import hashlib
+import json
+import time
+import uuid
+
+# Seconds between purges of expired keys, per process
+PURGE_INTERVAL_SECONDS = 600
+
+_last_purge: Optional[float] = None
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass(frozen=True)
+class IdempotentRequest:
+    """A write sent with an Idempotency-Key header"""
+    user_id: uuid.UUID
+    key: str
+    fingerprint: str
+
+    @classmethod
+    def build(cls, user_id: uuid.UUID, key: Optional[str], endpoint: str, body: Any) -> Optional["IdempotentRequest"]:
+        """None when the request has no key"""
+        if not key:
+            return None
+        payload = json.dumps([endpoint, body], sort_keys=True, default=str)
+        return cls(user_id=user_id, key=key, fingerprint=hashlib.sha256(payload.encode()).hexdigest())
+
+
+class IdempotencyService:
+    """Run each keyed write at most once and answer its retries with the stored response.
+
+    The key is claimed with an insert at the start of the write's transaction
+    and its response stored before the same commit, so a write and its key are
+    saved together or not at all. A retry arriving while the first attempt is
+    still running waits on the key's primary key, fails to insert it once the
+    first attempt commits, and then replays its response. Failed writes roll
+    back their claim, so they can be retried with the same key. Keys expire
+    after idempotency_key_ttl_hours.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def execute(
+        self,
+        request: Optional[IdempotentRequest],
+        write: Callable[[Optional[IdempotencyKey]], T],
+        schema: Type[T]
+    ) -> T:
+        """Return write(claim), or the stored response of an earlier run of the same request"""
+        if request is None:
+            return write(None)
+        stored = self.replay(request, schema)
+        if stored is not None:
+            return stored
+        try:
+            claim = IdempotencyKey(user_id=request.user_id, key=request.key, fingerprint=request.fingerprint)
+            self.db.add(claim)
+            self.db.flush()
+            return write(claim)
+        except IntegrityError:
+            # Another attempt with this key committed first
+            self.db.rollback()
+            stored = self.replay(request, schema)
+            if stored is None:
+                raise
+            return stored
+
+    def replay(self, request: IdempotentRequest, schema: Type[T]) -> Optional[T]:
+        row = self.db.get(IdempotencyKey, (request.user_id, request.key))
+        if row is None:
+            return None
+        if row.created_at < self.expired_before():
+            self.db.delete(row)
+            self.db.flush()
+            return None
+        if row.fingerprint != request.fingerprint:
+            raise IdempotencyKeyReusedException()
+        return schema.model_validate_json(row.response)
+
+    def record(self, claim: Optional[IdempotencyKey], response: BaseModel) -> None:
+        """Store the response of a claimed write; call before committing it"""
+        if claim is not None:
+            claim.response = response.model_dump_json()
+            self.purge_expired()
+
+    def purge_expired(self) -> None:
+        """Delete expired keys, at most once every PURGE_INTERVAL_SECONDS per process"""
+        global _last_purge
+        now = time.monotonic()
+        if _last_purge is not None and now - _last_purge < PURGE_INTERVAL_SECONDS:
+            return
+        _last_purge = now
+        self.db.query(IdempotencyKey).filter(
+            IdempotencyKey.created_at < self.expired_before()
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def expired_before() -> datetime:
+        return datetime.utcnow() - timedelta(hours=settings.idempotency_key_ttl_hours)
@@ -0,0 +1,311 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+from backend.models.history import History
+from backend.models.item import Item
+from backend.schemas.item import ItemImportRow, ItemImportError, ItemImportReport
+from backend.schemas.warehouse import Warehouse as WarehouseSchema
+from backend.core.exceptions import ImportFormatException, WarehouseNotFoundException
+from backend.core.principal import UserSnapshot
+from backend.core.text_search import build_search_key
+from backend.services.barcode_cache import barcode_cache
+from backend.services.stock_events import resync_event, stock_events
+from backend.services.stock_report_cache import invalidate_stock_reports
+from backend.services.warehouse_registry import warehouse_registry
+import csv
+import io
+import json
+import uuid
+
+IMPORT_FORMATS = ("csv", "ndjson")
+REQUIRED_COLUMNS = ("name", "barcode")
+# Rows per INSERT; keeps the bound parameters well under the driver limits
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 2000
+
+# (row number, parsed row) or (row number, error message)
+ParsedRow = Tuple[int, Any]
+
+
+def detect_format(filename: Optional[str], requested: Optional[str] = None) -> str:
+    if requested:
+        fmt = requested.lower()
+    else:
+        extension = (filename or "").rsplit(".", 1)[-1].lower()
+        fmt = {"csv": "csv", "txt": "csv", "ndjson": "ndjson", "jsonl": "ndjson"}.get(extension, extension)
+    if fmt not in IMPORT_FORMATS:
+        raise ImportFormatException(f"Unsupported import format '{fmt}', expected one of: {', '.join(IMPORT_FORMATS)}")
+    return fmt
+
+
+def _clean(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize header names and drop empty cells so schema defaults apply"""
+    cleaned = {}
+    for key, value in raw.items():
+        if key is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        if value in ("", None):
+            continue
+        cleaned[key.strip().lower()] = value
+    return cleaned
+
+
+def iter_csv_rows(stream: BinaryIO) -> Iterator[ParsedRow]:
+    """Rows of a CSV upload, numbered like a spreadsheet (the header is row 1)"""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    sample = text.read(64 * 1024)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.DictReader(_chain(sample, text), dialect=dialect)
+
+    header = [column.strip().lower() for column in reader.fieldnames or []]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise ImportFormatException(f"Missing required columns: {', '.join(missing)}")
+
+    for row in reader:
+        yield reader.line_num, _clean(row)
+
+
+def _chain(sample: str, text: io.TextIOBase) -> Iterator[str]:
+    # Feed the sniffed sample back in front of the rest of the stream, line by line
+    buffered = io.StringIO(sample)
+    pending = ""
+    for line in buffered:
+        if line.endswith("\n"):
+            yield pending + line
+            pending = ""
+        else:
+            pending += line
+    for line in text:
+        yield pending + line
+        pending = ""
+    if pending:
+        yield pending
+
+
+def iter_ndjson_rows(stream: BinaryIO) -> Iterator[ParsedRow]:
+    """One JSON object per line, numbered from 1; blank lines are skipped"""
+    for line_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8-sig"), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_number, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Each line must be a JSON object"
+            continue
+        yield line_number, _clean(row)
+
+
+def iter_upload_rows(stream: BinaryIO, fmt: str) -> Iterator[ParsedRow]:
+    return iter_csv_rows(stream) if fmt == "csv" else iter_ndjson_rows(stream)
+
+
+def read_chunk(
+    rows: Iterator[ParsedRow], size: int
+) -> Tuple[int, List[Tuple[int, ItemImportRow]], List[ItemImportError]]:
+    """Parse and validate up to size rows; returns (rows read, valid rows, errors)"""
+    valid, errors = [], []
+    read = 0
+    try:
+        for row_number, raw in rows:
+            read += 1
+            if isinstance(raw, str):
+                errors.append(ItemImportError(row=row_number, error=raw))
+            else:
+                try:
+                    valid.append((row_number, ItemImportRow.model_validate(raw)))
+                except ValidationError as e:
+                    message = "; ".join(
+                        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+                    )
+                    errors.append(ItemImportError(row=row_number, barcode=raw.get("barcode"), error=message))
+            if read >= size:
+                break
+    except UnicodeDecodeError:
+        raise ImportFormatException("The file must be UTF-8 encoded")
+    except csv.Error as e:
+        raise ImportFormatException(f"Malformed CSV: {e}")
+    return read, valid, errors
+
+
+class ImportService:
+    """Bulk item import: new barcodes are created, known barcodes get the row's stock added.
+
+    Descriptive fields of existing items are left untouched; an import is a
+    receiving operation, renames go through the regular item endpoints.
+    Every chunk is one batched INSERT ... ON CONFLICT (barcode) DO UPDATE,
+    one batched insert of "addition" history rows and one commit, so a failed
+    chunk never leaves stock without its history.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def import_items(
+        self,
+        stream: BinaryIO,
+        fmt: str,
+        warehouse_id: uuid.UUID,
+        user: UserSnapshot,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> ItemImportReport:
+        warehouse = warehouse_registry.get(warehouse_id, self.db)
+        if not warehouse:
+            raise WarehouseNotFoundException(warehouse_id)
+
+        report = ItemImportReport()
+        rows = iter_upload_rows(stream, fmt)
+        while True:
+            read, valid, errors = read_chunk(rows, chunk_size)
+            if not read:
+                break
+            self.add_to_report(report, read, errors)
+            self.add_to_report(report, 0, *self.import_chunk(valid, warehouse, user))
+        report.errors.sort(key=lambda error: error.row)
+        return report
+
+    @staticmethod
+    def add_to_report(
+        report: ItemImportReport,
+        read: int,
+        errors: List[ItemImportError],
+        created: int = 0,
+        updated: int = 0
+    ) -> None:
+        report.total_rows += read
+        report.created += created
+        report.updated += updated
+        report.failed += len(errors)
+        report.errors.extend(errors)
+
+    def _upsert_statement(self):
+        dialect_insert = postgresql.insert if self.db.get_bind().dialect.name == "postgresql" else sqlite.insert
+        statement = dialect_insert(Item)
+        return statement.on_conflict_do_update(
+            index_elements=[Item.barcode],
+            set_={
+                "stock": Item.stock + statement.excluded.stock,
+                "updated_at": statement.excluded.updated_at
+            },
+            # A barcode owned by another warehouse is never touched and not returned
+            where=Item.warehouse_id == statement.excluded.warehouse_id
+        ).returning(Item.id, Item.barcode, Item.name, Item.obra, Item.n_factura)
+
+    def import_chunk(
+        self,
+        rows: List[Tuple[int, ItemImportRow]],
+        warehouse: WarehouseSchema,
+        user: UserSnapshot
+    ) -> Tuple[List[ItemImportError], int, int]:
+        """Upsert one chunk in a single transaction; returns (errors, created, updated)"""
+        if not rows:
+            return [], 0, 0
+
+        # Repeated barcodes inside a chunk are merged: one statement cannot update a row twice
+        merged: Dict[str, Dict[str, Any]] = {}
+        for row_number, row in rows:
+            entry = merged.setdefault(row.barcode, {"rows": [], "quantity": 0})
+            entry["rows"].append(row_number)
+            entry["row"] = row
+            entry["quantity"] += row.stock
+
+        errors: List[ItemImportError] = []
+        existing = dict(
+            self.db.query(Item.barcode, Item.warehouse_id).filter(Item.barcode.in_(list(merged))).all()
+        )
+        now = datetime.utcnow()
+        values = []
+        for barcode, entry in merged.items():
+            owner = existing.get(barcode)
+            if owner is not None and owner != warehouse.id:
+                errors.extend(
+                    ItemImportError(row=row_number, barcode=barcode, error="Barcode belongs to another warehouse")
+                    for row_number in entry["rows"]
+                )
+                continue
+            row = entry["row"]
+            obra = row.obra or warehouse.name
+            n_factura = row.n_factura or warehouse.code
+            values.append({
+                "id": uuid.uuid4(),
+                "name": row.name,
+                "description": row.description,
+                "barcode": barcode,
+                "stock": entry["quantity"],
+                "obra": obra,
+                "n_factura": n_factura,
+                # ORM events do not run for Core inserts
+                "search_key": build_search_key(row.name, n_factura, barcode),
+                "warehouse_id": warehouse.id,
+                "created_at": now,
+                "updated_at": now
+            })
+        if not values:
+            return errors, 0, 0
+
+        try:
+            # Executed with a parameter list, the statement is compiled once and cached;
+            # SQLAlchemy batches it into multi-row VALUES ("insertmanyvalues")
+            saved = self.db.execute(self._upsert_statement(), values).all()
+            saved_barcodes = {item.barcode for item in saved}
+
+            history_rows = [
+                {
+                    "id": uuid.uuid4(),
+                    "action_type": "addition",
+                    "item_name": item.name,
+                    "quantity": merged[item.barcode]["quantity"],
+                    "obra": item.obra,
+                    "n_factura": item.n_factura,
+                    "warehouse_name": warehouse.name,
+                    "user_name": user.full_name,
+                    "action_date": now,
+                    "notes": "Importación masiva",
+                    "item_id": item.id,
+                    "user_id": user.id,
+                    "warehouse_id": warehouse.id,
+                    "created_at": now,
+                    "updated_at": now
+                }
+                for item in saved if merged[item.barcode]["quantity"] > 0
+            ]
+            if history_rows:
+                self.db.execute(insert(History), history_rows)
+            if saved:
+                # Terminals re-read the feed rather than receive one event per row
+                stock_events.publish(self.db, [resync_event(warehouse.id)])
+            self.db.commit()
+        except SQLAlchemyError as e:
+            self.db.rollback()
+            message = f"Chunk could not be saved: {e.__class__.__name__}"
+            return errors + [
+                ItemImportError(row=row_number, barcode=value["barcode"], error=message)
+                for value in values for row_number in merged[value["barcode"]]["rows"]
+            ], 0, 0
+
+        # Lost a race with another warehouse creating the same barcode
+        for value in values:
+            if value["barcode"] not in saved_barcodes:
+                errors.extend(
+                    ItemImportError(row=row_number, barcode=value["barcode"], error="Barcode belongs to another warehouse")
+                    for row_number in merged[value["barcode"]]["rows"]
+                )
+
+        updated = [barcode for barcode in saved_barcodes if barcode in existing]
+        for barcode in updated:
+            barcode_cache.invalidate(barcode)
+        if saved_barcodes:
+            invalidate_stock_reports(warehouse.id)
+        return errors, len(saved_barcodes) - len(updated), len(updated)
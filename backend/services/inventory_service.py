@@ -1,29 +1,46 @@
+from sqlalchemy import case, text
 from sqlalchemy.orm import Session, joinedload, selectinload
-from typing import List, Optional, Tuple
-from functools import lru_cache
-from backend.models.item import Item
-from backend.models.warehouse import Warehouse
-from backend.models.user import User
-from backend.schemas.item import ItemCreate, ItemUpdate
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, List, Optional, Tuple
+from backend.models.item import Item, ItemTombstone
+from backend.models.idempotency import IdempotencyKey
+from backend.core.principal import UserSnapshot
+from backend.schemas.item import Item as ItemSchema, ItemCreate, ItemUpdate, BarcodeResolution, ItemChange, ItemChanges
 from backend.core.exceptions import ItemNotFoundException, WarehouseNotFoundException
+from backend.core.pagination import keyset_paginate
+from backend.core.text_search import normalize_search_text
+from backend.services.barcode_cache import barcode_cache
 from backend.services.history_service import HistoryService
+from backend.services.idempotency_service import IdempotencyService
+from backend.services.stock_events import stock_event, stock_events
+from backend.services.stock_report_cache import invalidate_stock_reports
+from backend.services.warehouse_registry import warehouse_registry
+from backend.services.stock_service import StockService
 import uuid
 
+# Stable listing order; id breaks ties between items with the same name
+ITEM_SORT_KEY = (Item.name, Item.id)
+
+# Entries per change feed response
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 2000
+
+# Versions below this are final: no transaction that could still write one is running
+CHANGE_HORIZON_SQL = {
+    "postgresql": "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint",
+    "sqlite": "SELECT value + 1 FROM item_row_version",
+}
+
 
 class InventoryService:
     def __init__(self, db: Session):
         self.db = db
         self.history_service = HistoryService(db)
-    
-    @lru_cache(maxsize=32)
-    def _get_warehouse_cached(self, warehouse_id: str) -> Optional[Tuple[str, str, str]]:
-        """Cache warehouse data since it changes rarely"""
-        warehouse = self.db.query(Warehouse).filter(Warehouse.id == warehouse_id).first()
-        return (warehouse.id, warehouse.name, warehouse.code) if warehouse else None
+        self.stock_service = StockService(db)
     
     def create_item(self, item_data: ItemCreate) -> Item:
         # Verify warehouse exists
-        warehouse = self.db.query(Warehouse).filter(Warehouse.id == item_data.warehouse_id).first()
+        warehouse = warehouse_registry.get(item_data.warehouse_id, self.db)
         if not warehouse:
             raise WarehouseNotFoundException(item_data.warehouse_id)
         
@@ -40,78 +57,213 @@ class InventoryService:
             n_factura=n_factura,
             warehouse_id=item_data.warehouse_id
         )
+        if item_data.reorder_threshold is not None:
+            db_item.reorder_threshold = item_data.reorder_threshold
         
         self.db.add(db_item)
+        self.db.flush()
+        stock_events.publish(self.db, [stock_event(db_item, db_item.stock)])
         self.db.commit()
         self.db.refresh(db_item)
+        barcode_cache.store(db_item.barcode, ItemSchema.model_validate(db_item))
+        invalidate_stock_reports(db_item.warehouse_id)
         return db_item
     
-    def add_item_stock(self, item_id: str, quantity: int, user: User) -> Item:
-        """Add stock to an existing item"""
+    def add_item_stock(
+        self, item_id: str, quantity: int, user: UserSnapshot, idempotency: Optional[IdempotencyKey] = None
+    ) -> Item:
+        """Add stock to an existing item; with a claimed idempotency key, its response is stored in the same transaction"""
         item = self.db.query(Item).filter(Item.id == item_id).first()
         if not item:
             raise ItemNotFoundException(item_id)
         
         # Get warehouse for history
-        warehouse = self.db.query(Warehouse).filter(Warehouse.id == item.warehouse_id).first()
+        warehouse = warehouse_registry.get(item.warehouse_id, self.db)
         
-        # Update stock
-        item.stock += quantity
-        self.db.commit()
-        self.db.refresh(item)
+        # Atomic increment, concurrent additions are never lost
+        new_stock = self.stock_service.increment(item.id, quantity)
+        set_committed_value(item, "stock", new_stock)
         
-        # Add to history
-        self.history_service.add_history_record(
+        # Stock change and history entry are committed together
+        self.db.add(self.history_service.build_history_record(
             action_type="addition",
             item=item,
             quantity=quantity,
             user=user,
             warehouse=warehouse,
             notes=f"Stock agregado: +{quantity} unidades"
-        )
+        ))
+        stock_events.publish(self.db, [stock_event(item, quantity)])
+        if idempotency is not None:
+            # The stored response must carry what the commit writes (updated_at, row_version)
+            self.db.flush()
+            self.db.refresh(item)
+            IdempotencyService(self.db).record(idempotency, ItemSchema.model_validate(item))
+        self.db.commit()
+        self.db.refresh(item)
+        barcode_cache.invalidate(item.barcode)
+        invalidate_stock_reports(item.warehouse_id)
         
         return item
     
-    def get_item_by_barcode(self, barcode: str) -> Item:
+    def get_item_by_barcode(self, barcode: str) -> ItemSchema:
+        cached = barcode_cache.get(barcode)
+        if cached is not None:
+            return cached
+        return self.fetch_item_by_barcode(barcode)
+    
+    def fetch_item_by_barcode(self, barcode: str) -> ItemSchema:
+        """Load an item by barcode from the database and publish it to the barcode cache"""
+        read_started = barcode_cache.begin_read()
         item = self.db.query(Item).filter(Item.barcode == barcode).first()
         if not item:
             raise ItemNotFoundException(barcode=barcode)
-        return item
+        return barcode_cache.store(item.barcode, ItemSchema.model_validate(item), read_started)
+    
+    def get_items_by_barcodes(self, barcodes: List[str]) -> BarcodeResolution:
+        """Resolve a batch of scans: cached barcodes from memory, the rest with one IN query"""
+        barcodes = list(dict.fromkeys(barcodes))
+        found = barcode_cache.get_many(barcodes)
+        pending = [barcode for barcode in barcodes if barcode not in found]
+        if pending:
+            found.update(self.fetch_items_by_barcodes(pending))
+        return self.barcode_resolution(barcodes, found)
+    
+    def fetch_items_by_barcodes(self, barcodes: List[str]) -> Dict[str, ItemSchema]:
+        """Load the items among barcodes from the database and publish them to the barcode cache"""
+        read_started = barcode_cache.begin_read()
+        items = self.db.query(Item).filter(Item.barcode.in_(barcodes)).all()
+        return {
+            item.barcode: barcode_cache.store(item.barcode, ItemSchema.model_validate(item), read_started)
+            for item in items
+        }
     
-    def get_items_by_warehouse(self, warehouse_id: str, page: int = 1, per_page: int = 50) -> List[Item]:
-        offset = (page - 1) * per_page
-        return self.db.query(Item).options(
+    @staticmethod
+    def barcode_resolution(barcodes: List[str], found: Dict[str, ItemSchema]) -> BarcodeResolution:
+        return BarcodeResolution(
+            items=[found[barcode] for barcode in barcodes if barcode in found],
+            missing=[barcode for barcode in barcodes if barcode not in found]
+        )
+    
+    def get_items_by_warehouse(
+        self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 50
+    ) -> Tuple[List[Item], Optional[str]]:
+        query = self.db.query(Item).options(
             joinedload(Item.warehouse)  # Evita N+1 queries
-        ).filter(Item.warehouse_id == warehouse_id).offset(offset).limit(per_page).all()
+        ).filter(Item.warehouse_id == warehouse_id)
+        return keyset_paginate(query, ITEM_SORT_KEY, cursor, per_page)
     
-    def search_items(self, query: str, warehouse_id: Optional[str] = None, page: int = 1, per_page: int = 50) -> List[Item]:
-        offset = (page - 1) * per_page
-        search_query = self.db.query(Item).options(
-            joinedload(Item.warehouse)
-        ).filter(
-            (Item.name.ilike(f"%{query}%")) |
-            (Item.n_factura.ilike(f"%{query}%")) |
-            (Item.barcode.ilike(f"%{query}%"))
+    def search_items(
+        self, query: str, warehouse_id: Optional[str] = None, cursor: Optional[str] = None, per_page: int = 50
+    ) -> Tuple[List[Item], Optional[str]]:
+        """Accent-insensitive search over name, n_factura and barcode, best matches first.
+        
+        Exact barcode, then barcode prefix, then name prefix, then any substring.
+        On PostgreSQL the substring match is served by the pg_trgm GIN index on
+        search_key and the barcode prefix by its pattern index; other databases
+        run the same query without those indexes.
+        """
+        query = query.strip()
+        term = normalize_search_text(query)
+        rank = case(
+            (Item.barcode == query, 0),
+            (Item.barcode.startswith(query, autoescape=True), 1),
+            (Item.search_key.startswith(term, autoescape=True), 2),
+            else_=3
+        )
+        search_query = self.db.query(Item, rank.label("rank")).filter(
+            Item.barcode.startswith(query, autoescape=True) |
+            Item.search_key.contains(term, autoescape=True)
         )
         
         if warehouse_id:
             search_query = search_query.filter(Item.warehouse_id == warehouse_id)
         
-        return search_query.offset(offset).limit(per_page).all()
+        rows, next_cursor = keyset_paginate(
+            search_query,
+            (rank,) + ITEM_SORT_KEY,
+            cursor,
+            per_page,
+            sort_values=lambda row: (row.rank, row.Item.name, row.Item.id)
+        )
+        return [row.Item for row in rows], next_cursor
     
     def update_item_stock(self, item_id: str, new_stock: int) -> Item:
+        if self.stock_service.set_stock(item_id, new_stock) is None:
+            raise ItemNotFoundException(item_id)
+        
+        item = self.db.query(Item).filter(Item.id == item_id).first()
+        stock_events.publish(self.db, [stock_event(item, None)])
+        self.db.commit()
+        barcode_cache.invalidate(item.barcode)
+        invalidate_stock_reports(item.warehouse_id)
+        return item
+    
+    def set_reorder_threshold(self, item_id: str, reorder_threshold: int) -> Item:
+        """Stock below which the item shows up in its warehouse's low-stock report"""
         item = self.db.query(Item).filter(Item.id == item_id).first()
         if not item:
             raise ItemNotFoundException(item_id)
-        
-        item.stock = new_stock
+        item.reorder_threshold = reorder_threshold
         self.db.commit()
         self.db.refresh(item)
+        barcode_cache.invalidate(item.barcode)
+        invalidate_stock_reports(item.warehouse_id)
         return item
     
-    def get_items_by_obra(self, obra: str, warehouse_id: str, page: int = 1, per_page: int = 50) -> List[Item]:
-        offset = (page - 1) * per_page
-        return self.db.query(Item).filter(
+    def get_items_by_obra(
+        self, obra: str, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 50
+    ) -> Tuple[List[Item], Optional[str]]:
+        query = self.db.query(Item).filter(
             Item.obra == obra,
             Item.warehouse_id == warehouse_id
-        ).offset(offset).limit(per_page).all()
\ No newline at end of file
+        )
+        return keyset_paginate(query, ITEM_SORT_KEY, cursor, per_page)
+    
+    def get_item_changes(self, warehouse_id: str, since: int, limit: int = DEFAULT_CHANGES_LIMIT) -> ItemChanges:
+        """Items of a warehouse written, and items that left it, at row versions >= since.
+        
+        A response never splits the writes of one version, so next_since can
+        always be used as is: when more than limit entries remain, the page
+        stops before the first version that does not fit, unless that is the
+        first version of the page, which is then returned whole.
+        """
+        # Read before the rows: everything below it is already committed and visible
+        horizon = self.db.execute(text(CHANGE_HORIZON_SQL[self.db.get_bind().dialect.name])).scalar()
+        
+        def entries(version_column, query, upper, bounded):
+            rows = query.filter(version_column >= since, version_column < upper).order_by(version_column)
+            return rows.limit(limit + 1).all() if bounded else rows.all()
+        
+        def fetch(upper, bounded=True):
+            upserts = entries(
+                Item.row_version, self.db.query(Item).filter(Item.warehouse_id == warehouse_id), upper, bounded
+            )
+            deletes = entries(
+                ItemTombstone.row_version,
+                self.db.query(ItemTombstone).filter(ItemTombstone.warehouse_id == warehouse_id),
+                upper,
+                bounded
+            )
+            return upserts, deletes
+        
+        upserts, deletes = fetch(horizon)
+        versions = sorted([item.row_version for item in upserts] + [tombstone.row_version for tombstone in deletes])
+        next_since = max(since, horizon)
+        has_more = len(versions) > limit
+        if has_more:
+            next_since = versions[limit]
+            if versions[0] == next_since:
+                # A single write larger than a page
+                next_since += 1
+                upserts, deletes = fetch(next_since, bounded=False)
+            else:
+                upserts = [item for item in upserts if item.row_version < next_since]
+                deletes = [tombstone for tombstone in deletes if tombstone.row_version < next_since]
+        
+        return ItemChanges(
+            upserts=[ItemChange.model_validate(item) for item in upserts],
+            deletes=[tombstone.item_id for tombstone in deletes],
+            next_since=next_since,
+            has_more=has_more
+        )
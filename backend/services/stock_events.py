@@ -0,0 +1,280 @@
+"""Per-warehouse stock events pushed to the terminals.
+
+Services call publish() with the events of a write before committing it. In
+a single process the events wait in session.info and are handed to the
+subscribers when the transaction commits (and dropped if it rolls back). On
+PostgreSQL they are sent with pg_notify inside the transaction instead, which
+the database delivers at commit to the LISTEN connection of every worker, so
+terminals connected to any worker see writes made on any other.
+
+Subscribers read from a bounded queue. A terminal that cannot keep up never
+slows down the writers: its queue is emptied and replaced by a single resync
+event, after which the terminal catches up with the item change feed.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from backend.config import settings
+import asyncio
+import json
+import logging
+import select
+import threading
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "stock_events"
+# A write touching more items of one warehouse is announced as a resync
+BULK_EVENTS = 50
+# NOTIFY payloads are limited to 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7500
+# Seconds between reconnection attempts of the LISTEN connection
+LISTEN_RETRY_SECONDS = (1, 2, 5, 10, 30)
+
+_PENDING_KEY = "stock_events"
+
+
+def stock_event(item, delta: Optional[int]) -> Dict[str, Any]:
+    """Event for an item whose stock is now item.stock; delta is None for manual adjustments"""
+    return {
+        "type": "stock",
+        "warehouse_id": str(item.warehouse_id),
+        "item_id": str(item.id),
+        "barcode": item.barcode,
+        "stock": item.stock,
+        "delta": delta,
+    }
+
+
+def resync_event(warehouse_id) -> Dict[str, Any]:
+    """Too much changed at once: subscribers should read the change feed"""
+    return {"type": "resync", "warehouse_id": str(warehouse_id)}
+
+
+def render(event: Dict[str, Any]) -> str:
+    """Server-sent events frame of an event"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+class Subscription:
+    """Frames for one connected terminal"""
+
+    def __init__(self, warehouse_id: str, maxsize: int):
+        self.warehouse_id = warehouse_id
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    def offer(self, frame: str) -> None:
+        """Queue a frame without ever waiting; called on the event loop"""
+        try:
+            self._queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(render(resync_event(self.warehouse_id)))
+
+    async def get(self, timeout: float) -> Optional[str]:
+        """Next frame, or None if nothing arrived within timeout"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class StockEventHub:
+    """Fan-out of stock events to the subscriptions of each warehouse.
+
+    Subscriptions are only touched on the event loop; events raised on other
+    threads are handed over with call_soon_threadsafe. Until start() is
+    called (scripts, tests without lifespan) publish() does nothing.
+
+    Caches registered with watch() see every event, whether or not a
+    terminal follows its warehouse, so writes made by other workers evict
+    their entries too.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._caches: List[Tuple[Any, Callable[[Dict[str, Any]], Optional[List[Hashable]]]]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listener: Optional["PostgresListener"] = None
+
+    @property
+    def notify(self) -> bool:
+        """True when events travel through PostgreSQL NOTIFY"""
+        return self._listener is not None
+
+    def start(self, loop: asyncio.AbstractEventLoop, engine=None) -> None:
+        """Begin delivering events on loop; with a PostgreSQL engine, through LISTEN/NOTIFY"""
+        self._loop = loop
+        if engine is not None and engine.dialect.name == "postgresql":
+            self._listener = PostgresListener(engine, self)
+            self._listener.start()
+
+    def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        self._loop = None
+
+    def watch(self, cache, keys_of_event: Callable[[Dict[str, Any]], Optional[List[Hashable]]]) -> None:
+        """Evict keys_of_event(event) from an EvictingCache for every event; None, or lost events, clear it"""
+        self._caches.append((cache, keys_of_event))
+
+    @contextmanager
+    def subscribe(self, warehouse_id) -> Iterator[Subscription]:
+        subscription = Subscription(str(warehouse_id), self.queue_size)
+        self._subscriptions.setdefault(subscription.warehouse_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscriptions.get(subscription.warehouse_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.warehouse_id]
+
+    def publish(self, session: Session, events: List[Dict[str, Any]]) -> None:
+        """Announce the events of the session's transaction once it commits"""
+        if self._loop is None or not events:
+            return
+        by_warehouse: Dict[str, List[Dict[str, Any]]] = {}
+        for stock_change in events:
+            by_warehouse.setdefault(stock_change["warehouse_id"], []).append(stock_change)
+        events = []
+        for warehouse_id, warehouse_events in by_warehouse.items():
+            events.extend(warehouse_events if len(warehouse_events) <= BULK_EVENTS else [resync_event(warehouse_id)])
+
+        if self.notify:
+            session.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                [{"channel": CHANNEL, "payload": payload} for payload in notify_payloads(events)]
+            )
+        else:
+            session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+    def dispatch(self, events: List[Dict[str, Any]]) -> None:
+        """Hand events to the watching caches and their subscribers; must run on the event loop"""
+        for stock_change in events:
+            for cache, keys_of_event in self._caches:
+                keys = keys_of_event(stock_change)
+                if keys is None:
+                    cache.clear()
+                else:
+                    cache.invalidate(*keys)
+            subscribers = self._subscriptions.get(stock_change["warehouse_id"])
+            if subscribers:
+                frame = render(stock_change)
+                for subscription in subscribers:
+                    subscription.offer(frame)
+
+    def dispatch_threadsafe(self, events: List[Dict[str, Any]]) -> None:
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.dispatch, events)
+
+    def resync_all(self) -> None:
+        """Ask every subscriber to catch up, e.g. after notifications may have been missed"""
+        for cache, _ in self._caches:
+            cache.clear()
+        self.dispatch_threadsafe([resync_event(warehouse_id) for warehouse_id in list(self._subscriptions)])
+
+
+def notify_payloads(events: List[Dict[str, Any]]) -> Iterator[str]:
+    """JSON arrays of events, each small enough for one NOTIFY"""
+    chunk: List[str] = []
+    size = 2
+    for stock_change in events:
+        encoded = json.dumps(stock_change, separators=(",", ":"))
+        if chunk and size + len(encoded) + 1 > MAX_NOTIFY_PAYLOAD:
+            yield f"[{','.join(chunk)}]"
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        yield f"[{','.join(chunk)}]"
+
+
+class PostgresListener(threading.Thread):
+    """Daemon thread holding a LISTEN connection outside the pool.
+
+    Notifications are decoded here and dispatched on the event loop. When the
+    connection drops it is reopened with backoff, and every subscriber is
+    sent a resync since notifications of the gap are lost.
+    """
+
+    POLL_SECONDS = 1.0
+
+    def __init__(self, engine, hub: StockEventHub):
+        super().__init__(name="stock-events-listener", daemon=True)
+        self.engine = engine
+        self.hub = hub
+        self._stopped = threading.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join(timeout=self.POLL_SECONDS * 2)
+
+    def run(self) -> None:
+        attempt = 0
+        while not self._stopped.is_set():
+            try:
+                connection = self._connect()
+            except Exception:
+                logger.exception("Could not open the LISTEN connection for stock events")
+                self._stopped.wait(LISTEN_RETRY_SECONDS[min(attempt, len(LISTEN_RETRY_SECONDS) - 1)])
+                attempt += 1
+                continue
+            if attempt:
+                self.hub.resync_all()
+            attempt = 0
+            try:
+                self._listen(connection)
+            except Exception:
+                logger.exception("Stock events LISTEN connection lost")
+                attempt = 1
+            finally:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    def _connect(self):
+        pooled = self.engine.raw_connection()
+        # Kept for the life of the thread, never returned to the pool
+        pooled.detach()
+        connection = pooled.dbapi_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+        return connection
+
+    def _listen(self, connection) -> None:
+        while not self._stopped.is_set():
+            readable, _, _ = select.select([connection], [], [], self.POLL_SECONDS)
+            if not readable:
+                continue
+            connection.poll()
+            events = []
+            while connection.notifies:
+                notification = connection.notifies.pop(0)
+                events.extend(json.loads(notification.payload))
+            if events:
+                self.hub.dispatch_threadsafe(events)
+
+
+stock_events = StockEventHub(queue_size=settings.stock_events_queue_size)
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_committed(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        stock_events.dispatch_threadsafe(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,38 @@
+"""Process-wide cache of the stock reports of each warehouse.
+
+Reports are aggregates over a whole warehouse, so any stock write in it
+evicts all of them, in the writing worker once committed and in the others
+when its stock event arrives.
+"""
+
+from typing import Any, Dict, List, Tuple
+from backend.config import settings
+from backend.core.cache import EvictingCache
+from backend.services.stock_events import stock_events
+
+# Reports kept per warehouse
+REPORT_KINDS = ("summary", "low_stock")
+
+
+def report_key(kind: str, warehouse_id) -> Tuple[str, str]:
+    return kind, str(warehouse_id)
+
+
+def report_keys(warehouse_id) -> List[Tuple[str, str]]:
+    return [report_key(kind, warehouse_id) for kind in REPORT_KINDS]
+
+
+def invalidate_stock_reports(warehouse_id) -> None:
+    """Evict every report of a warehouse; call after committing a stock change in it"""
+    stock_report_cache.invalidate(*report_keys(warehouse_id))
+
+
+def reports_of_event(event: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return report_keys(event["warehouse_id"])
+
+
+stock_report_cache = EvictingCache(
+    maxsize=settings.stock_report_cache_size,
+    ttl=settings.stock_report_cache_ttl_seconds
+)
+stock_events.watch(stock_report_cache, reports_of_event)
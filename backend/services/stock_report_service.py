@@ -0,0 +1,79 @@
+from typing import Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from backend.models.item import Item
+from backend.schemas.item import Item as ItemSchema, LowStockReport
+from backend.schemas.warehouse import WarehouseSummary
+from backend.services.stock_report_cache import report_key, stock_report_cache
+
+# Most items a low-stock report lists; the whole report is cached and sliced per request
+MAX_LOW_STOCK_ITEMS = 500
+DEFAULT_LOW_STOCK_ITEMS = 100
+
+# The one definition of low stock, shared by the summary and the low-stock report
+LOW_STOCK = Item.stock < Item.reorder_threshold
+
+
+class StockReportService:
+    """Warehouse-wide stock figures, each computed by a single query in the database"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def cached_summary(warehouse_id) -> Optional[WarehouseSummary]:
+        return stock_report_cache.get(report_key("summary", warehouse_id))
+
+    @staticmethod
+    def cached_low_stock(warehouse_id, limit: int = DEFAULT_LOW_STOCK_ITEMS) -> Optional[LowStockReport]:
+        report = stock_report_cache.get(report_key("low_stock", warehouse_id))
+        return None if report is None else StockReportService.limit_report(report, limit)
+
+    def get_summary(self, warehouse_id) -> WarehouseSummary:
+        cached = self.cached_summary(warehouse_id)
+        if cached is not None:
+            return cached
+        return self.fetch_summary(warehouse_id)
+
+    def fetch_summary(self, warehouse_id) -> WarehouseSummary:
+        read_started = stock_report_cache.begin_read()
+        row = self.db.query(
+            func.count(Item.id).label("item_count"),
+            func.coalesce(func.sum(Item.stock), 0).label("total_stock"),
+            func.count(case((Item.stock <= 0, 1))).label("out_of_stock_count"),
+            func.count(case((LOW_STOCK, 1))).label("low_stock_count")
+        ).filter(Item.warehouse_id == warehouse_id).one()
+        summary = WarehouseSummary(
+            warehouse_id=warehouse_id,
+            item_count=row.item_count,
+            total_stock=row.total_stock,
+            out_of_stock_count=row.out_of_stock_count,
+            low_stock_count=row.low_stock_count
+        )
+        return stock_report_cache.store(report_key("summary", warehouse_id), summary, read_started)
+
+    def get_low_stock(self, warehouse_id, limit: int = DEFAULT_LOW_STOCK_ITEMS) -> LowStockReport:
+        cached = self.cached_low_stock(warehouse_id, limit)
+        if cached is not None:
+            return cached
+        return self.limit_report(self.fetch_low_stock(warehouse_id), limit)
+
+    def fetch_low_stock(self, warehouse_id) -> LowStockReport:
+        """Up to MAX_LOW_STOCK_ITEMS items below their threshold, emptiest first, and how many there are"""
+        read_started = stock_report_cache.begin_read()
+        # The window count gives the total in the same query as the page
+        rows = self.db.query(Item, func.count().over().label("total")).filter(
+            Item.warehouse_id == warehouse_id, LOW_STOCK
+        ).order_by(Item.stock, Item.name, Item.id).limit(MAX_LOW_STOCK_ITEMS).all()
+        report = LowStockReport(
+            warehouse_id=warehouse_id,
+            total=rows[0].total if rows else 0,
+            items=[ItemSchema.model_validate(row.Item) for row in rows]
+        )
+        return stock_report_cache.store(report_key("low_stock", warehouse_id), report, read_started)
+
+    @staticmethod
+    def limit_report(report: LowStockReport, limit: int) -> LowStockReport:
+        if len(report.items) <= limit:
+            return report
+        return report.model_copy(update={"items": report.items[:limit]})
@@ -0,0 +1,107 @@
+from sqlalchemy import Integer, bindparam, column, update, values
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Dict, Iterable, List, Optional
+from backend.models.item import Item
+
+
+class StockService:
+    """Concurrency-safe stock mutations.
+
+    Stock is never computed in Python and written back: every change is an
+    UPDATE relative to the current row value, and decrements carry the
+    ``stock >= quantity`` guard in the WHERE clause, so concurrent scanners
+    cannot oversell an item.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def lock_items(self, item_ids: Iterable) -> List[Item]:
+        """Load items with SELECT ... FOR UPDATE, always in primary key order to avoid deadlocks"""
+        return self.db.query(Item).filter(
+            Item.id.in_(set(item_ids))
+        ).order_by(Item.id).with_for_update().all()
+
+    def increment(self, item_id, quantity: int) -> Optional[int]:
+        """Atomically add stock; returns the new stock or None if the item does not exist"""
+        row = self.db.execute(
+            update(Item)
+            .where(Item.id == item_id)
+            .values(stock=Item.stock + quantity)
+            .returning(Item.stock)
+            .execution_options(synchronize_session=False)
+        ).first()
+        return row[0] if row else None
+
+    def decrement(self, item_id, quantity: int) -> Optional[int]:
+        """Atomically remove stock; returns None if the item is missing or has less than quantity"""
+        row = self.db.execute(
+            update(Item)
+            .where(Item.id == item_id, Item.stock >= quantity)
+            .values(stock=Item.stock - quantity)
+            .returning(Item.stock)
+            .execution_options(synchronize_session=False)
+        ).first()
+        return row[0] if row else None
+
+    def set_stock(self, item_id, new_stock: int) -> Optional[int]:
+        """Overwrite stock (manual adjustment); returns the new stock or None if the item does not exist"""
+        row = self.db.execute(
+            update(Item)
+            .where(Item.id == item_id)
+            .values(stock=new_stock)
+            .returning(Item.stock)
+            .execution_options(synchronize_session=False)
+        ).first()
+        return row[0] if row else None
+
+    def decrement_many(self, items: List[Item], quantities: Dict[str, int]) -> bool:
+        """Apply guarded decrements for several items in a single statement.
+
+        On PostgreSQL this is one UPDATE ... FROM (VALUES ...) RETURNING, and
+        the returned ids tell which rows passed their guard. Other databases
+        cannot alias the columns of a VALUES list, so they run an executemany
+        and check its rowcount. Returns False, without touching the loaded
+        objects, when any row failed its guard; the caller must roll back. On
+        success the in-session items are updated to the new stock without
+        another SELECT.
+        """
+        if not items:
+            return True
+        connection = self.db.connection()
+        if connection.dialect.name == "postgresql":
+            lines = values(
+                column("id", Item.id.type), column("quantity", Integer), name="lines"
+            ).data([(item.id, quantities[str(item.id)]) for item in items])
+            updated = connection.execute(
+                update(Item)
+                .where(Item.id == lines.c.id, Item.stock >= lines.c.quantity)
+                .values(stock=Item.stock - lines.c.quantity)
+                .returning(Item.id)
+            ).scalars().all()
+            applied = set(updated) == {item.id for item in items}
+        else:
+            applied = self._decrement_executemany(connection, items, quantities)
+        if not applied:
+            return False
+
+        for item in items:
+            set_committed_value(item, "stock", item.stock - quantities[str(item.id)])
+        return True
+
+    @staticmethod
+    def _decrement_executemany(connection, items: List[Item], quantities: Dict[str, int]) -> bool:
+        table = Item.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"), table.c.stock >= bindparam("b_quantity"))
+            .values(stock=table.c.stock - bindparam("b_quantity"))
+        )
+        params = [
+            {"b_id": item.id, "b_quantity": quantities[str(item.id)]}
+            for item in items
+        ]
+        if connection.dialect.supports_sane_multi_rowcount:
+            return connection.execute(statement, params).rowcount == len(params)
+        return all(connection.execute(statement, row).rowcount == 1 for row in params)
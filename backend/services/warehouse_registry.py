@@ -0,0 +1,105 @@
+from threading import Lock
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Union
+from sqlalchemy.orm import Session
+from backend.config import settings
+from backend.database.concurrency import AnySession, run_in_session
+from backend.models.warehouse import Warehouse
+from backend.schemas.warehouse import Warehouse as WarehouseSchema
+import time
+import uuid
+
+# Unknown ids reload the registry at most this often, so bogus ids cannot force a query per request
+MISS_RELOAD_SECONDS = 1.0
+
+
+class WarehouseRegistry:
+    """Process-wide, read-only map of warehouses by id.
+
+    Warehouses are few and change rarely, so the whole table is held in memory
+    and lookups never touch the database. The map is replaced as a whole
+    (copy-on-write), so readers always see a consistent snapshot without
+    locking. It is reloaded when it is older than the configured TTL or when
+    an unknown id is requested (at most once every MISS_RELOAD_SECONDS),
+    which picks up warehouses created by other processes.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._warehouses: Mapping[uuid.UUID, WarehouseSchema] = MappingProxyType({})
+        self._loaded_at: Optional[float] = None
+        self._miss_reload_at: Optional[float] = None
+        self._lock = Lock()
+
+    def load(self, db: Session) -> None:
+        warehouses = {
+            warehouse.id: WarehouseSchema.model_validate(warehouse)
+            for warehouse in db.query(Warehouse).order_by(Warehouse.name).all()
+        }
+        with self._lock:
+            self._warehouses = MappingProxyType(warehouses)
+            self._loaded_at = time.monotonic()
+
+    @property
+    def stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    @property
+    def can_reload_on_miss(self) -> bool:
+        return self._miss_reload_at is None or time.monotonic() - self._miss_reload_at >= MISS_RELOAD_SECONDS
+
+    def _ensure_fresh(self, db: Optional[Session]) -> None:
+        if self.stale and db is not None:
+            self.load(db)
+
+    def get(self, warehouse_id: Union[str, uuid.UUID], db: Optional[Session] = None) -> Optional[WarehouseSchema]:
+        """Warehouse by id; with a session, may reload once before reporting a miss"""
+        try:
+            key = warehouse_id if isinstance(warehouse_id, uuid.UUID) else uuid.UUID(str(warehouse_id))
+        except ValueError:
+            return None
+
+        self._ensure_fresh(db)
+        warehouse = self._warehouses.get(key)
+        if warehouse is None and db is not None and self.can_reload_on_miss:
+            # Claimed before loading, so concurrent misses do not all reload
+            self._miss_reload_at = time.monotonic()
+            self.load(db)
+            warehouse = self._warehouses.get(key)
+        return warehouse
+
+    def list_active(self, db: Optional[Session] = None) -> List[WarehouseSchema]:
+        self._ensure_fresh(db)
+        return [warehouse for warehouse in self._warehouses.values() if warehouse.is_active]
+
+    async def get_async(self, warehouse_id: Union[str, uuid.UUID], db: AnySession) -> Optional[WarehouseSchema]:
+        """get() for async endpoints; only leaves the event loop when a reload is needed"""
+        warehouse = None if self.stale else self.get(warehouse_id)
+        if warehouse is None and (self.stale or self.can_reload_on_miss):
+            warehouse = await run_in_session(db, lambda session: self.get(warehouse_id, session))
+        return warehouse
+
+    async def list_active_async(self, db: AnySession) -> List[WarehouseSchema]:
+        if self.stale:
+            await run_in_session(db, self.load)
+        return self.list_active()
+
+    def put(self, warehouse: Warehouse) -> WarehouseSchema:
+        """Publish a committed create or update"""
+        snapshot = WarehouseSchema.model_validate(warehouse)
+        with self._lock:
+            warehouses = dict(self._warehouses)
+            warehouses[snapshot.id] = snapshot
+            self._warehouses = MappingProxyType(
+                dict(sorted(warehouses.items(), key=lambda entry: entry[1].name))
+            )
+        return snapshot
+
+    def clear(self) -> None:
+        with self._lock:
+            self._warehouses = MappingProxyType({})
+            self._loaded_at = None
+            self._miss_reload_at = None
+
+
+warehouse_registry = WarehouseRegistry(ttl=settings.warehouse_registry_ttl_seconds)
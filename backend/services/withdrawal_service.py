@@ -1,85 +1,156 @@
-from sqlalchemy.orm import Session, joinedload, selectinload
-from typing import List
+from sqlalchemy.orm import Session, selectinload
+from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
 from datetime import datetime
 from backend.models.withdrawal import Withdrawal, WithdrawalItem
 from backend.models.item import Item
-from backend.models.user import User
-from backend.models.warehouse import Warehouse
+from backend.models.idempotency import IdempotencyKey
 from backend.schemas.withdrawal import WithdrawalCreate
 from backend.schemas.withdrawal import Withdrawal as WithdrawalSchema, WithdrawalItem as WithdrawalItemSchema
+from backend.services.barcode_cache import barcode_cache
 from backend.services.history_service import HistoryService
+from backend.services.idempotency_service import IdempotencyService
+from backend.services.stock_events import stock_event, stock_events
+from backend.services.stock_report_cache import invalidate_stock_reports
+from backend.services.warehouse_registry import warehouse_registry
+from backend.services.stock_service import StockService
+from backend.core.pagination import keyset_paginate
+from backend.core.principal import UserSnapshot
 from backend.core.exceptions import (
-    ItemNotFoundException, 
-    InsufficientStockException,
-    WarehouseNotFoundException
+    WarehouseNotFoundException,
+    WithdrawalValidationException,
+    StockConflictException
 )
 
+# Newest first; id breaks ties between withdrawals made in the same instant
+WITHDRAWAL_SORT_KEY = (Withdrawal.withdrawal_date, Withdrawal.id)
+
 class WithdrawalService:
     def __init__(self, db: Session):
         self.db = db
         self.history_service = HistoryService(db)
+        self.stock_service = StockService(db)
     
-    def create_withdrawal(self, withdrawal_data: WithdrawalCreate, user_id: str) -> WithdrawalSchema:
+    def create_withdrawal(
+        self, withdrawal_data: WithdrawalCreate, user: UserSnapshot, idempotency: Optional[IdempotencyKey] = None
+    ) -> WithdrawalSchema:
+        """Validate every line, then apply the whole withdrawal in a single transaction.
+        
+        With a claimed idempotency key, the response is stored in that transaction too.
+        """
         # Verify warehouse exists
-        warehouse = self.db.query(Warehouse).options(
-        selectinload(Warehouse.items)  # Pre-cargar items si los necesitas
-        ).filter(Warehouse.id == withdrawal_data.warehouse_id).first()
+        warehouse = warehouse_registry.get(withdrawal_data.warehouse_id, self.db)
+        if not warehouse:
+            raise WarehouseNotFoundException(withdrawal_data.warehouse_id)
+        
+        # Lock every item of the withdrawal in a single ordered query
+        item_ids = {item_data.item_id for item_data in withdrawal_data.items}
+        items = self.stock_service.lock_items(item_ids)
+        items_dict = {str(item.id): item for item in items}
+        
+        errors, requested = self._validate_lines(withdrawal_data, items_dict)
+        if errors:
+            raise WithdrawalValidationException(errors)
+        
+        # Guarded decrement, so stock can never go negative even without row locks
+        if not self.stock_service.decrement_many(items, requested):
+            self.db.rollback()
+            raise StockConflictException()
         
         # Create withdrawal record
         db_withdrawal = Withdrawal(
             obra=withdrawal_data.obra,
             notes=withdrawal_data.notes,
-            user_id=user_id,
+            user_id=user.id,
             warehouse_id=withdrawal_data.warehouse_id,
             withdrawal_date=datetime.utcnow()
         )
         
-        self.db.add(db_withdrawal)
-        self.db.flush()  # Get the ID without committing
-        
-        # Process each item in the withdrawal
-        item_ids = [item_data.item_id for item_data in withdrawal_data.items]
-        items = self.db.query(Item).options(
-            joinedload(Item.warehouse)
-        ).filter(Item.id.in_(item_ids)).all()
-        items_dict = {str(item.id): item for item in items}
-
+        history_notes = f"Withdrawal for obra: {withdrawal_data.obra}"
+        history_records = []
         for item_data in withdrawal_data.items:
-            item = items_dict.get(str(item_data.item_id))
-            
-            # Check if item belongs to the same warehouse
-            if item.warehouse_id != withdrawal_data.warehouse_id:
-                raise Exception(f"Item {item.name} does not belong to warehouse {warehouse.name}")
-            
-            # Check stock availability
-            if item.stock < item_data.quantity:
-                raise InsufficientStockException(item.name, item.stock, item_data.quantity)
-            
-            # Create withdrawal item record
-            withdrawal_item = WithdrawalItem(
-                withdrawal_id=db_withdrawal.id,
+            item = items_dict[str(item_data.item_id)]
+            db_withdrawal.items.append(WithdrawalItem(
                 item_id=item.id,
                 quantity=item_data.quantity
-            )
-            self.db.add(withdrawal_item)
-            
-            # Update item stock
-            item.stock -= item_data.quantity
-            
-            # Add to history
-            user = self.db.query(User).filter(User.id == user_id).first()
-            self.history_service.add_history_record(
+            ))
+            history_records.append(self.history_service.build_history_record(
                 action_type="withdrawal",
                 item=item,
                 quantity=item_data.quantity,
                 user=user,
                 warehouse=warehouse,
-                notes=f"Withdrawal for obra: {withdrawal_data.obra}"
-            )
+                notes=history_notes
+            ))
+        
+        # The unit of work batches each table into a single executemany
+        self.db.add(db_withdrawal)
+        self.db.add_all(history_records)
+        self.db.flush()
         
+        result = WithdrawalSchema(
+            id=db_withdrawal.id,
+            obra=db_withdrawal.obra,
+            notes=db_withdrawal.notes,
+            warehouse_id=db_withdrawal.warehouse_id,
+            withdrawal_date=db_withdrawal.withdrawal_date,
+            user_id=db_withdrawal.user_id,
+            items=[
+                WithdrawalItemSchema(
+                    id=withdrawal_item.id,
+                    item_id=withdrawal_item.item_id,
+                    quantity=withdrawal_item.quantity,
+                    item_name=items_dict[str(withdrawal_item.item_id)].name
+                ) for withdrawal_item in db_withdrawal.items
+            ]
+        )
+        barcodes = [item.barcode for item in items]
+        stock_events.publish(self.db, [stock_event(item, -requested[str(item.id)]) for item in items])
+        IdempotencyService(self.db).record(idempotency, result)
         self.db.commit()
-        self.db.refresh(db_withdrawal)
-        return self.convert_to_withdrawal_schema(db_withdrawal)
+        for barcode in barcodes:
+            barcode_cache.invalidate(barcode)
+        invalidate_stock_reports(result.warehouse_id)
+        return result
+    
+    def _validate_lines(
+        self, withdrawal_data: WithdrawalCreate, items_dict: Dict[str, Item]
+    ) -> Tuple[List[dict], Dict[str, int]]:
+        """Collect every failing line instead of stopping at the first one.
+        
+        Returns the errors and the total quantity requested per item id.
+        """
+        if not withdrawal_data.items:
+            return [{"line": None, "item_id": None, "error": "Withdrawal has no items"}], {}
+        
+        errors = []
+        requested = defaultdict(int)
+        for line, item_data in enumerate(withdrawal_data.items):
+            item = items_dict.get(str(item_data.item_id))
+            error = None
+            if item_data.quantity <= 0:
+                error = "Quantity must be greater than zero"
+            elif not item:
+                error = f"Item with ID {item_data.item_id} not found"
+            elif item.warehouse_id != withdrawal_data.warehouse_id:
+                error = f"Item {item.name} does not belong to this warehouse"
+            else:
+                # Repeated lines for the same item draw from the same stock
+                requested[str(item.id)] += item_data.quantity
+            if error:
+                errors.append({"line": line, "item_id": str(item_data.item_id), "error": error})
+        
+        for line, item_data in enumerate(withdrawal_data.items):
+            item_id = str(item_data.item_id)
+            if item_id in requested and items_dict[item_id].stock < requested[item_id]:
+                item = items_dict[item_id]
+                errors.append({
+                    "line": line,
+                    "item_id": item_id,
+                    "error": f"Insufficient stock for {item.name}. Available: {item.stock}, Requested: {requested[item_id]}"
+                })
+        
+        return sorted(errors, key=lambda error: error["line"]), requested
     
 
     def convert_to_withdrawal_schema(self, withdrawal: Withdrawal) -> WithdrawalSchema:
@@ -101,11 +172,28 @@ class WithdrawalService:
         )
 
 
-    def get_withdrawals_by_warehouse(self, warehouse_id: str) -> List[WithdrawalSchema]:
-        return self.db.query(Withdrawal).filter(Withdrawal.warehouse_id == warehouse_id).all()
+    def get_withdrawals_by_warehouse(
+        self,
+        warehouse_id: str,
+        cursor: Optional[str] = None,
+        per_page: int = 50,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ) -> Tuple[List[Withdrawal], Optional[str]]:
+        """One page of a warehouse's withdrawals, newest first, with their lines and items loaded.
+        
+        The page costs two queries whatever its size: the withdrawals, then
+        their lines joined to their items in a single IN query.
+        """
+        query = self.db.query(Withdrawal).options(
+            selectinload(Withdrawal.items).joinedload(WithdrawalItem.item)
+        ).filter(Withdrawal.warehouse_id == warehouse_id)
+        if date_from:
+            query = query.filter(Withdrawal.withdrawal_date >= date_from)
+        if date_to:
+            query = query.filter(Withdrawal.withdrawal_date < date_to)
+        return keyset_paginate(query, WITHDRAWAL_SORT_KEY, cursor, per_page, descending=True)
     
     def can_withdraw_from_warehouse(self, user_warehouse_id: str, target_warehouse_id: str) -> bool:
         """US5: Only allow withdrawals from physical location"""
         return user_warehouse_id == target_warehouse_id
-    
-    
\ No newline at end of file
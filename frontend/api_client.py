@@ -1,25 +1,95 @@
 import requests
-import json
-from typing import Dict, List, Optional, Any
+import uuid
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Iterator, List, Optional, Any, Tuple
+
+# (connect, read) timeouts in seconds per kind of call; a scan should fail fast,
+# a login waits for password hashing and writes for the transaction
+TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "login": (3.05, 15),
+    "scan": (3.05, 5),
+    "read": (3.05, 10),
+    "write": (3.05, 15),
+    # Writes with an Idempotency-Key are resent instead of waited on
+    "keyed_write": (3.05, 8),
+    # Longer than the server's keep-alive interval, so a dead event stream is noticed
+    "stream": (3.05, 45),
+}
 
 class APIClient:
+    # Server-side limit of POST /inventory/items/barcodes:resolve
+    MAX_BARCODES_PER_REQUEST = 500
+    # Connections kept alive to the API host
+    POOL_SIZE = 10
+    # Attempts of a write sent with an Idempotency-Key
+    KEYED_WRITE_ATTEMPTS = 3
+    
     def __init__(self, base_url: str = "http://localhost:8000/api/v1"):
         self.base_url = base_url
         self.token = None
-        self.headers = {"Content-Type": "application/json"}
+        self.session = self._build_session()
+        self.headers = self.session.headers
+    
+    def _build_session(self) -> requests.Session:
+        """One keep-alive session for every call, so requests reuse pooled connections"""
+        session = requests.Session()
+        session.headers.update({"Content-Type": "application/json"})
+        # Connection failures are retried for every method since the request never
+        # reached the server; read errors and 502/503/504 only for idempotent methods
+        retry = Retry(
+            total=3,
+            connect=3,
+            read=2,
+            status=2,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def _request(self, method: str, path: str, timeout: str = "read", **kwargs) -> requests.Response:
+        return self.session.request(method, f"{self.base_url}{path}", timeout=TIMEOUTS[timeout], **kwargs)
     
     def set_token(self, token: str):
         """Set authentication token"""
         self.token = token
         self.headers["Authorization"] = f"Bearer {token}"
     
+    def clear_token(self):
+        """Forget the authentication token"""
+        self.token = None
+        self.headers.pop("Authorization", None)
+    
+    def revoke_token(self, token: str) -> bool:
+        """Ask the server to reject token from now on (logout)"""
+        try:
+            response = self._request(
+                "POST",
+                "/auth/logout",
+                timeout="scan",
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            return response.status_code in (204, 401)
+        except Exception as e:
+            print(f"Error al cerrar sesión: {e}")
+            return False
+    
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+    
     def login(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Login and get user data"""
         try:
-            response = requests.post(
-                f"{self.base_url}/auth/login",
-                json={"username": username, "password": password},
-                timeout=10
+            response = self._request(
+                "POST",
+                "/auth/login",
+                timeout="login",
+                json={"username": username, "password": password}
             )
             if response.status_code == 200:
                 data = response.json()
@@ -33,11 +103,7 @@ class APIClient:
     def get_warehouses(self) -> List[Dict[str, Any]]:
         """Get all warehouses"""
         try:
-            response = requests.get(
-                f"{self.base_url}/warehouses/",
-                headers=self.headers,
-                timeout=10
-            )
+            response = self._request("GET", "/warehouses/")
             if response.status_code == 200:
                 return response.json()
             return []
@@ -45,31 +111,98 @@ class APIClient:
             print(f"Error obteniendo bodegas: {e}")
             return []
     
-    def get_items_by_warehouse(self, warehouse_id: str, page: int = 1, per_page: int = 50) -> List[Dict[str, Any]]:
-        """Get items by warehouse"""
+    def _get_page(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Get one page of a cursor-paginated listing"""
+        response = self._request("GET", path, params=params)
+        if response.status_code == 200:
+            return response.json()
+        return {"items": [], "next_cursor": None}
+    
+    def _iter_pages(self, path: str, params: Dict[str, Any], max_items: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield items page after page, following next_cursor until the end or max_items"""
+        params = dict(params)
+        fetched = 0
+        while True:
+            page = self._get_page(path, params)
+            for item in page["items"]:
+                if max_items is not None and fetched >= max_items:
+                    return
+                fetched += 1
+                yield item
+            if not page.get("next_cursor"):
+                return
+            params["cursor"] = page["next_cursor"]
+    
+    def get_items_by_warehouse(self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 50) -> Dict[str, Any]:
+        """Get one page of items by warehouse: {"items": [...], "next_cursor": ...}"""
+        try:
+            params = {"per_page": per_page}
+            if cursor:
+                params["cursor"] = cursor
+            return self._get_page(f"/inventory/items/warehouse/{warehouse_id}", params)
+        except Exception as e:
+            print(f"Error obteniendo items: {e}")
+            return {"items": [], "next_cursor": None}
+    
+    def iter_items_by_warehouse(self, warehouse_id: str, per_page: int = 100, max_items: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the items of a warehouse, following the cursors"""
+        try:
+            yield from self._iter_pages(
+                f"/inventory/items/warehouse/{warehouse_id}",
+                {"per_page": per_page},
+                max_items
+            )
+        except Exception as e:
+            print(f"Error obteniendo items: {e}")
+    
+    def get_item_changes(self, warehouse_id: str, since: int, limit: int = 500) -> Optional[Dict[str, Any]]:
+        """Changes of a warehouse's items from version since: {"upserts", "deletes", "next_since", "has_more"}, None on failure"""
         try:
-            params = {"page": page, "per_page": per_page}
-            response = requests.get(
-                f"{self.base_url}/inventory/items/warehouse/{warehouse_id}",
-                headers=self.headers,
-                params=params,
-                timeout=10
+            response = self._request(
+                "GET",
+                "/inventory/items/changes",
+                params={"warehouse_id": warehouse_id, "since": since, "limit": limit}
             )
             if response.status_code == 200:
                 return response.json()
-            return []
+            return None
         except Exception as e:
-            print(f"Error obteniendo items: {e}")
-            return []
+            print(f"Error sincronizando items: {e}")
+            return None
+    
+    def get_warehouse_summary(self, warehouse_id: str) -> Optional[Dict[str, Any]]:
+        """Stock totals of a warehouse: {"item_count", "total_stock", "out_of_stock_count", "low_stock_count"}, None on failure"""
+        try:
+            response = self._request("GET", f"/warehouses/{warehouse_id}/summary")
+            if response.status_code == 200:
+                return response.json()
+            return None
+        except Exception as e:
+            print(f"Error obteniendo resumen de bodega: {e}")
+            return None
+    
+    def open_stock_events(self, warehouse_id: str) -> Optional[requests.Response]:
+        """Open the stock event stream of a warehouse; the caller reads and closes it, None on failure"""
+        try:
+            response = self._request(
+                "GET",
+                f"/warehouses/{warehouse_id}/events",
+                timeout="stream",
+                stream=True,
+                headers={"Accept": "text/event-stream"}
+            )
+            if response.status_code == 200:
+                return response
+            response.close()
+            return None
+        except Exception as e:
+            print(f"Error conectando a eventos de stock: {e}")
+            return None
     
     def get_item_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
         """Get item by barcode"""
         try:
-            response = requests.get(
-                f"{self.base_url}/inventory/items/barcode/{barcode}",
-                headers=self.headers,
-                timeout=10
-            )
+            response = self._request("GET", f"/inventory/items/barcode/{barcode}", timeout="scan")
             if response.status_code == 200:
                 return response.json()
             return None
@@ -77,35 +210,55 @@ class APIClient:
             print(f"Error buscando item: {e}")
             return None
     
-    def search_items(self, query: str, warehouse_id: Optional[str] = None, page: int = 1, per_page: int = 50) -> List[Dict[str, Any]]:
-        """Search items"""
+    def get_items_by_barcodes(self, barcodes: List[str]) -> Optional[Dict[str, Any]]:
+        """Resolve many barcodes at once: {"items": [...], "missing": [...]}, None if the request failed"""
+        result = {"items": [], "missing": []}
+        barcodes = list(dict.fromkeys(barcodes))
+        try:
+            for start in range(0, len(barcodes), self.MAX_BARCODES_PER_REQUEST):
+                response = self._request(
+                    "POST",
+                    "/inventory/items/barcodes:resolve",
+                    timeout="scan",
+                    json={"barcodes": barcodes[start:start + self.MAX_BARCODES_PER_REQUEST]}
+                )
+                if response.status_code != 200:
+                    return None
+                page = response.json()
+                result["items"].extend(page["items"])
+                result["missing"].extend(page["missing"])
+            return result
+        except Exception as e:
+            print(f"Error buscando items: {e}")
+            return None
+    
+    def search_items(self, query: str, warehouse_id: Optional[str] = None, cursor: Optional[str] = None, per_page: int = 50) -> Dict[str, Any]:
+        """Search items, one page: {"items": [...], "next_cursor": ...}"""
         try:
-            params = {"q": query, "page": page, "per_page": per_page}
+            params = {"q": query, "per_page": per_page}
             if warehouse_id:
                 params["warehouse_id"] = warehouse_id
-            
-            response = requests.get(
-                f"{self.base_url}/inventory/items/search",
-                headers=self.headers,
-                params=params,
-                timeout=10
-            )
-            if response.status_code == 200:
-                return response.json()
-            return []
+            if cursor:
+                params["cursor"] = cursor
+            return self._get_page("/inventory/items/search", params)
+        except Exception as e:
+            print(f"Error buscando items: {e}")
+            return {"items": [], "next_cursor": None}
+    
+    def iter_search_items(self, query: str, warehouse_id: Optional[str] = None, per_page: int = 100, max_items: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over search results, following the cursors"""
+        params = {"q": query, "per_page": per_page}
+        if warehouse_id:
+            params["warehouse_id"] = warehouse_id
+        try:
+            yield from self._iter_pages("/inventory/items/search", params, max_items)
         except Exception as e:
             print(f"Error buscando items: {e}")
-            return []
     
     def create_item(self, item_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create new item"""
         try:
-            response = requests.post(
-                f"{self.base_url}/inventory/items",
-                headers=self.headers,
-                json=item_data,
-                timeout=10
-            )
+            response = self._request("POST", "/inventory/items", timeout="write", json=item_data)
             if response.status_code == 200:
                 return response.json()
             return None
@@ -113,33 +266,63 @@ class APIClient:
             print(f"Error creando item: {e}")
             return None
     
-    def create_withdrawal(self, withdrawal_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Create withdrawal"""
+    def add_item_stock(self, item_id: str, quantity: int) -> Optional[Dict[str, Any]]:
+        """Add stock to an existing item"""
         try:
-            response = requests.post(
-                f"{self.base_url}/withdrawals/",
-                headers=self.headers,
-                json=withdrawal_data,
-                timeout=10
+            response = self.send_queued(
+                "POST", f"/inventory/items/{item_id}/add_stock", {"quantity": quantity}, str(uuid.uuid4())
             )
             if response.status_code == 200:
                 return response.json()
             return None
         except Exception as e:
-            print(f"Error creando retiro: {e}")
+            print(f"Error agregando stock: {e}")
             return None
     
-    def get_history_by_warehouse(self, warehouse_id: str) -> List[Dict[str, Any]]:
-        """Get history by warehouse"""
+    def send_queued(self, method: str, path: str, payload: Dict[str, Any], idempotency_key: str) -> requests.Response:
+        """Send a write with its Idempotency-Key; raises requests.RequestException if the server cannot be reached
+        
+        The server applies a key once and answers repeats with the first
+        response, so a timeout or a dropped connection is simply resent.
+        """
+        for attempt in range(self.KEYED_WRITE_ATTEMPTS):
+            try:
+                return self._request(
+                    method,
+                    path,
+                    timeout="keyed_write",
+                    json=payload,
+                    headers={"Idempotency-Key": idempotency_key}
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.KEYED_WRITE_ATTEMPTS - 1:
+                    raise
+    
+    def create_withdrawal(self, withdrawal_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Create withdrawal"""
         try:
-            response = requests.get(
-                f"{self.base_url}/history/warehouse/{warehouse_id}",
-                headers=self.headers,
-                timeout=10
-            )
+            response = self.send_queued("POST", "/withdrawals/", withdrawal_data, str(uuid.uuid4()))
             if response.status_code == 200:
                 return response.json()
-            return []
+            return None
+        except Exception as e:
+            print(f"Error creando retiro: {e}")
+            return None
+    
+    def get_history_by_warehouse(self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = 100) -> Dict[str, Any]:
+        """Get one page of history by warehouse, newest first: {"items": [...], "next_cursor": ...}"""
+        try:
+            params = {"per_page": per_page}
+            if cursor:
+                params["cursor"] = cursor
+            return self._get_page(f"/history/warehouse/{warehouse_id}", params)
         except Exception as e:
             print(f"Error obteniendo historial: {e}")
-            return []
\ No newline at end of file
+            return {"items": [], "next_cursor": None}
+    
+    def iter_history_by_warehouse(self, warehouse_id: str, per_page: int = 200, max_items: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over the history of a warehouse, newest first, following the cursors"""
+        try:
+            yield from self._iter_pages(f"/history/warehouse/{warehouse_id}", {"per_page": per_page}, max_items)
+        except Exception as e:
+            print(f"Error obteniendo historial: {e}")
\ No newline at end of file
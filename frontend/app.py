@@ -7,10 +7,16 @@ Versión con interfaz del ejemplo pero conectado al backend FastAPI real
 import tkinter as tk
 from tkinter import ttk, messagebox, font
 from datetime import datetime
+from collections import Counter
 import json
 import os
 from typing import Dict, List, Optional, Any
 from frontend.data_manager import DataManager
+from frontend.local_store import Outbox
+from frontend.background import BackgroundWorker
+from frontend.live_updates import StockEventListener
+from frontend.search import SearchResults
+from frontend.virtual_list import VirtualTreeview
 
 # Configuración de colores y estilos
 class Config:
@@ -37,10 +43,24 @@ class Config:
     # Configuración de la aplicación
     APP_TITLE = "Sistema de Inventario Multi-Bodega"
     APP_VERSION = "1.0.0"
+    
+    # Escaneos rápidos se resuelven juntos: espera máxima y tamaño de lote
+    SCAN_BATCH_DELAY_MS = 150
+    SCAN_BATCH_MAX_SIZE = 50
+    
+    # Búsqueda: pausa de tecleo antes de buscar y vigencia de los resultados locales
+    SEARCH_DEBOUNCE_MS = 250
+    SEARCH_CACHE_SECONDS = 30
+    
+    # Cada cuánto se envían las operaciones pendientes y se actualiza la copia local
+    SYNC_INTERVAL_MS = 60000
+    # Cada cuánto se aplican en pantalla los cambios de stock avisados por el servidor
+    LIVE_UPDATES_POLL_MS = 1000
 
 # Clase para manejar el estado de sesión
 class SessionState:
-    def __init__(self):
+    def __init__(self, app):
+        self.app = app
         self.current_user = None
         self.current_warehouse = None
         self.is_authenticated = False
@@ -57,6 +77,8 @@ class SessionState:
     def set_warehouse(self, warehouse):
         self.current_warehouse = warehouse
         self.app.data_manager.set_current_warehouse(warehouse)
+        self.app.start_sync()
+        self.app.start_live_updates()
 
 # Componente de escaneo de código de barras
 class BarcodeScanner(ttk.Frame):
@@ -112,6 +134,64 @@ class BarcodeScanner(ttk.Frame):
     def focus(self):
         self.entry.focus()
 
+# Indicador de carga mientras hay peticiones en curso
+class BusyIndicator(ttk.Frame):
+    def __init__(self, parent):
+        super().__init__(parent)
+        self._count = 0
+        self.label = ttk.Label(self, text="", font=('Arial', Config.FONT_SIZE_SMALL))
+        self.progress = ttk.Progressbar(self, mode='indeterminate', length=100)
+    
+    def start(self, message="Cargando..."):
+        self._count += 1
+        self.label.config(text=message)
+        if self._count == 1:
+            self.progress.pack(side=tk.RIGHT, padx=(5, 0))
+            self.label.pack(side=tk.RIGHT)
+            self.progress.start(15)
+    
+    def stop(self):
+        self._count = max(0, self._count - 1)
+        if self._count == 0 and self.winfo_exists():
+            self.progress.stop()
+            self.progress.pack_forget()
+            self.label.pack_forget()
+
+# Agrupa escaneos rápidos para resolverlos con una sola petición
+class ScanBatcher:
+    """Buffer scans and hand them to on_batch together.
+    
+    A batch is flushed delay_ms after its first scan, or as soon as it reaches
+    max_size, so a single scan waits at most delay_ms and a pallet of labels
+    costs one request per max_size scans instead of one per label.
+    """
+    
+    def __init__(self, widget, on_batch, delay_ms=Config.SCAN_BATCH_DELAY_MS, max_size=Config.SCAN_BATCH_MAX_SIZE):
+        self.widget = widget
+        self.on_batch = on_batch
+        self.delay_ms = delay_ms
+        self.max_size = max_size
+        self.pending = []
+        self._after_id = None
+    
+    def add(self, barcode):
+        self.pending.append(barcode)
+        if len(self.pending) >= self.max_size:
+            self.flush()
+        elif self._after_id is None:
+            self._after_id = self.widget.after(self.delay_ms, self.flush)
+    
+    def flush(self):
+        self.cancel()
+        scans, self.pending = self.pending, []
+        if scans:
+            self.on_batch(scans)
+    
+    def cancel(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
 # Página de Login
 class LoginPage(ttk.Frame):
     def __init__(self, parent, app):
@@ -198,14 +278,17 @@ class LoginPage(ttk.Frame):
         self.error_label.grid(row=2, column=0, columnspan=2, pady=10)
         
         # Botón de login
-        login_button = ttk.Button(
+        self.login_button = ttk.Button(
             login_frame,
             text="Iniciar Sesión",
             command=self.login,
             style='Primary.TButton',
             width=30
         )
-        login_button.grid(row=3, column=0, columnspan=2, pady=20)
+        self.login_button.grid(row=3, column=0, columnspan=2, pady=20)
+        
+        self.busy = BusyIndicator(login_frame)
+        self.busy.grid(row=4, column=0, columnspan=2)
         
         # Información de usuarios de prueba
 
@@ -217,12 +300,27 @@ class LoginPage(ttk.Frame):
             self.show_error("Por favor ingrese usuario y contraseña")
             return
         
-        user = self.app.data_manager.verify_login(username, password)
-        if user:
-            self.app.session_state.login(user)
-            self.app.show_home_page()
-        else:
-            self.show_error("Usuario o contraseña incorrectos")
+        if self.app.worker.busy('login'):
+            return
+        self.login_button.config(state=tk.DISABLED)
+        
+        def on_done(user):
+            self.login_button.config(state=tk.NORMAL)
+            if user:
+                self.app.session_state.login(user)
+                self.app.show_home_page()
+            else:
+                self.show_error("Usuario o contraseña incorrectos")
+        
+        def on_error(e):
+            self.login_button.config(state=tk.NORMAL)
+            self.show_error(f"Error de conexión: {e}")
+        
+        self.app.run_in_background(
+            self.app.data_manager.verify_login, username, password,
+            on_done=on_done, on_error=on_error, key='login', owner=self,
+            indicator=self.busy, message="Iniciando sesión..."
+        )
     
     def show_error(self, message):
         self.error_label.config(text=message)
@@ -257,6 +355,9 @@ class HomePage(ttk.Frame):
         )
         logout_button.pack(side=tk.RIGHT)
         
+        self.busy = BusyIndicator(header_frame)
+        self.busy.pack(side=tk.RIGHT, padx=20)
+        
         # Frame principal
         main_frame = ttk.Frame(self)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -285,6 +386,7 @@ class HomePage(ttk.Frame):
         )
         self.warehouse_combo.pack(fill=tk.X)
         self.warehouse_combo.bind('<<ComboboxSelected>>', self.on_warehouse_selected)
+        self.warehouses = []
         
         # Cargar bodegas
         self.load_warehouses()
@@ -357,17 +459,22 @@ class HomePage(ttk.Frame):
         ).grid(row=1, column=2, padx=10, pady=(0, 10))
     
     def load_warehouses(self):
-        warehouses = self.app.data_manager.get_warehouses()
-        warehouse_names = [f"{w['name']} - {w['code']}" for w in warehouses]
-        self.warehouse_combo['values'] = warehouse_names
-        self.warehouses = warehouses
+        def on_done(warehouses):
+            warehouse_names = [f"{w['name']} - {w['code']}" for w in warehouses]
+            self.warehouse_combo['values'] = warehouse_names
+            self.warehouses = warehouses
+        
+        self.app.run_in_background(
+            self.app.data_manager.get_warehouses,
+            on_done=on_done, key='warehouses', owner=self,
+            indicator=self.busy, message="Cargando bodegas..."
+        )
     
     def on_warehouse_selected(self, event):
         selected_index = self.warehouse_combo.current()
         if selected_index >= 0:
             selected_warehouse = self.warehouses[selected_index]
             self.app.session_state.set_warehouse(selected_warehouse)
-            self.app.data_manager.set_current_warehouse(selected_warehouse)
             
             # Habilitar botones
             self.inventory_button.config(state=tk.NORMAL)
@@ -384,6 +491,8 @@ class HomePage(ttk.Frame):
     def logout(self):
         if messagebox.askyesno("Cerrar Sesión", "¿Está seguro que desea cerrar sesión?"):
             self.app.session_state.logout()
+            self.app.stop_sync()
+            self.app.stop_live_updates()
             self.app.data_manager.logout()
             self.app.show_login_page()
 
@@ -438,6 +547,9 @@ class InventoryPage(ttk.Frame):
         )
         new_material_button.pack(side=tk.RIGHT)
         
+        self.busy = BusyIndicator(header_frame)
+        self.busy.pack(side=tk.RIGHT, padx=20)
+        
         # Frame principal
         main_frame = ttk.Frame(self)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -452,6 +564,8 @@ class InventoryPage(ttk.Frame):
             font=('Arial', Config.FONT_SIZE_MEDIUM)
         ).pack(side=tk.LEFT, padx=(0, 10))
         
+        self.search_results = SearchResults(max_age=Config.SEARCH_CACHE_SECONDS)
+        self._search_after = None
         self.search_var = tk.StringVar()
         self.search_var.trace('w', self.on_search_changed)
         search_entry = ttk.Entry(
@@ -470,20 +584,16 @@ class InventoryPage(ttk.Frame):
         )
         list_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(list_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Treeview para mostrar items
-        self.tree = ttk.Treeview(
+        # Solo se dibujan las filas visibles; las páginas siguientes se piden al desplazarse
+        self.item_list = VirtualTreeview(
             list_frame,
             columns=('barcode', 'stock', 'obra', 'factura'),
             show='tree headings',
-            yscrollcommand=scrollbar.set,
-            height=15
+            height=15,
+            on_need_more=self.load_more_items
         )
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.tree.yview)
+        self.item_list.pack(fill=tk.BOTH, expand=True)
+        self.tree = self.item_list.tree
         
         # Configurar columnas
         self.tree.heading('#0', text='Nombre')
@@ -498,6 +608,18 @@ class InventoryPage(ttk.Frame):
         self.tree.column('obra', width=150)
         self.tree.column('factura', width=100)
         
+        # Configurar tags
+        self.tree.tag_configure('no_stock', foreground='red')
+        self.tree.tag_configure('low_stock', foreground='orange')
+        # Listado cargado del servidor y cursor de su página siguiente
+        self.loaded_items = []
+        self.items_query = ""
+        self.items_cursor = None
+        # Búsqueda que muestra la lista, cargada o refinada localmente
+        self.shown_query = ""
+        # Totales de la bodega calculados por el servidor
+        self.summary = None
+        
         # Frame de información
         info_frame = ttk.Frame(main_frame)
         info_frame.pack(fill=tk.X, pady=(10, 0))
@@ -512,58 +634,133 @@ class InventoryPage(ttk.Frame):
         # Cargar items
         self.load_items()
     
+    def destroy(self):
+        # Una búsqueda pendiente no debe llegar a una página ya cerrada
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+            self._search_after = None
+        super().destroy()
+    
     def load_items(self, search_query=None):
-        # Limpiar árbol
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Obtener items
+        # Primera página; una búsqueda nueva reemplaza a la que esté en curso
+        self.fetch_items(search_query or "")
+    
+    def load_more_items(self):
+        # La lista se acerca al final de lo cargado: pedir la página siguiente
+        if self.items_cursor is None or self.app.worker.busy('inventory-items'):
+            return
+        self.fetch_items(self.items_query, self.items_cursor)
+    
+    def fetch_items(self, query, cursor=None):
         warehouse_id = str(self.app.session_state.current_warehouse['id'])
-        
-        if search_query:
-            items = self.app.data_manager.search_items(search_query, warehouse_id)
+        if cursor is None:
+            self.fetch_summary(warehouse_id)
+        if query:
+            fetch, args, message = self.app.data_manager.search_items_page, (query, warehouse_id, cursor), "Buscando..."
         else:
-            items = self.app.data_manager.get_items_by_warehouse(warehouse_id)
-        
-        # Agregar items al árbol
-        for item in items:
-            # Color según stock
-            tags = []
-            if item['stock'] == 0:
-                tags.append('no_stock')
-            elif item['stock'] < 10:
-                tags.append('low_stock')
-            
-            self.tree.insert(
-                '',
-                'end',
-                text=item['name'],
-                values=(
-                    item['barcode'],
-                    item['stock'],
-                    item['obra'],
-                    item['n_factura']
-                ),
-                tags=tags
-            )
-        
-        # Configurar tags
-        self.tree.tag_configure('no_stock', foreground='red')
-        self.tree.tag_configure('low_stock', foreground='orange')
-        
+            fetch, args, message = self.app.data_manager.get_items_page, (warehouse_id, cursor), "Cargando items..."
+        self.app.run_in_background(
+            fetch, *args,
+            on_done=lambda page: self.on_items_loaded(query, cursor, page), key='inventory-items', owner=self,
+            indicator=self.busy, message=message
+        )
+    
+    def fetch_summary(self, warehouse_id):
+        # Sin conexión se mantienen los últimos totales
+        self.app.run_in_background(
+            self.app.data_manager.get_warehouse_summary, warehouse_id,
+            on_done=self.on_summary_loaded, on_error=lambda e: None, key='inventory-summary', owner=self
+        )
+    
+    def on_summary_loaded(self, summary):
+        if summary is not None:
+            self.summary = summary
+            self.update_info()
+    
+    def reload_items(self):
+        """Volver a pedir al servidor la búsqueda actual, p. ej. tras cambiar el stock"""
+        self.search_results.clear()
+        self.run_search()
+    
+    def on_items_loaded(self, query, cursor, page):
+        rows = [self.item_row(item) for item in page['items']]
+        if cursor is None:
+            # La misma búsqueda recargada conserva la posición; una nueva vuelve arriba
+            same_query = query == self.shown_query
+            self.loaded_items = list(page['items'])
+            self.items_query = query
+            self.items_cursor = page['next_cursor']
+            self.item_list.set_rows(rows, has_more=self.items_cursor is not None, keep_position=same_query)
+            self.shown_query = query
+        else:
+            self.loaded_items.extend(page['items'])
+            self.items_cursor = page['next_cursor']
+            self.item_list.extend(rows, has_more=self.items_cursor is not None)
+        # Con todas las páginas cargadas el listado sirve para refinar la búsqueda localmente
+        self.search_results.store(query, self.loaded_items, complete=self.items_cursor is None)
+        self.update_info()
+    
+    def show_items(self, query, items, has_more=False):
+        keep_position = query == self.shown_query
+        self.shown_query = query
+        self.item_list.set_rows([self.item_row(item) for item in items], has_more=has_more, keep_position=keep_position)
         self.update_info()
     
+    @staticmethod
+    def item_row(item):
+        # Color según stock y el umbral de reposición del item
+        tags = ()
+        if item['stock'] <= 0:
+            tags = ('no_stock',)
+        elif item['stock'] < item.get('reorder_threshold', 10):
+            tags = ('low_stock',)
+        return (
+            str(item['id']),
+            item['name'],
+            (item['barcode'], item['stock'], item['obra'], item['n_factura']),
+            tags
+        )
+    
     def on_search_changed(self, *args):
-        search_query = self.search_var.get()
-        if len(search_query) >= 2:
-            self.load_items(search_query)
-        elif len(search_query) == 0:
-            self.load_items()
+        # Esperar a que se deje de teclear antes de buscar
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+        self._search_after = self.after(Config.SEARCH_DEBOUNCE_MS, self.run_search)
+    
+    def run_search(self):
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+            self._search_after = None
+        search_query = self.search_var.get().strip()
+        if len(search_query) == 1:
+            return
+        
+        # Un refinamiento de la última respuesta se resuelve sin ir al servidor
+        items = self.search_results.refine(search_query)
+        if items is not None:
+            self.app.worker.cancel('inventory-items')
+            # Si es el listado cargado tal cual, puede seguir paginando
+            self.show_items(search_query, items, has_more=items is self.loaded_items and self.items_cursor is not None)
+            return
+        self.load_items(search_query or None)
     
     def update_info(self):
-        total_items = len(self.tree.get_children())
+        total_items = len(self.item_list)
+        # Quedan páginas sin pedir al servidor
+        more = "+" if self.item_list.model.has_more else ""
         warehouse_name = self.app.session_state.current_warehouse['name']
-        self.info_label.config(text=f"Total de items en {warehouse_name}: {total_items}")
+        text = f"Total de items en {warehouse_name}: {total_items}{more}"
+        if self.summary is not None:
+            # Totales de toda la bodega, no solo de lo cargado
+            text = (
+                f"Items en {warehouse_name}: {self.summary['item_count']} | "
+                f"Stock total: {self.summary['total_stock']} | "
+                f"Sin stock: {self.summary['out_of_stock_count']} | "
+                f"Stock bajo: {self.summary['low_stock_count']}"
+            )
+            if self.shown_query:
+                text += f" | Mostrando: {total_items}{more}"
+        self.info_label.config(text=text)
     
     def show_add_stock_dialog(self):
         dialog = tk.Toplevel(self)
@@ -604,6 +801,7 @@ class InventoryPage(ttk.Frame):
         search_entry.bind('<KeyRelease>', lambda e: self.search_items_for_stock(search_var.get(), dialog))
         
         # Lista de items encontrados
+        self.stock_search_results = {}
         list_frame = ttk.LabelFrame(main_frame, text="Items Encontrados", padding=10)
         list_frame.pack(fill=tk.BOTH, expand=True, pady=(0, 20))
         
@@ -652,31 +850,44 @@ class InventoryPage(ttk.Frame):
     
     def search_item_for_stock(self, barcode, dialog):
         """Buscar item por código de barras para agregar stock"""
-        item = self.app.data_manager.get_item_by_barcode(barcode)
-        if item:
-            # Verificar que pertenece a la bodega actual
-            if str(item['warehouse_id']) == str(self.app.session_state.current_warehouse['id']):
-                self.show_quantity_dialog_for_stock(item, dialog)
+        def on_done(item):
+            if item:
+                # Verificar que pertenece a la bodega actual
+                if str(item['warehouse_id']) == str(self.app.session_state.current_warehouse['id']):
+                    self.show_quantity_dialog_for_stock(item, dialog)
+                else:
+                    messagebox.showerror("Error", "El item no pertenece a esta bodega")
             else:
-                messagebox.showerror("Error", "El item no pertenece a esta bodega")
-        else:
-            messagebox.showerror("Error", f"No se encontró item con código: {barcode}")
+                messagebox.showerror("Error", f"No se encontró item con código: {barcode}")
+        
+        self.app.run_in_background(
+            self.app.data_manager.get_item_by_barcode, barcode,
+            on_done=on_done, key='stock-search', owner=dialog,
+            indicator=self.busy, message="Buscando..."
+        )
     
     def search_items_for_stock(self, query, dialog):
         """Buscar items por nombre para agregar stock"""
         if len(query) < 2:
-            # Limpiar lista
-            for item in self.stock_tree.get_children():
-                self.stock_tree.delete(item)
+            # Limpiar lista y descartar búsquedas en curso
+            self.app.worker.cancel('stock-search')
+            self.show_items_for_stock([])
             return
         
         warehouse_id = str(self.app.session_state.current_warehouse['id'])
-        items = self.app.data_manager.search_items(query, warehouse_id)
-        
+        self.app.run_in_background(
+            self.app.data_manager.search_items, query, warehouse_id,
+            on_done=self.show_items_for_stock, key='stock-search', owner=dialog,
+            indicator=self.busy, message="Buscando..."
+        )
+    
+    def show_items_for_stock(self, items):
         # Limpiar y llenar lista
         for item in self.stock_tree.get_children():
             self.stock_tree.delete(item)
         
+        # Los items encontrados quedan a mano para seleccionarlos sin otra petición
+        self.stock_search_results = {str(item['id']): item for item in items}
         for item in items:
             self.stock_tree.insert(
                 '',
@@ -701,10 +912,8 @@ class InventoryPage(ttk.Frame):
             messagebox.showerror("Error", "No se pudo obtener el ID del item")
             return
         
-        # Buscar item completo
-        warehouse_id = str(self.app.session_state.current_warehouse['id'])
-        items = self.app.data_manager.get_items_by_warehouse(warehouse_id)
-        selected_item = next((item for item in items if str(item['id']) == item_id), None)
+        # Item completo de la última búsqueda
+        selected_item = self.stock_search_results.get(item_id)
         
         if selected_item:
             self.show_quantity_dialog_for_stock(selected_item, dialog)
@@ -776,25 +985,38 @@ class InventoryPage(ttk.Frame):
         def add_stock():
             try:
                 quantity = int(quantity_var.get())
-                if quantity <= 0:
-                    error_label.config(text="La cantidad debe ser mayor a 0")
-                    return
-                
-                # Agregar stock
-                success = self.app.data_manager.add_item_stock(str(item['id']), quantity)
-                
-                if success:
-                    # Actualizar lista
-                    self.load_items()
-                    dialog.destroy()
-                    messagebox.showinfo("Éxito", f"Se agregaron {quantity} unidades al stock de '{item['name']}'")
-                else:
-                    error_label.config(text="Error al agregar stock")
-                
             except ValueError:
                 error_label.config(text="Ingrese una cantidad válida")
-            except Exception as e:
+                return
+            if quantity <= 0:
+                error_label.config(text="La cantidad debe ser mayor a 0")
+                return
+            
+            def on_done(status):
+                add_button.config(state=tk.NORMAL)
+                # Actualizar lista
+                self.reload_items()
+                dialog.destroy()
+                if status == Outbox.PENDING:
+                    messagebox.showwarning(
+                        "Sin conexión",
+                        f"Se agregaron {quantity} unidades al stock de '{item['name']}'.\n"
+                        "Se enviarán al servidor cuando vuelva la conexión."
+                    )
+                else:
+                    messagebox.showinfo("Éxito", f"Se agregaron {quantity} unidades al stock de '{item['name']}'")
+            
+            def on_error(e):
+                add_button.config(state=tk.NORMAL)
                 error_label.config(text=f"Error: {str(e)}")
+            
+            # Agregar stock; el botón queda deshabilitado para no enviarlo dos veces
+            add_button.config(state=tk.DISABLED)
+            self.app.run_in_background(
+                self.app.data_manager.add_item_stock, str(item['id']), quantity,
+                on_done=on_done, on_error=on_error, owner=dialog,
+                indicator=self.busy, message="Guardando..."
+            )
         
         ttk.Button(
             button_frame,
@@ -803,12 +1025,13 @@ class InventoryPage(ttk.Frame):
             style='Secondary.TButton'
         ).pack(side=tk.LEFT, padx=5)
         
-        ttk.Button(
+        add_button = ttk.Button(
             button_frame,
             text="Agregar Stock",
             command=add_stock,
             style='Primary.TButton'
-        ).pack(side=tk.LEFT, padx=5)
+        )
+        add_button.pack(side=tk.LEFT, padx=5)
         
         # Focus en el spinbox
         quantity_spinbox.focus()
@@ -922,11 +1145,11 @@ class InventoryPage(ttk.Frame):
             if not data['n_factura']:
                 data['n_factura'] = self.app.session_state.current_warehouse['code']
             
-            try:
-                # Crear item
-                if self.app.data_manager.add_item(data):
+            def on_done(created):
+                save_button.config(state=tk.NORMAL)
+                if created:
                     # Actualizar lista
-                    self.load_items()
+                    self.reload_items()
                     
                     # Cerrar diálogo
                     dialog.destroy()
@@ -934,9 +1157,18 @@ class InventoryPage(ttk.Frame):
                     messagebox.showinfo("Éxito", "Item agregado correctamente")
                 else:
                     error_label.config(text="Error al crear el item")
-                
-            except Exception as e:
+            
+            def on_error(e):
+                save_button.config(state=tk.NORMAL)
                 error_label.config(text=str(e))
+            
+            # Crear item
+            save_button.config(state=tk.DISABLED)
+            self.app.run_in_background(
+                self.app.data_manager.add_item, data,
+                on_done=on_done, on_error=on_error, owner=dialog,
+                indicator=self.busy, message="Guardando..."
+            )
         
         ttk.Button(
             button_frame,
@@ -945,12 +1177,13 @@ class InventoryPage(ttk.Frame):
             style='Secondary.TButton'
         ).pack(side=tk.LEFT, padx=5)
         
-        ttk.Button(
+        save_button = ttk.Button(
             button_frame,
             text="Guardar",
             command=save_item,
             style='Primary.TButton'
-        ).pack(side=tk.LEFT, padx=5)
+        )
+        save_button.pack(side=tk.LEFT, padx=5)
         
         # Focus en el primer campo
         name_entry.focus()
@@ -985,6 +1218,9 @@ class WithdrawalsPage(ttk.Frame):
         )
         title_label.pack(side=tk.LEFT, padx=20)
         
+        self.busy = BusyIndicator(header_frame)
+        self.busy.pack(side=tk.RIGHT)
+        
         # Frame principal
         main_frame = ttk.Frame(self)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -997,9 +1233,10 @@ class WithdrawalsPage(ttk.Frame):
         scanner_frame = ttk.LabelFrame(top_frame, text="Escanear Item", padding=10)
         scanner_frame.pack(fill=tk.X, pady=(0, 10))
         
+        self.scan_batcher = ScanBatcher(self, self.on_scan_batch)
         self.barcode_scanner = BarcodeScanner(
             scanner_frame,
-            on_scan=self.on_barcode_scan,
+            on_scan=self.scan_batcher.add,
             placeholder="Escanear código de barras para retiro"
         )
         self.barcode_scanner.pack(fill=tk.X)
@@ -1089,37 +1326,92 @@ class WithdrawalsPage(ttk.Frame):
         # Focus en el scanner
         self.barcode_scanner.focus()
     
-    def on_barcode_scan(self, barcode):
+    def destroy(self):
+        # Un lote pendiente no debe llegar a una página ya cerrada
+        self.scan_batcher.cancel()
+        super().destroy()
+    
+    def on_scan_batch(self, scans):
+        # Un solo pedido para todos los códigos del lote; el escáner sigue
+        # aceptando lecturas mientras se resuelve
+        self.app.run_in_background(
+            self.app.data_manager.get_items_by_barcodes, scans,
+            on_done=lambda result: self.apply_scan_batch(scans, result), owner=self,
+            indicator=self.busy, message="Buscando códigos..."
+        )
+    
+    def apply_scan_batch(self, scans, result):
         try:
-            # Buscar item por código de barras
-            item = self.app.data_manager.get_item_by_barcode(barcode)
-            if not item:
-                messagebox.showerror("Error", f"No se encontró item con código: {barcode}")
-                return
-            
-            # Verificar que el item pertenece a la bodega actual
-            if str(item['warehouse_id']) != str(self.app.session_state.current_warehouse['id']):
-                messagebox.showerror(
-                    "Error",
-                    f"El item '{item['name']}' no pertenece a esta bodega.\n"
-                    f"Solo se pueden retirar items de la bodega actual."
-                )
+            if result is None:
+                messagebox.showerror("Error", "No se pudieron buscar los códigos escaneados")
                 return
+            items = {item['barcode']: item for item in result['items']}
             
-            # Verificar stock
-            if item['stock'] <= 0:
-                messagebox.showerror(
-                    "Error",
-                    f"El item '{item['name']}' no tiene stock disponible"
-                )
+            # Un escaneo aislado mantiene el diálogo de cantidad
+            if len(set(scans)) == 1:
+                barcode = scans[0]
+                item = items.get(barcode)
+                error = self.check_scanned_item(item, barcode)
+                if error:
+                    messagebox.showerror("Error", error)
+                elif len(scans) == 1:
+                    self.show_quantity_dialog(item)
+                else:
+                    error = self.add_to_withdrawal(item, len(scans))
+                    if error:
+                        messagebox.showerror("Error", error)
                 return
             
-            # Mostrar diálogo de cantidad
-            self.show_quantity_dialog(item)
+            # Varios escaneos: cada lectura de un código suma una unidad
+            errors = []
+            for barcode, count in Counter(scans).items():
+                item = items.get(barcode)
+                error = self.check_scanned_item(item, barcode) or self.add_to_withdrawal(item, count)
+                if error:
+                    errors.append(error)
+            if errors:
+                messagebox.showerror("Error", "\n\n".join(errors))
             
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
+    def check_scanned_item(self, item, barcode):
+        """Error message if the scanned item cannot be withdrawn here, None otherwise"""
+        if not item:
+            return f"No se encontró item con código: {barcode}"
+        
+        # Verificar que el item pertenece a la bodega actual
+        if str(item['warehouse_id']) != str(self.app.session_state.current_warehouse['id']):
+            return (
+                f"El item '{item['name']}' no pertenece a esta bodega.\n"
+                f"Solo se pueden retirar items de la bodega actual."
+            )
+        
+        # Verificar stock
+        if item['stock'] <= 0:
+            return f"El item '{item['name']}' no tiene stock disponible"
+        return None
+    
+    def add_to_withdrawal(self, item, quantity):
+        """Add quantity of item to the list; error message if it exceeds the stock, None otherwise"""
+        # Verificar si el item ya está en la lista
+        for wi in self.withdrawal_items:
+            if wi['item']['id'] == item['id']:
+                if wi['quantity'] + quantity > item['stock']:
+                    return f"La cantidad total de '{item['name']}' excede el stock disponible ({item['stock']})"
+                wi['quantity'] += quantity
+                self.update_withdrawal_list()
+                return None
+        
+        if quantity > item['stock']:
+            return f"Cantidad máxima disponible de '{item['name']}': {item['stock']}"
+        self.withdrawal_items.append({
+            'item': item,
+            'quantity': quantity
+        })
+        self.update_withdrawal_list()
+        return None
+    
     def show_quantity_dialog(self, item):
         dialog = tk.Toplevel(self)
         dialog.title(f"Retirar: {item['name']}")
@@ -1192,30 +1484,10 @@ class WithdrawalsPage(ttk.Frame):
                     error_label.config(text="La cantidad debe ser mayor a 0")
                     return
                 
-                if quantity > item['stock']:
-                    error_label.config(text=f"Cantidad máxima disponible: {item['stock']}")
+                error = self.add_to_withdrawal(item, quantity)
+                if error:
+                    error_label.config(text=error)
                     return
-                
-                # Verificar si el item ya está en la lista
-                for i, wi in enumerate(self.withdrawal_items):
-                    if wi['item']['id'] == item['id']:
-                        # Actualizar cantidad
-                        new_quantity = wi['quantity'] + quantity
-                        if new_quantity > item['stock']:
-                            error_label.config(text="La cantidad total excede el stock disponible")
-                            return
-                        wi['quantity'] = new_quantity
-                        self.update_withdrawal_list()
-                        dialog.destroy()
-                        return
-                
-                # Agregar nuevo item
-                self.withdrawal_items.append({
-                    'item': item,
-                    'quantity': quantity
-                })
-                
-                self.update_withdrawal_list()
                 dialog.destroy()
                 
             except ValueError:
@@ -1263,7 +1535,7 @@ class WithdrawalsPage(ttk.Frame):
         
         # Habilitar/deshabilitar botón de confirmar
         self.confirm_button.config(
-            state=tk.NORMAL if self.withdrawal_items else tk.DISABLED
+            state=tk.NORMAL if self.withdrawal_items and not self.app.worker.busy('withdrawal') else tk.DISABLED
         )
     
     def remove_selected_item(self):
@@ -1299,21 +1571,90 @@ class WithdrawalsPage(ttk.Frame):
         ):
             return
         
-        try:
-            # Procesar retiro
-            if self.app.data_manager.process_withdrawal(self.withdrawal_items, self.obra_var.get().strip()):
+        # Se envía una copia: lo que se escanee mientras tanto queda para el próximo retiro
+        sent = [{'item': wi['item'], 'quantity': wi['quantity']} for wi in self.withdrawal_items]
+        
+        def on_done(status):
+            if status:
                 # Limpiar formulario
-                self.withdrawal_items.clear()
-                self.obra_var.set("")
+                self.remove_withdrawn(sent)
+                if not self.withdrawal_items:
+                    self.obra_var.set("")
                 self.update_withdrawal_list()
                 self.barcode_scanner.clear()
                 
-                messagebox.showinfo("Éxito", "Retiro confirmado exitosamente")
+                if status == Outbox.PENDING:
+                    messagebox.showwarning(
+                        "Sin conexión",
+                        "El retiro quedó guardado y se enviará al servidor cuando vuelva la conexión"
+                    )
+                else:
+                    messagebox.showinfo("Éxito", "Retiro confirmado exitosamente")
             else:
+                self.update_withdrawal_list()
                 messagebox.showerror("Error", "Error al procesar el retiro")
-            
-        except Exception as e:
+        
+        def on_error(e):
+            self.update_withdrawal_list()
             messagebox.showerror("Error", f"Error al confirmar retiro: {str(e)}")
+        
+        # Procesar retiro; sin doble envío mientras está en curso
+        self.confirm_button.config(state=tk.DISABLED)
+        self.app.run_in_background(
+            self.app.data_manager.process_withdrawal, sent, self.obra_var.get().strip(),
+            on_done=on_done, on_error=on_error, key='withdrawal', owner=self,
+            indicator=self.busy, message="Procesando retiro..."
+        )
+    
+    def remove_withdrawn(self, sent):
+        """Quitar de la lista las cantidades ya retiradas"""
+        withdrawn = {wi['item']['id']: wi['quantity'] for wi in sent}
+        remaining = []
+        for wi in self.withdrawal_items:
+            taken = withdrawn.get(wi['item']['id'], 0)
+            if wi['quantity'] > taken:
+                remaining.append({
+                    'item': dict(wi['item'], stock=wi['item']['stock'] - taken),
+                    'quantity': wi['quantity'] - taken
+                })
+        self.withdrawal_items = remaining
+
+# Formato de las filas del historial
+ACTION_TRANSLATIONS = {
+    'withdrawal': 'Retiro',
+    'addition': 'Adición',
+    'adjustment': 'Ajuste'
+}
+
+def format_action_date(value):
+    """Fecha ISO del servidor como dd/mm/aaaa hh:mm"""
+    if not isinstance(value, str):
+        return str(value)
+    # Camino rápido: recortar el texto ISO sin interpretarlo
+    if len(value) >= 16 and value[4] == '-' and value[7] == '-' and value[10] in 'T ' and value[13] == ':':
+        return f"{value[8:10]}/{value[5:7]}/{value[0:4]} {value[11:16]}"
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M')
+    except ValueError:
+        return value
+
+def history_row(record):
+    # Color según tipo de acción
+    action_type = record['action_type']
+    tags = (action_type,) if action_type in ('withdrawal', 'addition') else ()
+    return (
+        str(record['id']),
+        '',
+        (
+            format_action_date(record['action_date']),
+            ACTION_TRANSLATIONS.get(action_type, action_type),
+            record['item_name'],
+            record['quantity'],
+            record['obra'],
+            record['user_name']
+        ),
+        tags
+    )
 
 # Página de Historial
 class HistoryPage(ttk.Frame):
@@ -1353,6 +1694,9 @@ class HistoryPage(ttk.Frame):
         )
         refresh_button.pack(side=tk.RIGHT)
         
+        self.busy = BusyIndicator(header_frame)
+        self.busy.pack(side=tk.RIGHT, padx=20)
+        
         # Frame principal
         main_frame = ttk.Frame(self)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -1361,20 +1705,16 @@ class HistoryPage(ttk.Frame):
         tree_frame = ttk.Frame(main_frame)
         tree_frame.pack(fill=tk.BOTH, expand=True)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Treeview
-        self.tree = ttk.Treeview(
+        # Lista virtual: el historial se pide por páginas a medida que se desplaza
+        self.history_list = VirtualTreeview(
             tree_frame,
             columns=('fecha', 'accion', 'item', 'cantidad', 'obra', 'usuario'),
             show='headings',
-            yscrollcommand=scrollbar.set,
-            height=20
+            height=20,
+            on_need_more=self.load_more_history
         )
-        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.config(command=self.tree.yview)
+        self.history_list.pack(fill=tk.BOTH, expand=True)
+        self.tree = self.history_list.tree
         
         # Configurar columnas
         self.tree.heading('fecha', text='Fecha y Hora')
@@ -1391,57 +1731,35 @@ class HistoryPage(ttk.Frame):
         self.tree.column('obra', width=150)
         self.tree.column('usuario', width=150)
         
-        # Cargar historial
-        self.load_history()
-    
-    def load_history(self):
-        """Cargar historial de movimientos"""
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Cargar datos
-        history = self.app.data_manager.get_history()
-        
-        for record in history:
-            # Formatear fecha
-            try:
-                from datetime import datetime
-                if isinstance(record['action_date'], str):
-                    date_obj = datetime.fromisoformat(record['action_date'].replace('Z', '+00:00'))
-                    formatted_date = date_obj.strftime('%d/%m/%Y %H:%M')
-                else:
-                    formatted_date = str(record['action_date'])
-            except:
-                formatted_date = str(record['action_date'])
-            
-            # Traducir tipo de acción
-            action_translations = {
-                'withdrawal': 'Retiro',
-                'addition': 'Adición',
-                'adjustment': 'Ajuste'
-            }
-            action_text = action_translations.get(record['action_type'], record['action_type'])
-            
-            # Color según tipo de acción
-            tags = []
-            if record['action_type'] == 'withdrawal':
-                tags.append('withdrawal')
-            elif record['action_type'] == 'addition':
-                tags.append('addition')
-            
-            self.tree.insert('', 'end', values=(
-                formatted_date,
-                action_text,
-                record['item_name'],
-                record['quantity'],
-                record['obra'],
-                record['user_name']
-            ), tags=tags)
-        
         # Configurar colores
         self.tree.tag_configure('withdrawal', foreground='red')
         self.tree.tag_configure('addition', foreground='green')
+        self.history_cursor = None
+        
+        # Cargar historial
+        self.load_history()
+    
+    def load_history(self, cursor=None):
+        """Cargar historial de movimientos, una página"""
+        self.app.run_in_background(
+            self.app.data_manager.get_history_page, cursor,
+            on_done=lambda page: self.show_history(cursor, page), key='history', owner=self,
+            indicator=self.busy, message="Cargando historial..."
+        )
+    
+    def load_more_history(self):
+        if self.history_cursor is None or self.app.worker.busy('history'):
+            return
+        self.load_history(self.history_cursor)
+    
+    def show_history(self, cursor, page):
+        # Cada registro se formatea una sola vez, al llegar su página
+        rows = [history_row(record) for record in page['items']]
+        self.history_cursor = page['next_cursor']
+        if cursor is None:
+            self.history_list.set_rows(rows, has_more=self.history_cursor is not None)
+        else:
+            self.history_list.extend(rows, has_more=self.history_cursor is not None)
 
 # Aplicación Principal
 class InventoryApp:
@@ -1457,9 +1775,14 @@ class InventoryApp:
         self.setup_styles()
         
         # Inicializar componentes
-        self.session_state = SessionState()
-        self.session_state.app = self  # Agregar referencia a la app
+        self.session_state = SessionState(self)
         self.data_manager = DataManager()
+        # Las llamadas al backend corren fuera del hilo de Tk
+        self.worker = BackgroundWorker(self.root)
+        self._sync_after = None
+        self.live_updates = None
+        self._live_after = None
+        self._live_sync = False
         
         # Frame principal
         self.main_frame = ttk.Frame(self.root)
@@ -1472,6 +1795,80 @@ class InventoryApp:
         # Configurar cierre de ventana
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
     
+    def run_in_background(self, fn, *args, on_done=None, on_error=None, key=None, owner=None,
+                          indicator=None, message="Cargando..."):
+        """Run a DataManager call on the worker; callbacks run on the Tk thread"""
+        if indicator is not None:
+            indicator.start(message)
+        if on_error is None:
+            on_error = lambda e: messagebox.showerror("Error", str(e))
+        return self.worker.submit(
+            fn, *args,
+            on_done=on_done,
+            on_error=on_error,
+            on_finish=indicator.stop if indicator is not None else None,
+            key=key,
+            owner=owner
+        )
+    
+    def start_sync(self):
+        """Sincronizar ahora y luego cada SYNC_INTERVAL_MS"""
+        self.stop_sync()
+        self.run_in_background(
+            self.data_manager.sync,
+            on_done=self.on_synced, on_error=self.on_sync_error, key='sync'
+        )
+    
+    def stop_sync(self):
+        self.worker.cancel('sync')
+        if self._sync_after is not None:
+            self.root.after_cancel(self._sync_after)
+            self._sync_after = None
+    
+    def on_synced(self, result):
+        if result['rejected']:
+            messagebox.showwarning(
+                "Sincronización",
+                "El servidor rechazó operaciones guardadas sin conexión:\n\n" + "\n".join(result['rejected'])
+            )
+        # La copia local cambió: refrescar el inventario en pantalla
+        if (result['changed'] or result['rejected']) and isinstance(self.current_page, InventoryPage):
+            self.current_page.reload_items()
+        self._sync_after = self.root.after(Config.SYNC_INTERVAL_MS, self.start_sync)
+    
+    def on_sync_error(self, e):
+        print(f"Error sincronizando: {e}")
+        self._sync_after = self.root.after(Config.SYNC_INTERVAL_MS, self.start_sync)
+    
+    def start_live_updates(self):
+        """Escuchar los cambios de stock de la bodega actual"""
+        self.stop_live_updates()
+        warehouse = self.session_state.current_warehouse
+        self.live_updates = StockEventListener(self.data_manager, str(warehouse['id']))
+        self.live_updates.start()
+        self._live_after = self.root.after(Config.LIVE_UPDATES_POLL_MS, self.poll_live_updates)
+    
+    def stop_live_updates(self):
+        if self.live_updates is not None:
+            self.live_updates.stop()
+            self.live_updates = None
+        if self._live_after is not None:
+            self.root.after_cancel(self._live_after)
+            self._live_after = None
+        self._live_sync = False
+    
+    def poll_live_updates(self):
+        updates = self.live_updates.drain()
+        # Una ráfaga de avisos se muestra con una sola recarga
+        if 'sync' in updates:
+            self._live_sync = True
+        elif 'changed' in updates and isinstance(self.current_page, InventoryPage):
+            self.current_page.reload_items()
+        if self._live_sync and not self.worker.busy('sync'):
+            self._live_sync = False
+            self.start_sync()
+        self._live_after = self.root.after(Config.LIVE_UPDATES_POLL_MS, self.poll_live_updates)
+    
     def center_window(self):
         """Centrar la ventana en la pantalla"""
         self.root.update_idletasks()
@@ -1591,10 +1988,13 @@ class InventoryApp:
     def on_closing(self):
         """Manejar cierre de la aplicación"""
         if self.session_state.is_authenticated:
-            if messagebox.askyesno("Salir", "¿Está seguro que desea salir del sistema?"):
-                self.root.destroy()
-        else:
-            self.root.destroy()
+            if not messagebox.askyesno("Salir", "¿Está seguro que desea salir del sistema?"):
+                return
+        self.stop_sync()
+        self.stop_live_updates()
+        self.worker.shutdown()
+        self.data_manager.close()
+        self.root.destroy()
 
 # Función principal
 def main():
@@ -0,0 +1,145 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import queue
+import threading
+import traceback
+
+
+class Task:
+    """Handle of a background call; cancel() drops its result"""
+
+    def __init__(self, key=None, owner=None, on_done=None, on_error=None, on_finish=None):
+        self.key = key
+        self.owner = owner
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_finish = on_finish
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Skip the call if it has not started yet; on_done/on_error never run either way"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+class BackgroundWorker:
+    """Run blocking calls on a thread pool and deliver their results on the Tk thread.
+
+    Tk is not thread-safe, so workers never touch widgets: results go through a
+    queue that the main loop drains with root.after while calls are in flight.
+    Submitting with a key supersedes the previous call with that key, so a
+    newer search cancels the older one and a stale answer is never shown. A
+    request already on the wire cannot be interrupted; its answer is dropped.
+    Callbacks of calls tied to an owner widget are skipped once the widget has
+    been destroyed.
+    """
+
+    def __init__(self, root, max_workers: int = 4, poll_ms: int = 25):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+        self._results: "queue.Queue" = queue.Queue()
+        self._latest: Dict[Any, Task] = {}
+        self._in_flight = 0
+        self._after_id = None
+
+    def submit(
+        self,
+        fn: Callable[..., Any],
+        *args,
+        on_done: Optional[Callable[[Any], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+        on_finish: Optional[Callable[[], None]] = None,
+        key=None,
+        owner=None
+    ) -> Task:
+        """Call fn(*args) in the background.
+
+        on_done(result) or on_error(exception) runs on the Tk thread unless the
+        task was cancelled or superseded or its owner destroyed; on_finish()
+        always runs, e.g. to stop a loading indicator.
+        """
+        task = Task(key, owner, on_done, on_error, on_finish)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = task
+
+        def run():
+            if task.cancelled:
+                self._results.put((task, None, None))
+                return
+            try:
+                self._results.put((task, fn(*args), None))
+            except Exception as e:
+                self._results.put((task, None, e))
+
+        task.future = self._executor.submit(run)
+        # A call cancelled before it started never runs; report it so on_finish still fires
+        task.future.add_done_callback(
+            lambda future: self._results.put((task, None, None)) if future.cancelled() else None
+        )
+        self._in_flight += 1
+        self._schedule_poll()
+        return task
+
+    def cancel(self, key):
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def busy(self, key) -> bool:
+        return key in self._latest
+
+    def _schedule_poll(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._after_id = None
+        try:
+            while True:
+                try:
+                    task, result, error = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._in_flight -= 1
+                self._deliver(task, result, error)
+        finally:
+            # A failing callback must not stop the delivery of the others
+            if self._in_flight > 0:
+                self._schedule_poll()
+
+    def _deliver(self, task: Task, result, error):
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        try:
+            if task.cancelled or (task.owner is not None and not task.owner.winfo_exists()):
+                return
+            if error is None:
+                if task.on_done is not None:
+                    task.on_done(result)
+            elif task.on_error is not None:
+                task.on_error(error)
+            else:
+                traceback.print_exception(type(error), error, error.__traceback__)
+        finally:
+            if task.on_finish is not None:
+                task.on_finish()
+
+    def shutdown(self):
+        """Stop accepting work and drop whatever has not started"""
+        for task in self._latest.values():
+            task.cancel()
+        self._latest.clear()
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
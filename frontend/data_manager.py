@@ -1,12 +1,34 @@
 from frontend.api_client import APIClient
+from frontend.local_store import ItemCache, LocalStore, Outbox, WriteRejected
 from typing import Dict, List, Optional, Any
+import os
+import threading
 import uuid
 
 class DataManager:
-    def __init__(self):
+    # Result limits of the listings; a shorter answer is the complete result set
+    ITEMS_LIMIT = 1000
+    SEARCH_LIMIT = 200
+    # Page sizes of the listings loaded as the user scrolls
+    ITEMS_PAGE_SIZE = 100
+    HISTORY_PAGE_SIZE = 200
+    # Local item cache and outbox of the terminal
+    CACHE_PATH = os.environ.get(
+        "INVENTORY_CACHE_PATH",
+        os.path.join(os.path.expanduser("~"), ".inventario", "terminal.db")
+    )
+    # Answers that mean "try again later" rather than "this write is wrong"
+    RETRY_LATER_STATUSES = (401, 408, 429)
+    
+    def __init__(self, cache_path: Optional[str] = None):
         self.api_client = APIClient()
         self.current_user = None
         self.current_warehouse = None
+        self.store = LocalStore(cache_path or self.CACHE_PATH)
+        self.item_cache = ItemCache(self.store)
+        self.outbox = Outbox(self.store)
+        # One replay at a time, so entries go out in order
+        self._flush_lock = threading.Lock()
     
     def verify_login(self, username: str, password: str) -> Optional[Dict[str, Any]]:
         """Verify login credentials"""
@@ -23,6 +45,7 @@ class DataManager:
     def set_current_warehouse(self, warehouse: Dict[str, Any]):
         """Set current warehouse"""
         self.current_warehouse = warehouse
+        self.item_cache.load(str(warehouse["id"]))
     
     def get_current_warehouse(self) -> Optional[Dict[str, Any]]:
         """Get current warehouse"""
@@ -32,17 +55,60 @@ class DataManager:
         """Get all warehouses"""
         return self.api_client.get_warehouses()
     
-    def get_items_by_warehouse(self, warehouse_id: str, page: int = 1, per_page: int = 100) -> List[Dict[str, Any]]:
+    def get_items_by_warehouse(self, warehouse_id: str, max_items: Optional[int] = ITEMS_LIMIT) -> List[Dict[str, Any]]:
         """Get items from specific warehouse"""
-        return self.api_client.get_items_by_warehouse(warehouse_id, page, per_page)
+        return list(self.api_client.iter_items_by_warehouse(warehouse_id, max_items=max_items))
     
-    def search_items(self, query: str, warehouse_id: Optional[str] = None, page: int = 1, per_page: int = 100) -> List[Dict[str, Any]]:
+    def search_items(self, query: str, warehouse_id: Optional[str] = None, max_items: Optional[int] = SEARCH_LIMIT) -> List[Dict[str, Any]]:
         """Search items in warehouse"""
-        return self.api_client.search_items(query, warehouse_id, page, per_page)
+        if self.item_cache.covers(warehouse_id):
+            return self.item_cache.search(query)[:max_items]
+        return list(self.api_client.iter_search_items(query, warehouse_id, max_items=max_items))
+    
+    def get_items_page(self, warehouse_id: str, cursor: Optional[str] = None, per_page: int = ITEMS_PAGE_SIZE) -> Dict[str, Any]:
+        """Get one page of items from specific warehouse: {"items": [...], "next_cursor": ...}"""
+        if cursor is None and self.item_cache.covers(warehouse_id):
+            return {"items": self.item_cache.items(), "next_cursor": None}
+        return self.api_client.get_items_by_warehouse(warehouse_id, cursor=cursor, per_page=per_page)
+    
+    def search_items_page(self, query: str, warehouse_id: Optional[str] = None, cursor: Optional[str] = None, per_page: int = ITEMS_PAGE_SIZE) -> Dict[str, Any]:
+        """Get one page of search results: {"items": [...], "next_cursor": ...}"""
+        if cursor is None and self.item_cache.covers(warehouse_id):
+            return {"items": self.item_cache.search(query), "next_cursor": None}
+        return self.api_client.search_items(query, warehouse_id, cursor=cursor, per_page=per_page)
+    
+    def get_warehouse_summary(self, warehouse_id: str) -> Optional[Dict[str, Any]]:
+        """Stock totals of a warehouse computed by the server, None when it cannot be reached"""
+        return self.api_client.get_warehouse_summary(warehouse_id)
     
     def get_item_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
-        """Get item by barcode"""
-        return self.api_client.get_item_by_barcode(barcode)
+        """Get item by barcode, from the local cache when it is there"""
+        item = self.item_cache.get(barcode)
+        if item is None:
+            item = self.api_client.get_item_by_barcode(barcode)
+            if item is not None:
+                self.item_cache.put([item])
+        return item
+    
+    def get_items_by_barcodes(self, barcodes: List[str]) -> Optional[Dict[str, Any]]:
+        """Resolve a batch of scanned barcodes: {"items": [...], "missing": [...]}
+        
+        Cached barcodes are answered locally and only the rest go to the server;
+        if it cannot be reached they are reported missing.
+        """
+        found, unknown = self.item_cache.get_many(barcodes)
+        if not unknown:
+            return {"items": found, "missing": []}
+        result = self.api_client.get_items_by_barcodes(unknown)
+        if result is None:
+            return {"items": found, "missing": unknown} if found else None
+        self.item_cache.put(result["items"])
+        by_barcode = {item["barcode"]: item for item in found + result["items"]}
+        ordered = list(dict.fromkeys(barcodes))
+        return {
+            "items": [by_barcode[barcode] for barcode in ordered if barcode in by_barcode],
+            "missing": [barcode for barcode in ordered if barcode not in by_barcode]
+        }
     
     def add_item(self, item_data: Dict[str, Any]) -> bool:
         """Add new item"""
@@ -50,28 +116,24 @@ class DataManager:
         if 'unit_price' in item_data:
             del item_data['unit_price']
         result = self.api_client.create_item(item_data)
+        if result is not None:
+            self.item_cache.put([result])
         return result is not None
     
-    def add_item_stock(self, item_id: str, quantity: int) -> bool:
-        """Add stock to existing item"""
-        try:
-            import requests
-            headers = {"Authorization": f"Bearer {self.api_client.token}"}
-            response = requests.post(
-                f"{self.api_client.base_url}/inventory/items/{item_id}/add_stock",
-                headers=headers,
-                json={"quantity": quantity},
-                timeout=10
-            )
-            return response.status_code == 200
-        except Exception as e:
-            print(f"Error agregando stock: {e}")
-            return False
-    
-    def process_withdrawal(self, items: List[Dict[str, Any]], obra: str, notes: str = "") -> bool:
-        """Process withdrawal"""
+    def add_item_stock(self, item_id: str, quantity: int) -> Optional[str]:
+        """Add stock to existing item through the outbox
+        
+        Returns Outbox.SENT, or Outbox.PENDING if it was kept for later;
+        raises WriteRejected if the server refused it.
+        """
+        return self._write(
+            "add_stock", "POST", f"/inventory/items/{item_id}/add_stock", {"quantity": quantity}
+        )
+    
+    def process_withdrawal(self, items: List[Dict[str, Any]], obra: str, notes: str = "") -> Optional[str]:
+        """Process withdrawal through the outbox; same results as add_item_stock, None if there is nothing to send"""
         if not self.current_warehouse or not items:
-            return False
+            return None
         
         withdrawal_data = {
             "obra": obra,
@@ -86,18 +148,142 @@ class DataManager:
             ]
         }
         
-        result = self.api_client.create_withdrawal(withdrawal_data)
-        return result is not None
+        return self._write("withdrawal", "POST", "/withdrawals/", withdrawal_data)
+    
+    @staticmethod
+    def _stock_changes(kind: str, path: str, payload: Dict[str, Any]) -> Dict[str, int]:
+        """Stock change of each item that a queued write makes"""
+        if kind == "withdrawal":
+            changes: Dict[str, int] = {}
+            for line in payload["items"]:
+                changes[line["item_id"]] = changes.get(line["item_id"], 0) - line["quantity"]
+            return changes
+        if kind == "add_stock":
+            return {path.split("/")[-2]: payload["quantity"]}
+        return {}
+    
+    def _write(self, kind: str, method: str, path: str, payload: Dict[str, Any]) -> str:
+        """Store a write in the outbox, show it in the cache and try to send it right away"""
+        entry_id = self.outbox.add(str(self.current_user["id"]), kind, method, path, payload)
+        self.item_cache.adjust_stock(self._stock_changes(kind, path, payload))
+        self.flush_outbox()
+        status, error = self.outbox.status(entry_id)
+        if status == Outbox.REJECTED:
+            raise WriteRejected(error)
+        return status
     
-    def get_history(self) -> List[Dict[str, Any]]:
-        """Get history for current warehouse"""
+    def flush_outbox(self) -> List[str]:
+        """Send the pending writes of the current user in order
+        
+        Stops at the first one the server cannot take now, so a later write
+        never overtakes an earlier one. Returns the reasons of the writes the
+        server refused; their stock change is undone in the cache.
+        """
+        if not self.current_user:
+            return []
+        rejected = []
+        with self._flush_lock:
+            for entry in self.outbox.pending(str(self.current_user["id"])):
+                try:
+                    response = self.api_client.send_queued(
+                        entry["method"], entry["path"], entry["payload"], entry["idempotency_key"]
+                    )
+                except Exception as e:
+                    print(f"Error enviando operación pendiente: {e}")
+                    self.outbox.mark_failed(entry["id"], str(e))
+                    break
+                
+                if response.status_code < 300:
+                    self.outbox.mark_sent(entry["id"])
+                    if entry["kind"] == "add_stock":
+                        self.item_cache.put([response.json()])
+                elif response.status_code >= 500 or response.status_code in self.RETRY_LATER_STATUSES:
+                    self.outbox.mark_failed(entry["id"], f"HTTP {response.status_code}")
+                    break
+                else:
+                    try:
+                        error = str(response.json().get("detail") or f"HTTP {response.status_code}")
+                    except ValueError:
+                        error = f"HTTP {response.status_code}"
+                    self.outbox.mark_rejected(entry["id"], error)
+                    changes = self._stock_changes(entry["kind"], entry["path"], entry["payload"])
+                    self.item_cache.adjust_stock({item_id: -delta for item_id, delta in changes.items()})
+                    rejected.append(error)
+        return rejected
+    
+    def sync(self) -> Dict[str, Any]:
+        """Replay the outbox and bring the item cache of the current warehouse up to date
+        
+        The cache follows the server's change feed, so a sync downloads only
+        what changed since the last one. It is only read once every pending
+        write went through, so the cache does not hide writes the server has
+        not seen yet.
+        """
+        result = {"rejected": self.flush_outbox(), "pending": 0, "changed": 0, "online": False}
+        if self.current_user:
+            result["pending"] = self.outbox.count_pending(str(self.current_user["id"]))
+        warehouse = self.current_warehouse
+        if not warehouse or result["pending"]:
+            return result
+        
+        warehouse_id = str(warehouse["id"])
+        if self.item_cache.warehouse_id != warehouse_id:
+            return result
+        while True:
+            changes = self.api_client.get_item_changes(warehouse_id, self.item_cache.since)
+            if changes is None:
+                return result
+            result["changed"] += self.item_cache.apply_changes(warehouse_id, changes)
+            if not changes["has_more"]:
+                result["online"] = True
+                return result
+    
+    def open_stock_events(self, warehouse_id: str):
+        """Stock event stream of a warehouse (see StockEventListener), None if it cannot be opened"""
+        return self.api_client.open_stock_events(warehouse_id)
+    
+    def apply_stock_event(self, kind: str, event: Dict[str, Any]) -> Optional[str]:
+        """Apply an event pushed by the server to the item cache
+        
+        Returns "changed" when a cached stock changed, "sync" when the change
+        feed has to be read instead (on connecting, after a resync, for an
+        item not cached yet, or while this terminal still has writes queued
+        that the announced stock does not include) and None otherwise.
+        """
+        if kind in ("ready", "resync"):
+            return "sync"
+        if kind != "stock" or event["warehouse_id"] != self.item_cache.warehouse_id:
+            return None
+        if self.current_user and self.outbox.count_pending(str(self.current_user["id"])):
+            return "sync"
+        changed = self.item_cache.set_stock(event["item_id"], event["stock"])
+        if changed is None:
+            return "sync"
+        return "changed" if changed else None
+    
+    def get_history(self, max_items: Optional[int] = 500) -> List[Dict[str, Any]]:
+        """Get the most recent history for current warehouse"""
         if not self.current_warehouse:
             return []
-        return self.api_client.get_history_by_warehouse(str(self.current_warehouse["id"]))
+        return list(self.api_client.iter_history_by_warehouse(str(self.current_warehouse["id"]), max_items=max_items))
+    
+    def get_history_page(self, cursor: Optional[str] = None, per_page: int = HISTORY_PAGE_SIZE) -> Dict[str, Any]:
+        """Get one page of history for current warehouse, newest first"""
+        if not self.current_warehouse:
+            return {"items": [], "next_cursor": None}
+        return self.api_client.get_history_by_warehouse(str(self.current_warehouse["id"]), cursor=cursor, per_page=per_page)
     
     def logout(self):
         """Logout user"""
         self.current_user = None
         self.current_warehouse = None
-        self.api_client.token = None
-        self.api_client.headers = {"Content-Type": "application/json"}
\ No newline at end of file
+        token = self.api_client.token
+        self.api_client.clear_token()
+        if token:
+            # Without it the token would keep working until it expires; the UI does not wait
+            threading.Thread(target=self.api_client.revoke_token, args=(token,), daemon=True).start()
+    
+    def close(self):
+        """Release the connections to the API and the local store"""
+        self.api_client.close()
+        self.store.close()
\ No newline at end of file
@@ -0,0 +1,95 @@
+from typing import Any, Dict, Iterable, Iterator, Set, Tuple
+import codecs
+import json
+import queue
+import threading
+
+
+def iter_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """Lines of a byte stream, yielded as soon as each one is complete"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+
+def iter_events(lines: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(event name, decoded data) of a server-sent events stream; comments are skipped"""
+    kind, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield kind, json.loads("\n".join(data))
+            kind, data = "message", []
+        elif not line.startswith(":"):
+            field, _, value = line.partition(":")
+            value = value[1:] if value.startswith(" ") else value
+            if field == "event":
+                kind = value
+            elif field == "data":
+                data.append(value)
+
+
+class StockEventListener(threading.Thread):
+    """Follow the stock events the server pushes for a warehouse.
+
+    Runs on a thread of its own: events are applied to the item cache here
+    and what the UI has to do about them ("changed" or "sync") is queued for
+    the Tk thread to drain. A dropped connection is reopened with backoff;
+    every connection starts with a "ready" event, so whatever happened while
+    disconnected is caught up through the change feed.
+    """
+
+    RETRY_SECONDS = (1, 2, 5, 10, 30)
+
+    def __init__(self, data_manager, warehouse_id: str):
+        super().__init__(name="stock-events", daemon=True)
+        self.data_manager = data_manager
+        self.warehouse_id = warehouse_id
+        self.updates: "queue.Queue[str]" = queue.Queue()
+        self._stopped = threading.Event()
+        self._response = None
+
+    def stop(self):
+        """Close the stream; the thread ends on its own shortly after"""
+        self._stopped.set()
+        response = self._response
+        if response is not None:
+            response.close()
+
+    def drain(self) -> Set[str]:
+        """Updates queued since the last call"""
+        updates = set()
+        while True:
+            try:
+                updates.add(self.updates.get_nowait())
+            except queue.Empty:
+                return updates
+
+    def run(self):
+        attempt = 0
+        while not self._stopped.is_set():
+            response = self.data_manager.open_stock_events(self.warehouse_id)
+            if response is None:
+                self._stopped.wait(self.RETRY_SECONDS[min(attempt, len(self.RETRY_SECONDS) - 1)])
+                attempt += 1
+                continue
+            self._response = response
+            attempt = 0
+            try:
+                if self._stopped.is_set():
+                    return
+                for kind, event in iter_events(iter_lines(response.iter_content(chunk_size=None))):
+                    update = self.data_manager.apply_stock_event(kind, event)
+                    if update is not None:
+                        self.updates.put(update)
+            except Exception as e:
+                if not self._stopped.is_set():
+                    print(f"Error en eventos de stock: {e}")
+            finally:
+                self._response = None
+                response.close()
+            self._stopped.wait(self.RETRY_SECONDS[0])
@@ -0,0 +1,314 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from frontend.search import item_search_key, rank_items
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id TEXT PRIMARY KEY,
+    warehouse_id TEXT NOT NULL,
+    barcode TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_warehouse ON items (warehouse_id);
+CREATE TABLE IF NOT EXISTS sync_state (
+    warehouse_id TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feed_position (
+    warehouse_id TEXT PRIMARY KEY,
+    since INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    method TEXT NOT NULL,
+    path TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_user_status ON outbox (user_id, status, id);
+"""
+
+
+class WriteRejected(Exception):
+    """The server refused a queued write; the message is its reason"""
+
+
+class LocalStore:
+    """SQLite file of the terminal, shared by the item cache and the outbox.
+
+    DataManager calls run on worker threads, so one connection is shared and
+    every access holds the lock. The outbox has to survive a crash or a power
+    cut, hence synchronous=FULL.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class ItemCache:
+    """Items of the current warehouse, kept on disk and indexed in memory.
+
+    Selecting a warehouse reads its rows into dicts by id and by barcode, so
+    lookups and searches touch neither the network nor the file. The rows
+    follow the server's change feed from the stored position; a warehouse
+    counts as synced once the feed has been read up to date, until then
+    listings and searches are asked to the server.
+    """
+
+    def __init__(self, store: LocalStore):
+        self.store = store
+        self.warehouse_id: Optional[str] = None
+        self.synced_at: Optional[float] = None
+        self.since = 0
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._keys: Dict[str, str] = {}
+        self._by_barcode: Dict[str, str] = {}
+        self._ordered: Optional[List[str]] = None
+
+    def load(self, warehouse_id: str):
+        """Index the stored items of warehouse_id; a no-op if it is already loaded"""
+        with self.store.lock:
+            if warehouse_id == self.warehouse_id:
+                return
+            rows = self.store.conn.execute(
+                "SELECT data FROM items WHERE warehouse_id = ?", (warehouse_id,)
+            ).fetchall()
+            state = self.store.conn.execute(
+                "SELECT synced_at FROM sync_state WHERE warehouse_id = ?", (warehouse_id,)
+            ).fetchone()
+            position = self.store.conn.execute(
+                "SELECT since FROM feed_position WHERE warehouse_id = ?", (warehouse_id,)
+            ).fetchone()
+            self.warehouse_id = warehouse_id
+            self.synced_at = state[0] if state else None
+            self.since = position[0] if position else 0
+            self._items.clear()
+            self._keys.clear()
+            self._by_barcode.clear()
+            for (data,) in rows:
+                self._index(json.loads(data))
+
+    def covers(self, warehouse_id: Optional[str]) -> bool:
+        """True if listings of warehouse_id can be answered from the cache"""
+        return self.synced_at is not None and warehouse_id == self.warehouse_id
+
+    def _index(self, item: Dict[str, Any]):
+        item_id = str(item["id"])
+        previous = self._items.get(item_id)
+        if previous is not None and self._by_barcode.get(previous["barcode"]) == item_id:
+            del self._by_barcode[previous["barcode"]]
+        self._items[item_id] = item
+        self._keys[item_id] = item_search_key(item)
+        self._by_barcode[item["barcode"]] = item_id
+        self._ordered = None
+
+    def _unindex(self, item_id: str):
+        item = self._items.pop(item_id, None)
+        if item is None:
+            return
+        del self._keys[item_id]
+        if self._by_barcode.get(item["barcode"]) == item_id:
+            del self._by_barcode[item["barcode"]]
+        self._ordered = None
+
+    # Lecturas
+    def get(self, barcode: str) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            item_id = self._by_barcode.get(barcode)
+            return self._items[item_id] if item_id is not None else None
+
+    def get_many(self, barcodes: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """(items found, barcodes not cached), both in request order without repeats"""
+        found, missing = [], []
+        with self.store.lock:
+            for barcode in dict.fromkeys(barcodes):
+                item_id = self._by_barcode.get(barcode)
+                if item_id is None:
+                    missing.append(barcode)
+                else:
+                    found.append(self._items[item_id])
+        return found, missing
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Every cached item of the warehouse, ordered like the server listing"""
+        with self.store.lock:
+            if self._ordered is None:
+                self._ordered = sorted(self._items, key=lambda item_id: (self._items[item_id]["name"], item_id))
+            return [self._items[item_id] for item_id in self._ordered]
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            entries = [(item, self._keys[item_id]) for item_id, item in self._items.items()]
+        return rank_items(entries, query)
+
+    # Escrituras
+    def put(self, items: Iterable[Dict[str, Any]]):
+        """Store items as received from the server"""
+        rows = [(str(item["id"]), str(item["warehouse_id"]), item["barcode"], json.dumps(item, sort_keys=True))
+                for item in items]
+        if not rows:
+            return
+        with self.store.lock:
+            with self.store.conn:
+                self.store.conn.executemany(
+                    "INSERT OR REPLACE INTO items (id, warehouse_id, barcode, data) VALUES (?, ?, ?, ?)", rows
+                )
+            for item_id, warehouse_id, _, data in rows:
+                if warehouse_id == self.warehouse_id:
+                    self._index(json.loads(data))
+                else:
+                    self._unindex(item_id)
+
+    def apply_changes(self, warehouse_id: str, changes: Dict[str, Any]) -> int:
+        """Apply one change feed response and move the feed position; returns how many rows changed"""
+        deletes = [str(item_id) for item_id in changes["deletes"]]
+        upserts = [dict(item, warehouse_id=warehouse_id) for item in changes["upserts"]]
+        with self.store.lock:
+            with self.store.conn:
+                self.store.conn.executemany(
+                    "DELETE FROM items WHERE id = ? AND warehouse_id = ?",
+                    [(item_id, warehouse_id) for item_id in deletes]
+                )
+                self.store.conn.executemany(
+                    "INSERT OR REPLACE INTO items (id, warehouse_id, barcode, data) VALUES (?, ?, ?, ?)",
+                    [(str(item["id"]), warehouse_id, item["barcode"], json.dumps(item, sort_keys=True))
+                     for item in upserts]
+                )
+                self.store.conn.execute(
+                    "INSERT OR REPLACE INTO feed_position (warehouse_id, since) VALUES (?, ?)",
+                    (warehouse_id, changes["next_since"])
+                )
+                if not changes["has_more"]:
+                    synced_at = time.time()
+                    self.store.conn.execute(
+                        "INSERT OR REPLACE INTO sync_state (warehouse_id, synced_at) VALUES (?, ?)",
+                        (warehouse_id, synced_at)
+                    )
+            if warehouse_id == self.warehouse_id:
+                # Borrados antes que altas: un item que salió y volvió viene en ambas listas
+                for item_id in deletes:
+                    self._unindex(item_id)
+                for item in upserts:
+                    self._index(item)
+                self.since = changes["next_since"]
+                if not changes["has_more"]:
+                    self.synced_at = synced_at
+        return len(deletes) + len(upserts)
+
+    def set_stock(self, item_id: str, stock: int) -> Optional[bool]:
+        """Store the stock the server announced; None if the item is not cached, else whether it changed"""
+        with self.store.lock:
+            item = self._items.get(item_id)
+            if item is None:
+                return None
+            if item["stock"] == stock:
+                return False
+            self.put([dict(item, stock=stock)])
+            return True
+
+    def adjust_stock(self, changes: Dict[str, int]):
+        """Apply a local write to the cached stock before the server confirms it"""
+        with self.store.lock:
+            updated = [
+                dict(self._items[item_id], stock=self._items[item_id]["stock"] + delta)
+                for item_id, delta in changes.items() if item_id in self._items
+            ]
+            self.put(updated)
+
+
+class Outbox:
+    """Writes made at the terminal, kept until the server confirms them.
+
+    Entries are replayed in order with the Idempotency-Key they were created
+    with, so resending one whose answer was lost does not apply it twice.
+    Sent entries are deleted; rejected ones keep the server's reason.
+    """
+
+    PENDING = "pending"
+    SENT = "sent"
+    REJECTED = "rejected"
+
+    def __init__(self, store: LocalStore):
+        self.store = store
+
+    def add(self, user_id: str, kind: str, method: str, path: str, payload: Dict[str, Any]) -> int:
+        with self.store.lock:
+            with self.store.conn:
+                cursor = self.store.conn.execute(
+                    "INSERT INTO outbox (idempotency_key, user_id, kind, method, path, payload, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (str(uuid.uuid4()), user_id, kind, method, path, json.dumps(payload), time.time())
+                )
+            return cursor.lastrowid
+
+    def pending(self, user_id: str) -> List[Dict[str, Any]]:
+        """Pending entries of user_id, oldest first; writes are replayed with their author's session"""
+        with self.store.lock:
+            rows = self.store.conn.execute(
+                "SELECT id, idempotency_key, kind, method, path, payload FROM outbox "
+                "WHERE user_id = ? AND status = ? ORDER BY id",
+                (user_id, self.PENDING)
+            ).fetchall()
+        return [
+            {"id": row[0], "idempotency_key": row[1], "kind": row[2], "method": row[3], "path": row[4],
+             "payload": json.loads(row[5])}
+            for row in rows
+        ]
+
+    def count_pending(self, user_id: str) -> int:
+        with self.store.lock:
+            return self.store.conn.execute(
+                "SELECT COUNT(*) FROM outbox WHERE user_id = ? AND status = ?", (user_id, self.PENDING)
+            ).fetchone()[0]
+
+    def status(self, entry_id: int) -> Tuple[str, Optional[str]]:
+        """(status, last error) of an entry; sent entries are gone from the table"""
+        with self.store.lock:
+            row = self.store.conn.execute(
+                "SELECT status, last_error FROM outbox WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return (row[0], row[1]) if row else (self.SENT, None)
+
+    def mark_sent(self, entry_id: int):
+        with self.store.lock:
+            with self.store.conn:
+                self.store.conn.execute("DELETE FROM outbox WHERE id = ?", (entry_id,))
+
+    def mark_failed(self, entry_id: int, error: str):
+        """Record a failed attempt; the entry stays pending"""
+        with self.store.lock:
+            with self.store.conn:
+                self.store.conn.execute(
+                    "UPDATE outbox SET attempts = attempts + 1, last_error = ? WHERE id = ?", (error, entry_id)
+                )
+
+    def mark_rejected(self, entry_id: int, error: str):
+        with self.store.lock:
+            with self.store.conn:
+                self.store.conn.execute(
+                    "UPDATE outbox SET status = ?, attempts = attempts + 1, last_error = ? WHERE id = ?",
+                    (self.REJECTED, error, entry_id)
+                )
@@ -0,0 +1,83 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import time
+import unicodedata
+
+
+def normalize_search_text(text: Optional[str]) -> str:
+    """Lowercase and strip accents; same rule as the backend search_key"""
+    if not text:
+        return ""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+
+def item_search_key(item: Dict[str, Any]) -> str:
+    return " ".join(normalize_search_text(item.get(field)) for field in ("name", "n_factura", "barcode"))
+
+
+def search_rank(item: Dict[str, Any], query: str, term: str, key: Optional[str] = None) -> Optional[int]:
+    """Rank the backend gives item for query (lower is better), None if it does not match"""
+    barcode = item.get("barcode") or ""
+    if barcode == query:
+        return 0
+    if barcode.startswith(query):
+        return 1
+    if key is None:
+        key = item_search_key(item)
+    if key.startswith(term):
+        return 2
+    if term in key:
+        return 3
+    return None
+
+
+def rank_items(entries: Iterable[Tuple[Dict[str, Any], Optional[str]]], query: str) -> List[Dict[str, Any]]:
+    """Items of (item, search key) entries matching query, in the backend's order"""
+    query = query.strip()
+    term = normalize_search_text(query)
+    ranked = []
+    for item, key in entries:
+        rank = search_rank(item, query, term, key)
+        if rank is not None:
+            ranked.append((rank, item.get("name") or "", str(item.get("id")), item))
+    ranked.sort(key=lambda entry: entry[:3])
+    return [entry[3] for entry in ranked]
+
+
+class SearchResults:
+    """Last item listing fetched from the server, reused to answer narrower queries.
+
+    A query whose normalized text contains the previous one can only match a
+    subset of its results, so when the previous answer was complete (not cut
+    at the result limit) and is recent enough, it is filtered and ranked here
+    the way the backend would, without a request. An empty query is the whole
+    warehouse and refines into any search.
+    """
+
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        self.clear()
+
+    def clear(self):
+        self.term: Optional[str] = None
+        self.items: List[Dict[str, Any]] = []
+        self.complete = False
+        self.fetched_at = 0.0
+
+    def store(self, query: str, items: List[Dict[str, Any]], complete: bool):
+        self.term = normalize_search_text(query.strip())
+        self.items = items
+        self.complete = complete
+        self.fetched_at = time.monotonic()
+
+    def refine(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Results for query from the stored listing, or None if the server must be asked"""
+        query = query.strip()
+        term = normalize_search_text(query)
+        if self.term is None or time.monotonic() - self.fetched_at > self.max_age:
+            return None
+        if term == self.term:
+            return self.items
+        if not self.complete or self.term not in term:
+            return None
+        return rank_items(((item, None) for item in self.items), query)
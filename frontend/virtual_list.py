@@ -0,0 +1,211 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# (id, text, values, tags), already formatted for display
+Row = Tuple[str, str, Tuple[Any, ...], Tuple[str, ...]]
+
+
+class VirtualListModel:
+    """Rows of a list view, ordered and indexed by id.
+
+    Rows are formatted once when they arrive; the view only asks for the slice
+    it shows, so the cost of a render does not depend on how many rows are
+    loaded.
+    """
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._rows: Dict[str, Row] = {}
+        self.has_more = False
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def set_rows(self, rows: Sequence[Row], has_more: bool = False):
+        self._ids = [row[0] for row in rows]
+        self._rows = {row[0]: row for row in rows}
+        self.has_more = has_more
+
+    def extend(self, rows: Sequence[Row], has_more: bool = False):
+        """Append the next page; rows already present are updated in place"""
+        for row in rows:
+            if row[0] not in self._rows:
+                self._ids.append(row[0])
+            self._rows[row[0]] = row
+        self.has_more = has_more
+
+    def update(self, rows: Sequence[Row]) -> int:
+        """Replace known rows by id, keeping their position; returns how many changed"""
+        changed = 0
+        for row in rows:
+            if row[0] in self._rows and self._rows[row[0]] != row:
+                self._rows[row[0]] = row
+                changed += 1
+        return changed
+
+    def get(self, row_id: str) -> Optional[Row]:
+        return self._rows.get(row_id)
+
+    def window(self, start: int, count: int) -> List[Row]:
+        return [self._rows[row_id] for row_id in self._ids[start:start + count]]
+
+
+class VirtualTreeview(ttk.Frame):
+    """Treeview that only holds the rows on screen.
+
+    A fixed set of Treeview items (one per visible line) is reused as the list
+    scrolls: scrolling rewrites the cells of the items whose row changed
+    instead of inserting or deleting anything. on_need_more is called when the
+    view gets close to the end of the loaded rows and the model has more.
+    """
+
+    PREFETCH_ROWS = 50
+
+    def __init__(
+        self,
+        parent,
+        columns: Sequence[str],
+        show: str = 'headings',
+        height: int = 15,
+        on_need_more: Optional[Callable[[], None]] = None,
+        **tree_options
+    ):
+        super().__init__(parent)
+        self.model = VirtualListModel()
+        self.on_need_more = on_need_more
+        self.offset = 0
+        self.visible = height
+        self.selected_id: Optional[str] = None
+        self._slots: List[str] = []
+        self._shown: List[Optional[Row]] = []
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(self, columns=columns, show=show, height=height, selectmode='browse', **tree_options)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll(3))
+        self.tree.bind('<<TreeviewSelect>>', self._on_select)
+        for key, delta in (('<Up>', -1), ('<Down>', 1), ('<Prior>', None), ('<Next>', None)):
+            self.tree.bind(key, lambda e, key=key, delta=delta: self._on_key(key, delta))
+
+    # Datos
+    def set_rows(self, rows: Sequence[Row], has_more: bool = False, keep_position: bool = True):
+        """Replace the whole list; keep_position=False goes back to the top, e.g. for a new search"""
+        self.model.set_rows(rows, has_more)
+        if not keep_position:
+            self.offset = 0
+        self.render()
+
+    def extend(self, rows: Sequence[Row], has_more: bool = False):
+        self.model.extend(rows, has_more)
+        self.render()
+
+    def update_rows(self, rows: Sequence[Row]):
+        if self.model.update(rows):
+            self.render()
+
+    def __len__(self) -> int:
+        return len(self.model)
+
+    def selected_row(self) -> Optional[Row]:
+        return self.model.get(self.selected_id) if self.selected_id is not None else None
+
+    # Desplazamiento
+    def scroll(self, delta: int):
+        self.scroll_to(self.offset + delta)
+        return 'break'
+
+    def scroll_to(self, offset: int):
+        offset = max(0, min(offset, len(self.model) - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.model)))
+        elif unit == 'pages':
+            self.scroll(int(value) * self.visible)
+        else:
+            self.scroll(int(value))
+
+    def _on_mousewheel(self, event):
+        # Windows reporta múltiplos de 120, macOS pasos de 1
+        steps = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        return self.scroll(-3 * steps)
+
+    def _on_key(self, key, delta):
+        if delta is None:
+            return self.scroll(self.visible if key == '<Next>' else -self.visible)
+        if not len(self.model):
+            return 'break'
+        # Mover la selección y desplazar cuando sale de la ventana
+        ids = [row[0] for row in self.model.window(self.offset, self.visible)]
+        if self.selected_id in ids:
+            index = self.offset + ids.index(self.selected_id) + delta
+        else:
+            index = self.offset if delta > 0 else self.offset + len(ids) - 1
+        index = max(0, min(index, len(self.model) - 1))
+        if index < self.offset:
+            self.scroll_to(index)
+        elif index >= self.offset + self.visible:
+            self.scroll_to(index - self.visible + 1)
+        selected = self.model.window(index, 1)
+        if selected:
+            self.selected_id = selected[0][0]
+            self.render()
+        return 'break'
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        # Lo que queda bajo los encabezados
+        header = rowheight + 5 if 'headings' in str(self.tree.cget('show')) else 0
+        visible = max(1, (event.height - header) // rowheight)
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(self.offset)
+            self.render()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._slots:
+            row = self._shown[self._slots.index(selection[0])]
+            if row is not None:
+                self.selected_id = row[0]
+
+    # Dibujo
+    def render(self):
+        self.offset = max(0, min(self.offset, len(self.model) - self.visible))
+        rows = self.model.window(self.offset, self.visible)
+
+        while len(self._slots) < len(rows):
+            slot = f"slot{len(self._slots)}"
+            self.tree.insert('', 'end', iid=slot)
+            self._slots.append(slot)
+            self._shown.append(None)
+
+        selected_slot = None
+        for index, row in enumerate(rows):
+            slot = self._slots[index]
+            if self._shown[index] != row:
+                self.tree.item(slot, text=row[1], values=row[2], tags=row[3])
+                self._shown[index] = row
+            if row[0] == self.selected_id:
+                selected_slot = slot
+        # Los espacios sin fila quedan fuera del árbol hasta que vuelvan a hacer falta
+        self.tree.set_children('', *self._slots[:len(rows)])
+        self.tree.selection_set((selected_slot,) if selected_slot else ())
+
+        total = len(self.model)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + len(rows)) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        if self.on_need_more and self.model.has_more and self.offset + self.visible >= total - self.PREFETCH_ROWS:
+            self.on_need_more()
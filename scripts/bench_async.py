@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Throughput of the API on the sync engine (thread pool) versus the async engine
+Many concurrent clients alternate barcode lookups (barcode cache off, so every
+lookup reaches the database) and item listing pages. Each mode runs in its own
+process because the engine is chosen at import time.
+
+On SQLite the database round trip is simulated inside the driver's own thread,
+so it blocks a pool thread in sync mode and only an aiosqlite worker in async
+mode, the way network latency to PostgreSQL would.
+
+Usage:
+    python scripts/bench_async.py [--clients 500] [--requests 4] [--rtt-ms 20]
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_async.py --rtt-ms 0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def add_driver_rtt(engine, rtt_ms):
+    """Sleep in the thread that runs each SQLite statement"""
+    from sqlalchemy import event
+    if rtt_ms <= 0 or engine.dialect.name != "sqlite":
+        return
+
+    def delay(statement):
+        time.sleep(rtt_ms / 1000)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        if hasattr(dbapi_connection, "await_"):
+            # aiosqlite adapter: install the callback through the connection's worker thread
+            dbapi_connection.await_(dbapi_connection._connection.set_trace_callback(delay))
+        else:
+            dbapi_connection.set_trace_callback(delay)
+
+
+async def run_clients(app, headers, barcodes, warehouse_id, clients, requests_per_client):
+    import httpx
+    from scripts.bench_utils import percentile
+
+    timings, failures = [], 0
+    transport = httpx.ASGITransport(app=app)
+
+    async def client(seed):
+        nonlocal failures
+        rng = random.Random(seed)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            for i in range(requests_per_client):
+                if i % 2:
+                    url = f"/api/v1/inventory/items/warehouse/{warehouse_id}?per_page=20"
+                else:
+                    url = f"/api/v1/inventory/items/barcode/{rng.choice(barcodes)}"
+                start = time.perf_counter()
+                response = await http.get(url, headers=headers)
+                timings.append((time.perf_counter() - start) * 1000)
+                failures += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(clients)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(timings),
+        "failures": failures,
+        "rps": len(timings) / elapsed,
+        "p50": percentile(timings, 50),
+        "p99": percentile(timings, 99),
+    }
+
+
+def run_mode(mode, clients, requests_per_client, rtt_ms):
+    from scripts.bench_utils import load_app, auth_headers, seed_warehouse
+    app, engine, SessionLocal = load_app(async_database=(mode == "async"))
+    from backend.database.base import async_engine
+    from backend.services.barcode_cache import barcode_cache
+    barcode_cache.ttl = 0
+
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, 500)
+    headers = auth_headers(user)
+    barcodes = [item.barcode for item in items]
+    warehouse_id = warehouse.id
+    db.close()
+
+    add_driver_rtt(engine, rtt_ms)
+    # Connections opened while seeding would otherwise serve requests without the delay
+    engine.dispose()
+    if async_engine is not None:
+        add_driver_rtt(async_engine.sync_engine, rtt_ms)
+
+    async def main():
+        # Same lifecycle as under uvicorn: registry loaded at startup, pools closed at shutdown
+        await app.router.startup()
+        try:
+            return await run_clients(app, headers, barcodes, warehouse_id, clients, requests_per_client)
+        finally:
+            await app.router.shutdown()
+
+    result = asyncio.run(main())
+    result["database"] = engine.url.get_backend_name()
+    print(json.dumps(result))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=500, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=4, help="Requests per client")
+    parser.add_argument("--rtt-ms", type=float, default=20.0, help="Simulated database round trip (SQLite only)")
+    parser.add_argument("--mode", choices=["sync", "async"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.clients, args.requests, args.rtt_ms)
+        return
+
+    print(f"{args.clients} concurrent clients x {args.requests} requests, simulated RTT {args.rtt_ms} ms")
+    print(f"{'engine':<8} {'requests':>9} {'failed':>7} {'req/s':>8} {'p50 ms':>9} {'p99 ms':>9}")
+    for mode in ("sync", "async"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--clients", str(args.clients),
+             "--requests", str(args.requests), "--rtt-ms", str(args.rtt_ms)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<8} {result['requests']:>9} {result['failures']:>7} {result['rps']:>8.0f} "
+              f"{result['p50']:>9.1f} {result['p99']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
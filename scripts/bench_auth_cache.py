@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark a barcode lookup with and without the authenticated user cache
+Reports statements per request and request latency through the full FastAPI stack
+
+Usage:
+    python scripts/bench_auth_cache.py [--requests 2000] [--rtt-ms 1.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from scripts.bench_utils import load_app, auth_headers, seed_warehouse, simulate_rtt, QueryCounter, percentile
+from backend.core.principal import user_cache
+from backend.services.barcode_cache import barcode_cache
+
+
+def run(requests, rtt_ms):
+    app, engine, SessionLocal = load_app()
+    simulate_rtt(engine, rtt_ms)
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, 1)
+    # Tokens carrying the user skip the user cache; measure the ones that still use it
+    headers = auth_headers(user, embed_user=False)
+    url = f"/api/v1/inventory/items/barcode/{items[0].barcode}"
+    db.close()
+
+    client = TestClient(app)
+    print(f"Database: {engine.url.get_backend_name()}  simulated RTT: {rtt_ms} ms")
+    print(f"{'mode':<10} {'stmts/req':>10} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+
+    # Measure the user cache alone; the scan path has its own cache and load test
+    barcode_cache.ttl = 0
+    default_ttl = user_cache.ttl
+    for mode, ttl in (("no cache", 0), ("cache", default_ttl or 60)):
+        user_cache.ttl = ttl
+        user_cache.clear()
+        for _ in range(50):
+            client.get(url, headers=headers)
+
+        timings = []
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for _ in range(requests):
+                request_start = time.perf_counter()
+                response = client.get(url, headers=headers)
+                timings.append((time.perf_counter() - request_start) * 1000)
+                assert response.status_code == 200, response.text
+            elapsed = time.perf_counter() - start
+        print(f"{mode:<10} {counter.statements / requests:>10.2f} {percentile(timings, 50):>8.3f} "
+              f"{percentile(timings, 99):>8.3f} {requests / elapsed:>8.0f}")
+    user_cache.ttl = default_ttl
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulated database round trip time")
+    args = parser.parse_args()
+    run(args.requests, args.rtt_ms)
+
+
+if __name__ == "__main__":
+    main()
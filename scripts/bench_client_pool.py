@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Per-scan latency of the frontend APIClient against a loopback HTTP server
+Compares one-off requests.get calls (a new TCP connection per scan, as the
+client used to do) with the pooled keep-alive session of APIClient. The server
+answers barcode lookups with a fixed item, so only the client and connection
+costs are measured. --rtt-ms adds a simulated network round trip to every
+request, and --handshake-rtts more of them to every new connection
+(1 for TCP, 3 for TCP + TLS 1.2).
+
+Usage:
+    python scripts/bench_client_pool.py [--scans 500] [--rtt-ms 0] [--handshake-rtts 1]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from frontend.api_client import APIClient, TIMEOUTS
+from scripts.bench_utils import percentile
+
+ITEM = {
+    "id": "00000000-0000-0000-0000-000000000001",
+    "name": "Item bench",
+    "description": None,
+    "barcode": "",
+    "stock": 100,
+    "obra": "Obra Bench",
+    "n_factura": "FAC-BENCH",
+    "warehouse_id": "00000000-0000-0000-0000-000000000002",
+    "created_at": "2024-01-01T00:00:00"
+}
+
+
+def make_handler(rtt: float, handshake_rtts: int, connections: list):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in two writes; like uvicorn, don't let Nagle hold the second
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            connections.append(1)
+            time.sleep(rtt * handshake_rtts)
+
+        def do_GET(self):
+            time.sleep(rtt)
+            body = json.dumps(dict(ITEM, barcode=self.path.rsplit("/", 1)[-1])).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def measure(lookup, scans: int):
+    timings = []
+    for i in range(scans):
+        start = time.perf_counter()
+        item = lookup(f"{i:012d}")
+        timings.append((time.perf_counter() - start) * 1000)
+        assert item is not None
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=500, help="Sequential barcode lookups per client")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulated network round trip")
+    parser.add_argument("--handshake-rtts", type=int, default=1, help="Round trips to open a connection")
+    args = parser.parse_args()
+
+    connections = []
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), make_handler(args.rtt_ms / 1000, args.handshake_rtts, connections)
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v1"
+
+    def one_off(barcode):
+        # What every APIClient call did before: module-level requests, no shared session
+        response = requests.get(f"{base_url}/inventory/items/barcode/{barcode}", timeout=TIMEOUTS["scan"])
+        return response.json() if response.status_code == 200 else None
+
+    client = APIClient(base_url)
+    print(f"{args.scans} scans, simulated RTT {args.rtt_ms} ms, {args.handshake_rtts} RTT per new connection")
+    print(f"{'client':<16} {'connections':>11} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'scans/s':>8}")
+    for label, lookup in (("requests.get", one_off), ("APIClient", client.get_item_by_barcode)):
+        connections.clear()
+        start = time.perf_counter()
+        timings = measure(lookup, args.scans)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<16} {len(connections):>11} {percentile(timings, 50):>8.2f} {percentile(timings, 95):>8.2f} "
+              f"{percentile(timings, 99):>8.2f} {args.scans / elapsed:>8.0f}")
+
+    client.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Throughput of the bulk item import versus creating items one request at a time
+The same CSV is posted twice to /inventory/items/import: the first pass creates
+every item, the second adds stock to all of them. A sample of rows is then
+created through POST /inventory/items, the way a client loop would.
+
+Usage:
+    python scripts/bench_import.py [--rows 20000] [--chunk-size 1000] [--rtt-ms 0]
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_import.py
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_utils import load_app, auth_headers, seed_warehouse, simulate_rtt, QueryCounter
+
+
+def build_csv(rows: int, prefix: str) -> bytes:
+    lines = ["name,description,barcode,stock,obra,n_factura"]
+    lines.extend(
+        f"Importado {i:07d},Carga masiva,{prefix}{i:010d},{i % 50 + 1},Obra Import,FAC-IMP"
+        for i in range(rows)
+    )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="Rows in the generated CSV")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows per import transaction")
+    parser.add_argument("--single", type=int, default=500, help="Items created one request at a time")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulated database round trip")
+    args = parser.parse_args()
+
+    app, engine, SessionLocal = load_app()
+    from fastapi.testclient import TestClient
+
+    db = SessionLocal()
+    user, warehouse, _ = seed_warehouse(db, 0)
+    headers = auth_headers(user)
+    warehouse_id = str(warehouse.id)
+    db.close()
+    simulate_rtt(engine, args.rtt_ms)
+
+    payload = build_csv(args.rows, uuid.uuid4().hex[:8])
+    url = f"/api/v1/inventory/items/import?warehouse_id={warehouse_id}&chunk_size={args.chunk_size}"
+    print(f"{args.rows} rows, chunk size {args.chunk_size}, simulated RTT {args.rtt_ms} ms "
+          f"({engine.url.get_backend_name()})")
+    print(f"{'pass':<14} {'rows':>7} {'failed':>7} {'seconds':>8} {'rows/s':>9} {'statements':>11}")
+
+    with TestClient(app) as client:
+        for label in ("import create", "import update"):
+            with QueryCounter(engine) as counter:
+                start = time.perf_counter()
+                response = client.post(url, files={"file": ("items.csv", payload)}, headers=headers)
+                elapsed = time.perf_counter() - start
+            response.raise_for_status()
+            report = response.json()
+            print(f"{label:<14} {report['total_rows']:>7} {report['failed']:>7} {elapsed:>8.2f} "
+                  f"{report['total_rows'] / elapsed:>9.0f} {counter.statements:>11}")
+
+        prefix = uuid.uuid4().hex[:8]
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for i in range(args.single):
+                response = client.post("/api/v1/inventory/items", json={
+                    "name": f"Unitario {i:07d}",
+                    "barcode": f"{prefix}{i:010d}",
+                    "stock": 1,
+                    "obra": "Obra Import",
+                    "n_factura": "FAC-IMP",
+                    "warehouse_id": warehouse_id
+                }, headers=headers)
+                response.raise_for_status()
+            elapsed = time.perf_counter() - start
+        print(f"{'one by one':<14} {args.single:>7} {0:>7} {elapsed:>8.2f} "
+              f"{args.single / elapsed:>9.0f} {counter.statements:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Latency of regular endpoints while many operators log in at once
+A burst of concurrent logins (shift start) runs next to clients doing barcode
+lookups and item listings (barcode cache off, so they reach the database).
+The probe latency is measured idle and during the burst, with passwords
+checked in the request thread pool (password_hash_workers=0, like the old
+sync login) and in the password process pool.
+
+Usage:
+    python scripts/bench_login_storm.py [--logins 60] [--probes 8] [--workers 2] [--rounds 12]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def probe(http, headers, barcodes, warehouse_id, timings, stop, seed):
+    rng = random.Random(seed)
+    i = 0
+    while not stop.is_set():
+        if i % 2:
+            url = f"/api/v1/inventory/items/warehouse/{warehouse_id}?per_page=20"
+        else:
+            url = f"/api/v1/inventory/items/barcode/{rng.choice(barcodes)}"
+        start = time.perf_counter()
+        response = await http.get(url, headers=headers)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+        i += 1
+
+
+async def run_phase(app, headers, barcodes, warehouse_id, probes, logins, usernames):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    timings, login_statuses = [], []
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+        probers = [
+            asyncio.create_task(probe(http, headers, barcodes, warehouse_id, timings, stop, seed))
+            for seed in range(probes)
+        ]
+        start = time.perf_counter()
+        if logins:
+            responses = await asyncio.gather(*(
+                http.post("/api/v1/auth/login", json={"username": username, "password": "admin123"})
+                for username in usernames[:logins]
+            ))
+            login_statuses = [response.status_code for response in responses]
+        else:
+            await asyncio.sleep(2)
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await asyncio.gather(*probers)
+    return timings, login_statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=60, help="Concurrent logins in the burst")
+    parser.add_argument("--probes", type=int, default=8, help="Clients calling other endpoints meanwhile")
+    parser.add_argument("--workers", type=int, default=2, help="Password processes of the pooled mode")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost of the stored hashes")
+    parser.add_argument("--items", type=int, default=500)
+    args = parser.parse_args()
+
+    from backend.config import settings
+    settings.bcrypt_rounds = args.rounds
+    settings.password_hash_max_pending = max(settings.password_hash_max_pending, args.logins)
+    from scripts.bench_utils import load_app, auth_headers, seed_warehouse, percentile
+    app, engine, SessionLocal = load_app()
+    from backend.api.v1.endpoints import auth
+    from backend.core.security import get_password_hash, password_verifier
+    from backend.models import User
+    from backend.services.barcode_cache import barcode_cache
+
+    # Every login of the burst comes from the same address
+    auth.limiter.enabled = False
+    barcode_cache.ttl = 0
+    password_verifier.max_pending = settings.password_hash_max_pending
+
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, args.items)
+    hashed = get_password_hash("admin123")
+    operators = [
+        User(username=f"operador_{i:03d}", hashed_password=hashed, full_name=f"Operador {i}")
+        for i in range(args.logins)
+    ]
+    db.add_all(operators)
+    db.commit()
+    headers = auth_headers(user)
+    barcodes = [item.barcode for item in items]
+    usernames = [operator.username for operator in operators]
+    warehouse_id = str(warehouse.id)
+    db.close()
+
+    print(f"{args.logins} logins, {args.probes} probe clients, bcrypt cost {args.rounds}, {os.cpu_count()} CPUs")
+    print(f"{'mode':<22} {'phase':<7} {'probe p50':>10} {'p99':>8} {'max':>8} {'probes':>7} {'logins/s':>9}")
+    for mode, workers in (("thread pool", 0), (f"process pool ({args.workers})", args.workers)):
+        password_verifier.shutdown()
+        password_verifier.workers = workers
+        # Start the worker processes outside the measured burst
+        asyncio.run(password_verifier.verify_and_update("admin123", hashed))
+        for phase, logins in (("idle", 0), ("burst", args.logins)):
+            timings, statuses, elapsed = asyncio.run(
+                run_phase(app, headers, barcodes, warehouse_id, args.probes, logins, usernames)
+            )
+            assert all(status == 200 for status in statuses), statuses
+            rate = f"{len(statuses) / elapsed:>9.1f}" if statuses else f"{'-':>9}"
+            print(f"{mode:<22} {phase:<7} {percentile(timings, 50):>10.1f} {percentile(timings, 99):>8.1f} "
+                  f"{max(timings):>8.1f} {len(timings):>7} {rate}")
+    password_verifier.shutdown()
+
+
+if __name__ == "__main__":
+    main()
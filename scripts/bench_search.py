@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark InventoryService.search_items against the previous three-ILIKE search
+Loads synthetic catalogs of each size and times the first page of several queries
+
+Usage:
+    python scripts/bench_search.py [--sizes 10000 100000 1000000] [--repeat 5]
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_search.py
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from scripts.bench_utils import make_engine, make_session_factory, seed_warehouse, percentile
+from backend.core.text_search import build_search_key
+from backend.models import Item
+from backend.services.inventory_service import InventoryService
+
+WORDS = [
+    "Martillo", "Tornillo", "Cañería", "Válvula", "Destornillador", "Taladro", "Llave", "Alicate",
+    "Cemento", "Pintura", "Tubería", "Codo", "Niple", "Cable", "Interruptor", "Enchufe", "Brocha",
+    "Lija", "Clavo", "Tuerca", "Arandela", "Sierra", "Nivel", "Huincha", "Guante", "Casco"
+]
+QUERIES = ["valvula", "tornillo 3", "7801", "CAÑERIA", "xyz-no-match"]
+
+
+def legacy_search(db, query, per_page=50):
+    """Search as it was before: three ILIKE predicates, OFFSET/LIMIT"""
+    return db.query(Item).filter(
+        (Item.name.ilike(f"%{query}%")) |
+        (Item.n_factura.ilike(f"%{query}%")) |
+        (Item.barcode.ilike(f"%{query}%"))
+    ).offset(0).limit(per_page).all()
+
+
+def load_items(engine, warehouse_id, start, count, batch=10000):
+    rng = random.Random(start)
+    table = Item.__table__
+    with engine.begin() as conn:
+        for offset in range(start, start + count, batch):
+            rows = []
+            for i in range(offset, min(offset + batch, start + count)):
+                name = f"{rng.choice(WORDS)} {rng.choice(WORDS).lower()} {rng.randint(1, 50)}mm"
+                barcode = f"78{i:011d}"
+                n_factura = f"FAC-{rng.randint(1, 5000):05d}"
+                rows.append({
+                    "id": uuid.uuid4(),
+                    "name": name,
+                    "barcode": barcode,
+                    "stock": rng.randint(0, 500),
+                    "obra": "Obra Bench",
+                    "n_factura": n_factura,
+                    "search_key": build_search_key(name, n_factura, barcode),
+                    "warehouse_id": warehouse_id
+                })
+            conn.execute(insert(table), rows)
+
+
+def time_query(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return percentile(timings, 50), len(result)
+
+
+def run(sizes, repeat):
+    engine = make_engine()
+    SessionLocal = make_session_factory(engine)
+    db = SessionLocal()
+    user, warehouse, _ = seed_warehouse(db, 0)
+    warehouse_id = warehouse.id
+    db.close()
+
+    print(f"Database: {engine.url.get_backend_name()}")
+    print(f"{'items':>9} {'query':<14} {'legacy ms':>10} {'rows':>5} {'ranked ms':>10} {'rows':>5}")
+    loaded = 0
+    for size in sorted(sizes):
+        load_items(engine, warehouse_id, loaded, size - loaded)
+        loaded = size
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.exec_driver_sql("ANALYZE items")
+
+        db = SessionLocal()
+        service = InventoryService(db)
+        for query in QUERIES:
+            legacy_ms, legacy_rows = time_query(lambda: legacy_search(db, query), repeat)
+            ranked_ms, ranked_rows = time_query(lambda: service.search_items(query, warehouse_id)[0], repeat)
+            print(f"{size:>9} {query:<14} {legacy_ms:>10.2f} {legacy_rows:>5} {ranked_ms:>10.2f} {ranked_rows:>5}")
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
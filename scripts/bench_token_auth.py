@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Authentication overhead per request
+Compares resolving the caller of a request the old way (python-jose decode of
+every token, then the user from the user cache or the database) with the
+verified-token cache and the user carried in the token's claims. Reports the
+cost of the authentication step alone and of a full GET /warehouses/ through
+the FastAPI stack.
+
+Usage:
+    python scripts/bench_token_auth.py [--calls 20000] [--requests 2000] [--rtt-ms 0.0]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def time_calls(fn, calls):
+    for _ in range(min(calls, 200)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000, help="Calls of the authentication step alone")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests through the full stack")
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="Simulated database round trip time")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from jose import jwt
+    from scripts.bench_utils import load_app, auth_headers, seed_warehouse, simulate_rtt, QueryCounter, percentile
+    app, engine, SessionLocal = load_app()
+    simulate_rtt(engine, args.rtt_ms)
+    from backend.api.v1.dependencies import _load_user
+    from backend.config import settings
+    from backend.core.principal import UserSnapshot, user_cache
+    from backend.core.revocation import revocation_list
+    from backend.core.security import decode_token, token_cache
+
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, 1)
+    legacy_headers = auth_headers(user, embed_user=False)
+    claims_headers = auth_headers(user)
+    db.close()
+    legacy_token = legacy_headers["Authorization"].split()[1]
+    claims_token = claims_headers["Authorization"].split()[1]
+
+    def jose_decode(token):
+        return jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+    def jose_and_database():
+        username = jose_decode(legacy_token)["sub"]
+        session = SessionLocal()
+        try:
+            return _load_user(session, username)
+        finally:
+            session.close()
+
+    def jose_and_user_cache():
+        username = jose_decode(legacy_token)["sub"]
+        cached = user_cache.get(username)
+        if cached is None:
+            cached = jose_and_database()
+            user_cache.set(username, cached)
+        return cached
+
+    def cached_claims():
+        claims = decode_token(claims_token)
+        if revocation_list.is_revoked(claims):
+            raise RuntimeError("revoked")
+        return UserSnapshot.from_claims(claims)
+
+    session = SessionLocal()
+    revocation_list.load(session)
+    session.close()
+
+    print(f"Database: {engine.url.get_backend_name()}  simulated RTT: {args.rtt_ms} ms")
+    print(f"{'authentication step':<34} {'us/call':>9}")
+    steps = (
+        ("jose decode only", lambda: jose_decode(legacy_token)),
+        ("jose decode + database", jose_and_database),
+        ("jose decode + user cache", jose_and_user_cache),
+        ("cached token + claims", cached_claims),
+    )
+    for name, fn in steps:
+        calls = args.calls if "database" not in name else max(args.calls // 10, 1)
+        print(f"{name:<34} {time_calls(fn, calls):>9.2f}")
+
+    print()
+    print(f"{'GET /warehouses/':<34} {'stmts/req':>9} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    client = TestClient(app)
+    modes = (
+        ("subject-only token, no caches", legacy_headers, 0),
+        ("subject-only token, user cache", legacy_headers, None),
+        ("token with claims", claims_headers, None),
+    )
+    default_user_ttl, default_token_ttl = user_cache.ttl, token_cache.ttl
+    for name, headers, ttl in modes:
+        user_cache.ttl = default_user_ttl if ttl is None else ttl
+        token_cache.ttl = default_token_ttl if ttl is None else ttl
+        user_cache.clear()
+        token_cache.clear()
+        for _ in range(50):
+            client.get("/api/v1/warehouses/", headers=headers)
+        timings = []
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                request_start = time.perf_counter()
+                response = client.get("/api/v1/warehouses/", headers=headers)
+                timings.append((time.perf_counter() - request_start) * 1000)
+                assert response.status_code == 200, response.text
+            elapsed = time.perf_counter() - start
+        print(f"{name:<34} {counter.statements / args.requests:>9.2f} {percentile(timings, 50):>8.3f} "
+              f"{percentile(timings, 99):>8.3f} {args.requests / elapsed:>8.0f}")
+    user_cache.ttl, token_cache.ttl = default_user_ttl, default_token_ttl
+
+
+if __name__ == "__main__":
+    main()
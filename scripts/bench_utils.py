@@ -0,0 +1,142 @@
+"""
+Shared helpers for the benchmark and stress scripts
+Builds a throwaway database (SQLite by default, or BENCH_DATABASE_URL) and counts round trips
+"""
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+from backend.models import Base, User, Warehouse, Item
+from backend.models.withdrawal import WithdrawalItem  # noqa: F401 - registers the mapper
+
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    # Models use the PostgreSQL UUID type; store it as hex text on the SQLite stand-in
+    return "CHAR(32)"
+
+
+def make_engine(url: str = None):
+    """Create an engine with a fresh schema"""
+    url = url or os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(prefix="inventory-bench-"), "bench.db")
+        url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+def load_app(url: str = None, async_database: bool = False):
+    """Import the FastAPI app bound to a throwaway database; returns (app, engine, SessionLocal)
+
+    The engine setup is fixed at import, so async_database can only be chosen once per process.
+    """
+    url = url or os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        path = os.path.join(tempfile.mkdtemp(prefix="inventory-bench-"), "bench.db")
+        url = f"sqlite:///{path}"
+    from backend.config import settings
+    settings.database_url = url
+    settings.async_database = async_database
+    from backend.main import app
+    from backend.database.base import engine, SessionLocal
+    Base.metadata.create_all(bind=engine)
+    return app, engine, SessionLocal
+
+
+def auth_headers(user, embed_user: bool = True) -> dict:
+    """Bearer token like the ones login issues; embed_user=False gives the older subject-only token"""
+    from backend.core.security import create_access_token
+    claims = {"sub": user.username}
+    if embed_user:
+        claims.update(uid=str(user.id), name=user.full_name, adm=bool(user.is_admin))
+    return {"Authorization": f"Bearer {create_access_token(data=claims)}"}
+
+
+def make_session_factory(engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def simulate_rtt(engine, rtt_ms: float):
+    """Sleep before every statement to emulate a database across the network"""
+    if rtt_ms <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _delay(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(rtt_ms / 1000)
+
+
+class QueryCounter:
+    """Count statements (round trips) and commits issued on an engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = 0
+        self.commits = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements += 1
+
+    def _on_commit(self, conn):
+        self.commits += 1
+
+    def __enter__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.engine, "commit", self._on_commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.engine, "commit", self._on_commit)
+
+
+def seed_warehouse(session, n_items: int, stock: int = 1000, name: str = "BODEGA BENCH"):
+    """Create a user, a warehouse and n_items items; returns (user, warehouse, items)"""
+    suffix = uuid.uuid4().hex[:8]
+    user = User(
+        username=f"bench_{suffix}",
+        hashed_password="not-a-real-hash",
+        full_name="Bench User",
+        is_active=True,
+        is_admin=True
+    )
+    warehouse = Warehouse(name=f"{name} {suffix}", code=f"B{suffix}", location="Bench")
+    session.add_all([user, warehouse])
+    session.flush()
+
+    items = [
+        Item(
+            name=f"Item {i:07d}",
+            description="Bench item",
+            barcode=f"{suffix}{i:010d}",
+            stock=stock,
+            obra="Obra Bench",
+            n_factura="FAC-BENCH",
+            warehouse_id=warehouse.id
+        )
+        for i in range(n_items)
+    ]
+    session.add_all(items)
+    session.commit()
+    return user, warehouse, items
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Cost of showing a large history listing in the frontend
+Formats synthetic history records the way HistoryPage used to (fromisoformat,
+strftime and a translation table built per row) and with history_row, then
+measures the VirtualListModel operations the lists run while the user scrolls:
+loading the rows, taking the visible window at many scroll positions and
+appending a page. When a display is available the Treeview itself is timed
+too: inserting every row into a plain ttk.Treeview against a VirtualTreeview
+that keeps only the visible rows as items.
+
+Usage:
+    python scripts/bench_virtual_list.py [--rows 100000] [--visible 20] [--page 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frontend.app import history_row
+from frontend.virtual_list import VirtualListModel
+
+
+def build_history(rows: int):
+    start = datetime(2024, 1, 1, 8, 0)
+    actions = ("withdrawal", "addition", "adjustment")
+    return [
+        {
+            "id": str(uuid.UUID(int=i + 1)),
+            "action_type": actions[i % 3],
+            "item_name": f"Item {i % 5000:05d}",
+            "quantity": i % 40 + 1,
+            "obra": f"Obra {i % 30}",
+            "n_factura": "FAC-BENCH",
+            "warehouse_name": "Bodega Bench",
+            "user_name": f"usuario{i % 12}",
+            "notes": None,
+            "action_date": (start + timedelta(minutes=7 * i)).isoformat(),
+        }
+        for i in range(rows)
+    ]
+
+
+def old_history_row(record):
+    # Lo que hacía show_history por cada fila
+    try:
+        if isinstance(record['action_date'], str):
+            date_obj = datetime.fromisoformat(record['action_date'].replace('Z', '+00:00'))
+            formatted_date = date_obj.strftime('%d/%m/%Y %H:%M')
+        else:
+            formatted_date = str(record['action_date'])
+    except Exception:
+        formatted_date = str(record['action_date'])
+    action_translations = {
+        'withdrawal': 'Retiro',
+        'addition': 'Adición',
+        'adjustment': 'Ajuste'
+    }
+    action_text = action_translations.get(record['action_type'], record['action_type'])
+    tags = []
+    if record['action_type'] == 'withdrawal':
+        tags.append('withdrawal')
+    elif record['action_type'] == 'addition':
+        tags.append('addition')
+    return (formatted_date, action_text, record['item_name'], record['quantity'],
+            record['obra'], record['user_name']), tags
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def bench_tk(rows, visible: int):
+    import tkinter as tk
+    from tkinter import ttk
+    from frontend.virtual_list import VirtualTreeview
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"\nTreeview timings skipped, no display available ({e})")
+        return
+    root.withdraw()
+    columns = ('fecha', 'accion', 'item', 'cantidad', 'obra', 'usuario')
+
+    print(f"\n{'treeview':<34} {'ms':>10}")
+    tree = ttk.Treeview(root, columns=columns, show='headings', height=visible)
+
+    def insert_all():
+        for row in rows:
+            tree.insert('', 'end', values=row[2], tags=row[3])
+        root.update_idletasks()
+
+    elapsed, _ = timed(insert_all)
+    print(f"{'plain insert, all rows':<34} {elapsed:>10.1f}")
+    elapsed, _ = timed(lambda: tree.delete(*tree.get_children()))
+    print(f"{'plain delete, all rows':<34} {elapsed:>10.1f}")
+    tree.destroy()
+
+    view = VirtualTreeview(root, columns=columns, show='headings', height=visible)
+    elapsed, _ = timed(lambda: (view.set_rows(rows), root.update_idletasks()))
+    print(f"{'virtual set_rows, all rows':<34} {elapsed:>10.1f}")
+    positions = random.Random(1).sample(range(len(rows) - visible), 1000)
+
+    def scroll():
+        for offset in positions:
+            view.scroll_to(offset)
+        root.update_idletasks()
+
+    elapsed, _ = timed(scroll)
+    print(f"{'virtual scroll, per position':<34} {elapsed / len(positions):>10.3f}")
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="Synthetic history records")
+    parser.add_argument("--visible", type=int, default=20, help="Rows on screen")
+    parser.add_argument("--page", type=int, default=200, help="Rows per page appended while scrolling")
+    args = parser.parse_args()
+
+    history = build_history(args.rows)
+    print(f"{args.rows} rows, {args.visible} visible, pages of {args.page}")
+    print(f"{'formatting':<34} {'ms':>10}")
+    elapsed, _ = timed(lambda: [old_history_row(record) for record in history])
+    print(f"{'per-row fromisoformat + strftime':<34} {elapsed:>10.1f}")
+    elapsed, rows = timed(lambda: [history_row(record) for record in history])
+    print(f"{'history_row':<34} {elapsed:>10.1f}")
+
+    print(f"\n{'model':<34} {'ms':>10}")
+    model = VirtualListModel()
+    elapsed, _ = timed(lambda: model.set_rows(rows[:-args.page], has_more=True))
+    print(f"{'set_rows':<34} {elapsed:>10.1f}")
+    elapsed, _ = timed(lambda: model.extend(rows[-args.page:]))
+    print(f"{'extend, one page':<34} {elapsed:>10.3f}")
+    positions = random.Random(1).sample(range(args.rows - args.visible), 1000)
+    elapsed, _ = timed(lambda: [model.window(offset, args.visible) for offset in positions])
+    print(f"{'window, per scroll position':<34} {elapsed / len(positions):>10.4f}")
+    changed = [(row[0], row[1], row[2][:3] + (row[2][3] + 1,) + row[2][4:], row[3]) for row in rows[:args.page]]
+    elapsed, _ = timed(lambda: model.update(changed))
+    print(f"{'update by id, one page':<34} {elapsed:>10.3f}")
+
+    bench_tk(rows, args.visible)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark WithdrawalService.create_withdrawal
+Reports round trips, commits and latency against withdrawal size
+
+Usage:
+    python scripts/bench_withdrawal.py [--sizes 1 10 40 100] [--repeat 20]
+    BENCH_DATABASE_URL=postgresql://... python scripts/bench_withdrawal.py
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.bench_utils import make_engine, make_session_factory, QueryCounter, seed_warehouse, percentile
+from backend.core.principal import UserSnapshot
+from backend.schemas.withdrawal import WithdrawalCreate, WithdrawalItemCreate
+from backend.services.withdrawal_service import WithdrawalService
+
+
+def run(sizes, repeat):
+    engine = make_engine()
+    SessionLocal = make_session_factory(engine)
+
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, max(sizes), stock=10 ** 9)
+    user, warehouse_id = UserSnapshot.from_model(user), warehouse.id
+    item_ids = [item.id for item in items]
+    db.close()
+
+    print(f"Database: {engine.url.get_backend_name()}")
+    print(f"{'lines':>6} {'stmts':>6} {'commits':>8} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for size in sizes:
+        withdrawal = WithdrawalCreate(
+            obra="Obra Bench",
+            notes="bench",
+            warehouse_id=warehouse_id,
+            items=[WithdrawalItemCreate(item_id=item_id, quantity=1) for item_id in item_ids[:size]]
+        )
+        timings = []
+        for _ in range(repeat):
+            db = SessionLocal()
+            try:
+                with QueryCounter(engine) as counter:
+                    start = time.perf_counter()
+                    WithdrawalService(db).create_withdrawal(withdrawal, user)
+                    timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                db.close()
+        print(f"{size:>6} {counter.statements:>6} {counter.commits:>8} "
+              f"{percentile(timings, 50):>8.2f} {percentile(timings, 99):>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10, 20, 40, 100])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
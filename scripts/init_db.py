@@ -8,16 +8,17 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import create_engine
-from backend.models import Base, User, Warehouse
+from alembic import command
+from alembic.config import Config
+from backend.models import User, Warehouse
 from backend.core.security import get_password_hash
 from backend.database.base import SessionLocal
-from backend.config import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 def create_tables():
-    """Create all database tables"""
-    engine = create_engine(settings.database_url)
-    Base.metadata.create_all(bind=engine)
+    """Create all database tables by applying the Alembic migrations"""
+    command.upgrade(Config(os.path.join(ROOT, "alembic.ini")), "head")
     print("✅ Database tables created successfully")
 
 def create_initial_data():
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Load test for the barcode scan path (GET /inventory/items/barcode/{barcode})
+Several terminals scan at a fixed rate; popular items are scanned far more often
+than the rest and a share of scans is followed by a withdrawal, which evicts the
+item from the barcode cache. Reports latency percentiles with the cache off and on.
+
+Usage:
+    python scripts/loadtest_scan.py [--terminals 8] [--rate 5] [--duration 10]
+                                    [--items 2000] [--withdraw-ratio 0.1] [--rtt-ms 1.0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from scripts.bench_utils import load_app, auth_headers, seed_warehouse, simulate_rtt, percentile
+from backend.services.barcode_cache import barcode_cache
+
+
+def run_terminal(app, headers, barcodes, items_by_barcode, warehouse_id, rate, duration, withdraw_ratio, seed, results):
+    rng = random.Random(seed)
+    # Keep one event loop portal per terminal instead of starting one per request
+    with TestClient(app) as client:
+        results.append(scan_loop(client, rng, headers, barcodes, items_by_barcode, warehouse_id,
+                                 rate, duration, withdraw_ratio))
+
+
+def scan_loop(client, rng, headers, barcodes, items_by_barcode, warehouse_id, rate, duration, withdraw_ratio):
+    interval = 1.0 / rate
+    timings, withdrawals, errors = [], 0, 0
+    next_scan = time.perf_counter()
+    deadline = next_scan + duration
+    while next_scan < deadline:
+        delay = next_scan - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        # Pareto popularity: a handful of barcodes account for most scans
+        barcode = barcodes[min(len(barcodes) - 1, int(rng.paretovariate(1.2)) - 1)]
+        start = time.perf_counter()
+        response = client.get(f"/api/v1/inventory/items/barcode/{barcode}", headers=headers)
+        # Latency is measured from the scheduled time so queueing shows up in the tail
+        timings.append((time.perf_counter() - min(start, next_scan)) * 1000)
+        if response.status_code != 200:
+            errors += 1
+        elif rng.random() < withdraw_ratio:
+            response = client.post("/api/v1/withdrawals/", headers=headers, json={
+                "obra": "Obra Load",
+                "warehouse_id": str(warehouse_id),
+                "items": [{"item_id": str(items_by_barcode[barcode]), "quantity": 1}]
+            })
+            withdrawals += 1
+            errors += response.status_code != 200
+        next_scan += interval
+    return timings, withdrawals, errors
+
+
+def run(terminals, rate, duration, n_items, withdraw_ratio, rtt_ms):
+    app, engine, SessionLocal = load_app()
+    if engine.dialect.name == "sqlite":
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            dbapi_connection.execute("PRAGMA journal_mode=WAL")
+            dbapi_connection.execute("PRAGMA busy_timeout=30000")
+    simulate_rtt(engine, rtt_ms)
+
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, n_items, stock=1_000_000)
+    headers = auth_headers(user)
+    warehouse_id = warehouse.id
+    items_by_barcode = {item.barcode: item.id for item in items}
+    barcodes = list(items_by_barcode)
+    db.close()
+
+    print(f"Database: {engine.url.get_backend_name()}  simulated RTT: {rtt_ms} ms")
+    print(f"{terminals} terminals x {rate} scans/s for {duration}s, {n_items} items, "
+          f"{withdraw_ratio:.0%} of scans followed by a withdrawal")
+    print(f"{'mode':<10} {'scans':>7} {'scans/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hit ratio':>10} {'errors':>7}")
+
+    default_ttl = barcode_cache.ttl
+    for mode, ttl in (("no cache", 0), ("cache", default_ttl or 30)):
+        barcode_cache.ttl = ttl
+        barcode_cache.clear()
+        barcode_cache.reset_stats()
+
+        results = []
+        threads = [
+            threading.Thread(target=run_terminal, args=(
+                app, headers, barcodes, items_by_barcode, warehouse_id,
+                rate, duration, withdraw_ratio, seed, results
+            ))
+            for seed in range(terminals)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        timings = [t for result in results for t in result[0]]
+        errors = sum(result[2] for result in results)
+        hit_ratio = barcode_cache.stats()["hit_ratio"]
+        print(f"{mode:<10} {len(timings):>7} {len(timings) / elapsed:>8.1f} {percentile(timings, 50):>8.2f} "
+              f"{percentile(timings, 95):>8.2f} {percentile(timings, 99):>8.2f} {hit_ratio:>10.2%} {errors:>7}")
+    barcode_cache.ttl = default_ttl
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--terminals", type=int, default=8, help="Concurrent scanning terminals")
+    parser.add_argument("--rate", type=float, default=5.0, help="Scans per second per terminal")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per mode")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--withdraw-ratio", type=float, default=0.1)
+    parser.add_argument("--rtt-ms", type=float, default=1.0, help="Simulated database round trip time")
+    args = parser.parse_args()
+    run(args.terminals, args.rate, args.duration, args.items, args.withdraw_ratio, args.rtt_ms)
+
+
+if __name__ == "__main__":
+    main()
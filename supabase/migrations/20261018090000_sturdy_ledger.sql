@@ -0,0 +1,16 @@
+/*
+  # Guard item stock against overselling
+
+  1. Constraints
+    - `items.stock` can never go below zero (`ck_items_stock_non_negative`)
+    - Existing negative rows are clamped to zero before the constraint is added
+
+  2. Notes
+    - Stock is mutated with guarded `UPDATE ... SET stock = stock - q WHERE stock >= q`
+      statements from the backend; the constraint is the last line of defense
+*/
+
+UPDATE items SET stock = 0 WHERE stock < 0;
+
+ALTER TABLE items DROP CONSTRAINT IF EXISTS ck_items_stock_non_negative;
+ALTER TABLE items ADD CONSTRAINT ck_items_stock_non_negative CHECK (stock >= 0);
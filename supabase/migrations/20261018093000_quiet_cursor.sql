@@ -0,0 +1,17 @@
+/*
+  # Keyset pagination indexes for items
+
+  1. Indexes
+    - `idx_items_warehouse_name` on (warehouse_id, name, id) serves
+      `/inventory/items/warehouse/{id}` ordered by (name, id)
+    - `idx_items_warehouse_obra_name` on (warehouse_id, obra, name, id) serves
+      `/inventory/items/obra/{obra}/warehouse/{id}` and replaces `idx_warehouse_obra`
+
+  2. Notes
+    - Listing endpoints page with an opaque cursor over (name, id) instead of OFFSET
+*/
+
+CREATE INDEX IF NOT EXISTS idx_items_warehouse_name ON items(warehouse_id, name, id);
+CREATE INDEX IF NOT EXISTS idx_items_warehouse_obra_name ON items(warehouse_id, obra, name, id);
+
+DROP INDEX IF EXISTS idx_warehouse_obra;
@@ -0,0 +1,15 @@
+/*
+  # Composite indexes for paginated history
+
+  1. Indexes
+    - `idx_history_warehouse_date` on (warehouse_id, action_date DESC, id DESC)
+    - `idx_history_item_date` on (item_id, action_date DESC, id DESC)
+
+  2. Notes
+    - History endpoints page newest first with a cursor over (action_date, id)
+      and accept `from` / `to` / `action_type` filters; these indexes serve
+      both the pages and the NDJSON streaming endpoints
+*/
+
+CREATE INDEX IF NOT EXISTS idx_history_warehouse_date ON history(warehouse_id, action_date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_history_item_date ON history(item_id, action_date DESC, id DESC);
@@ -0,0 +1,27 @@
+/*
+  # Trigram search over items
+
+  1. Extensions
+    - `pg_trgm` for substring (`LIKE '%q%'`) searches served by a GIN index
+    - `unaccent` to backfill the normalized search column
+
+  2. Changes
+    - New column `items.search_key`: name, n_factura and barcode, lowercase and
+      without accents; the backend keeps it current on every insert/update
+
+  3. Indexes
+    - `idx_items_search_key_trgm` GIN (search_key gin_trgm_ops)
+    - `idx_items_barcode_prefix` (barcode varchar_pattern_ops) for barcode prefix matches
+*/
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+ALTER TABLE items ADD COLUMN IF NOT EXISTS search_key text;
+
+UPDATE items
+SET search_key = lower(unaccent(name)) || ' ' || lower(unaccent(n_factura)) || ' ' || lower(unaccent(barcode))
+WHERE search_key IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_items_search_key_trgm ON items USING gin (search_key gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_items_barcode_prefix ON items (barcode varchar_pattern_ops);
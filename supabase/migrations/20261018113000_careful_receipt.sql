@@ -0,0 +1,34 @@
+/*
+  # Idempotency keys for withdrawals and stock additions
+
+  1. Changes
+    - New table `idempotency_keys`: the `Idempotency-Key` header of a
+      `POST /withdrawals/` or `POST /inventory/items/{id}/add_stock`, per user,
+      with a hash of the request and the response it produced
+
+  2. Indexes
+    - Primary key on (user_id, key)
+    - `idx_idempotency_keys_created_at` on (created_at), for the purge
+
+  3. Notes
+    - The key is inserted in the transaction of the write, so a retry that
+      arrives while the first attempt is running waits for it and then gets
+      its response; nothing is withdrawn twice
+    - Keys older than IDEMPOTENCY_KEY_TTL_HOURS (24 by default) are deleted by
+      the API
+    - Row level security is enabled without policies: stored responses are
+      only read by the API, never through the REST endpoints
+*/
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id uuid NOT NULL,
+    key varchar(255) NOT NULL,
+    fingerprint varchar(64) NOT NULL,
+    response text,
+    created_at timestamp NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at ON idempotency_keys(created_at);
+
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,37 @@
+/*
+  # Revoked access tokens
+
+  1. Changes
+    - New table `token_revocations`: access tokens the API rejects before they
+      expire. A row with `jti` revokes one token (`POST /auth/logout`); a row
+      with `issued_before` revokes every token of `username` issued until then
+      (`POST /auth/users/{username}/logout`, or a change to the user's name,
+      role, password or active flag)
+
+  2. Indexes
+    - `idx_token_revocations_expires_at` on (expires_at), for loading the
+      unexpired rows and purging the rest
+
+  3. Notes
+    - Tokens now carry the user's id, name and role, so authenticated requests
+      no longer read `users`; each API process keeps the unexpired revocations
+      in memory and reloads them every TOKEN_REVOCATION_REFRESH_SECONDS (5 by
+      default)
+    - Rows past `expires_at` are deleted by the API
+    - Row level security is enabled without policies: only the API reads the
+      table
+*/
+
+CREATE TABLE IF NOT EXISTS token_revocations (
+  id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+  jti varchar(32),
+  username varchar(50),
+  issued_before timestamp,
+  expires_at timestamp NOT NULL,
+  created_at timestamptz DEFAULT now(),
+  updated_at timestamptz DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_token_revocations_expires_at ON token_revocations(expires_at);
+
+ALTER TABLE token_revocations ENABLE ROW LEVEL SECURITY;
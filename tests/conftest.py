@@ -0,0 +1,16 @@
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def api():
+    """(app, engine, SessionLocal) of the API bound to a throwaway database
+
+    The engine is created when backend.main is first imported, so every test
+    that needs the app has to share this fixture.
+    """
+    from scripts.bench_utils import load_app
+    return load_app()
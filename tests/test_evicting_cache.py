@@ -0,0 +1,29 @@
+"""
+A read that started before an eviction (or a clear) must not store what it read
+"""
+
+from backend.core.cache import EvictingCache
+
+
+def test_store_after_invalidate_is_rejected():
+    cache = EvictingCache(maxsize=10, ttl=60)
+    read_started = cache.begin_read()
+    cache.invalidate("a")
+    cache.store("a", "stale", read_started)
+    assert cache.get("a") is None
+
+
+def test_store_after_clear_is_rejected():
+    cache = EvictingCache(maxsize=10, ttl=60)
+    read_started = cache.begin_read()
+    cache.clear()
+    cache.store("a", "stale", read_started)
+    assert cache.get("a") is None
+
+
+def test_read_started_after_clear_is_stored():
+    cache = EvictingCache(maxsize=10, ttl=60)
+    cache.clear()
+    read_started = cache.begin_read()
+    cache.store("a", "fresh", read_started)
+    assert cache.get("a") == "fresh"
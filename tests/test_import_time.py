@@ -0,0 +1,63 @@
+"""
+Import-time budget of the API
+Imports backend.main in fresh interpreters with `python -X importtime`; fails
+when the fastest import exceeds the budget, when it imports a module that must
+only load on demand, or when it touches the database.
+"""
+
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGET = "backend.main"
+BUDGET_MS = 2500
+RUNS = 3
+# Built on first use (backend/database/supabase_client.py)
+LAZY_MODULES = ("supabase",)
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def profile_import(database_path):
+    """{module: cumulative µs} of one import of TARGET in a new interpreter"""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}", PYTHONPATH=ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, f"import {TARGET} failed:\n{result.stderr}"
+    return {
+        match.group(4): int(match.group(2))
+        for match in map(LINE.match, result.stderr.splitlines()) if match
+    }
+
+
+@pytest.fixture(scope="module")
+def import_profile(tmp_path_factory):
+    """(fastest profile, database path) after a warm-up run that writes the bytecode caches"""
+    database_path = tmp_path_factory.mktemp("import") / "import.db"
+    profile_import(database_path)
+    runs = [profile_import(database_path) for _ in range(RUNS)]
+    return min(runs, key=lambda run: run[TARGET]), database_path
+
+
+def test_import_within_budget(import_profile):
+    modules, _ = import_profile
+    total_ms = modules[TARGET] / 1000
+    assert total_ms <= BUDGET_MS, f"import {TARGET} took {total_ms:.0f} ms, over the {BUDGET_MS} ms budget"
+
+
+@pytest.mark.parametrize("module", LAZY_MODULES)
+def test_lazy_modules_not_imported(import_profile, module):
+    modules, _ = import_profile
+    imported = {name.split(".")[0] for name in modules}
+    assert module not in imported, f"{module} is imported at startup; it must only be imported on first use"
+
+
+def test_import_does_not_open_database(import_profile):
+    _, database_path = import_profile
+    assert not database_path.exists(), "the database was opened during the import"
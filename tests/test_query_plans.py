@@ -0,0 +1,160 @@
+"""
+The listing service methods use their indexes
+Seeds a throwaway database (SQLite by default, or BENCH_DATABASE_URL), runs
+each service method, captures the SELECTs it issues and asks the database for
+their plans; every expected index must show up in the plans of its method.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, text
+
+from scripts.bench_utils import make_engine, make_session_factory, seed_warehouse
+from backend.models import Withdrawal
+from backend.models.withdrawal import WithdrawalItem
+from backend.services.history_service import HistoryService
+from backend.services.inventory_service import InventoryService
+from backend.services.stock_report_service import StockReportService
+from backend.services.withdrawal_service import WithdrawalService
+
+ITEMS = 3000
+WITHDRAWALS = 1500
+HISTORY = 20000
+
+
+def seed(db):
+    """Two warehouses, so filtering by one of them is selective; returns (warehouse, items)"""
+    rng = random.Random(7)
+    seeded = [seed_warehouse(db, ITEMS, name=name) for name in ("BODEGA PLAN A", "BODEGA PLAN B")]
+    start = datetime.utcnow() - timedelta(days=365)
+    for user, warehouse, items in seeded:
+        # A few items of each warehouse below the default reorder threshold
+        for item in rng.sample(items, max(1, len(items) // 50)):
+            item.stock = rng.randrange(10)
+        for i in range(WITHDRAWALS):
+            withdrawal = Withdrawal(
+                obra="Obra Plan",
+                user_id=user.id,
+                warehouse_id=warehouse.id,
+                withdrawal_date=start + timedelta(minutes=rng.randrange(525600))
+            )
+            withdrawal.items = [
+                WithdrawalItem(item_id=item.id, quantity=1) for item in rng.sample(items, 2)
+            ]
+            db.add(withdrawal)
+        history = HistoryService(db)
+        for i in range(HISTORY):
+            record = history.build_history_record("withdrawal", rng.choice(items), 1, user, warehouse)
+            record.action_date = start + timedelta(minutes=rng.randrange(525600))
+            db.add(record)
+        db.commit()
+    return seeded[0][1], seeded[0][2]
+
+
+def explain(engine, statement, parameters):
+    """Plan of one statement as text lines"""
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            return [row[-1] for row in rows]
+        rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()
+        return [row[0] for row in rows]
+
+
+def capture(engine, session_factory, method):
+    """SELECT statements (with their parameters) issued while method(db) runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    db = session_factory()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        method(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        db.close()
+    return statements
+
+
+@pytest.fixture(scope="module")
+def database():
+    """(engine, session factory, warehouse id, item id) of the seeded database"""
+    engine = make_engine()
+    SessionLocal = make_session_factory(engine)
+    db = SessionLocal()
+    warehouse, items = seed(db)
+    warehouse_id, item_id = warehouse.id, items[0].id
+    db.close()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+    yield engine, SessionLocal, warehouse_id, item_id
+    engine.dispose()
+
+
+def second_page(db, warehouse_id, item_id):
+    service = InventoryService(db)
+    _, cursor = service.get_items_by_warehouse(warehouse_id, per_page=50)
+    service.get_items_by_warehouse(warehouse_id, cursor=cursor, per_page=50)
+
+
+def withdrawals(db, warehouse_id, item_id):
+    service = WithdrawalService(db)
+    withdrawals, _ = service.get_withdrawals_by_warehouse(warehouse_id, per_page=20)
+    for withdrawal in withdrawals:
+        service.convert_to_withdrawal_schema(withdrawal)
+
+
+def history_since_last_month(db, warehouse_id, item_id):
+    last_month = datetime.utcnow() - timedelta(days=30)
+    HistoryService(db).get_history_by_warehouse(warehouse_id, date_from=last_month)
+
+
+CHECKS = [
+    pytest.param(
+        lambda db, warehouse_id, item_id: HistoryService(db).get_history_by_warehouse(warehouse_id),
+        ["idx_history_warehouse_date"],
+        id="HistoryService.get_history_by_warehouse"),
+    pytest.param(
+        history_since_last_month,
+        ["idx_history_warehouse_date"],
+        id="HistoryService.get_history_by_warehouse(date_from)"),
+    pytest.param(
+        lambda db, warehouse_id, item_id: HistoryService(db).get_history_by_item(item_id),
+        ["idx_history_item_date"],
+        id="HistoryService.get_history_by_item"),
+    pytest.param(
+        withdrawals,
+        ["idx_withdrawals_warehouse_date", "idx_withdrawal_items_withdrawal_id"],
+        id="WithdrawalService.get_withdrawals_by_warehouse"),
+    pytest.param(
+        lambda db, warehouse_id, item_id: InventoryService(db).get_items_by_warehouse(warehouse_id),
+        ["idx_items_warehouse_name"],
+        id="InventoryService.get_items_by_warehouse"),
+    pytest.param(
+        second_page,
+        ["idx_items_warehouse_name"],
+        id="InventoryService.get_items_by_warehouse(cursor)"),
+    pytest.param(
+        lambda db, warehouse_id, item_id: StockReportService(db).fetch_low_stock(warehouse_id),
+        ["idx_items_low_stock"],
+        id="StockReportService.fetch_low_stock"),
+]
+
+
+@pytest.mark.parametrize("method, expected", CHECKS)
+def test_service_method_uses_index(database, method, expected):
+    engine, SessionLocal, warehouse_id, item_id = database
+    statements = capture(engine, SessionLocal, lambda db: method(db, warehouse_id, item_id))
+    plans = [(statement, explain(engine, statement, parameters)) for statement, parameters in statements]
+    plan_text = "\n".join(line for _, plan in plans for line in plan)
+    shown = "\n".join(
+        f"{' '.join(statement.split())[:160]}\n" + "\n".join(f"    {line}" for line in plan)
+        for statement, plan in plans
+    )
+    for index in expected:
+        assert index in plan_text, f"{index} not used by any statement:\n{shown}"
@@ -0,0 +1,26 @@
+"""
+Choosing a warehouse in the desktop client starts background sync and live updates for it
+"""
+
+from unittest.mock import Mock
+
+from frontend.app import SessionState
+
+
+def test_set_warehouse_starts_sync():
+    app = Mock()
+    session_state = SessionState(app)
+    warehouse = {"id": "w1", "name": "Bodega Central"}
+
+    session_state.set_warehouse(warehouse)
+
+    assert session_state.current_warehouse == warehouse
+    app.data_manager.set_current_warehouse.assert_called_once_with(warehouse)
+    app.start_sync.assert_called_once_with()
+
+
+def test_set_warehouse_starts_live_updates():
+    app = Mock()
+    SessionState(app).set_warehouse({"id": "w1", "name": "Bodega Central"})
+
+    app.start_live_updates.assert_called_once_with()
@@ -0,0 +1,176 @@
+"""
+Concurrent stock mutations
+Many threads hammer the same hot items (SQLite by default, or
+BENCH_DATABASE_URL); stock must never go negative and must end at the initial
+stock minus the quantities of the operations that reported success.
+"""
+
+import random
+import threading
+from collections import defaultdict
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, func
+from sqlalchemy.exc import OperationalError
+
+from scripts.bench_utils import make_engine, make_session_factory, seed_warehouse
+from backend.models import Item
+from backend.models.withdrawal import WithdrawalItem
+from backend.core.principal import UserSnapshot
+from backend.schemas.withdrawal import WithdrawalCreate, WithdrawalItemCreate
+from backend.services.stock_service import StockService
+from backend.services.withdrawal_service import WithdrawalService
+
+THREADS = 8
+OPERATIONS = 50
+ITEMS = 3
+# Low enough that the items run out and later operations get rejected
+INITIAL_STOCK = 300
+
+
+def configure_sqlite(engine):
+    """Let SQLite writers wait for each other instead of failing immediately"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.close()
+
+
+@pytest.fixture
+def hot_items():
+    """(SessionLocal, user, warehouse id, item ids) of ITEMS items with INITIAL_STOCK each"""
+    engine = make_engine()
+    configure_sqlite(engine)
+    SessionLocal = make_session_factory(engine)
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, ITEMS, stock=INITIAL_STOCK)
+    seeded = SessionLocal, UserSnapshot.from_model(user), warehouse.id, [item.id for item in items]
+    db.close()
+    yield seeded
+    engine.dispose()
+
+
+def run_workers(SessionLocal, item_ids, worker):
+    """Run worker(seed) on THREADS threads while sampling the lowest stock; returns that lowest stock"""
+    lowest = [INITIAL_STOCK]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            db = SessionLocal()
+            try:
+                lowest[0] = min(lowest[0], db.query(func.min(Item.stock)).filter(Item.id.in_(item_ids)).scalar())
+            except OperationalError:
+                db.rollback()
+            finally:
+                db.close()
+
+    sampler = threading.Thread(target=sample)
+    sampler.start()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    done.set()
+    sampler.join()
+    return lowest[0]
+
+
+def final_stock(SessionLocal, item_ids):
+    db = SessionLocal()
+    try:
+        return {item.id: item.stock for item in db.query(Item).filter(Item.id.in_(item_ids))}
+    finally:
+        db.close()
+
+
+def test_concurrent_withdrawals(hot_items):
+    SessionLocal, user, warehouse_id, item_ids = hot_items
+    withdrawn = defaultdict(int)
+    outcomes = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(OPERATIONS):
+            lines = {
+                item_id: rng.randint(1, 5)
+                for item_id in rng.sample(item_ids, rng.randint(1, ITEMS))
+            }
+            withdrawal = WithdrawalCreate(
+                obra="Obra Stress",
+                warehouse_id=warehouse_id,
+                items=[WithdrawalItemCreate(item_id=item_id, quantity=q) for item_id, q in lines.items()]
+            )
+            db = SessionLocal()
+            try:
+                WithdrawalService(db).create_withdrawal(withdrawal, user)
+                outcome = "committed"
+            except HTTPException:
+                db.rollback()
+                outcome = "rejected"
+            except OperationalError:
+                db.rollback()
+                outcome = "database busy"
+            finally:
+                db.close()
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "committed":
+                    for item_id, quantity in lines.items():
+                        withdrawn[item_id] += quantity
+
+    lowest = run_workers(SessionLocal, item_ids, worker)
+
+    assert outcomes["committed"] and outcomes["rejected"], dict(outcomes)
+    assert lowest >= 0
+    final = final_stock(SessionLocal, item_ids)
+    assert final == {item_id: INITIAL_STOCK - withdrawn[item_id] for item_id in item_ids}
+    db = SessionLocal()
+    recorded = dict(
+        db.query(WithdrawalItem.item_id, func.sum(WithdrawalItem.quantity))
+        .group_by(WithdrawalItem.item_id).all()
+    )
+    db.close()
+    assert {item_id: recorded.get(item_id, 0) for item_id in item_ids} == dict(withdrawn)
+
+
+def test_concurrent_decrements(hot_items):
+    SessionLocal, user, warehouse_id, item_ids = hot_items
+    withdrawn = defaultdict(int)
+    outcomes = defaultdict(int)
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(OPERATIONS):
+            item_id = rng.choice(item_ids)
+            quantity = rng.randint(1, 5)
+            db = SessionLocal()
+            try:
+                new_stock = StockService(db).decrement(item_id, quantity)
+                db.commit()
+                outcome = "committed" if new_stock is not None else "rejected"
+            except OperationalError:
+                db.rollback()
+                outcome = "database busy"
+            finally:
+                db.close()
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == "committed":
+                    withdrawn[item_id] += quantity
+
+    lowest = run_workers(SessionLocal, item_ids, worker)
+
+    assert outcomes["committed"] and outcomes["rejected"], dict(outcomes)
+    assert lowest >= 0
+    final = final_stock(SessionLocal, item_ids)
+    assert final == {item_id: INITIAL_STOCK - withdrawn[item_id] for item_id in item_ids}
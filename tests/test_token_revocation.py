@@ -0,0 +1,59 @@
+"""
+Tokens stop working once their user is deactivated or deleted, including
+changes made outside the ORM, as soon as the revocation list is reloaded
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from scripts.bench_utils import auth_headers, seed_warehouse
+
+
+@pytest.fixture
+def signed_in(api):
+    """(client, SessionLocal, user id, url, headers) of a fresh user with a working token"""
+    app, engine, SessionLocal = api
+    db = SessionLocal()
+    user, warehouse, _ = seed_warehouse(db, 1)
+    user_id, headers = user.id, auth_headers(user)
+    url = f"/api/v1/withdrawals/warehouse/{warehouse.id}"
+    db.close()
+    client = TestClient(app)
+    assert client.get(url, headers=headers).status_code == 200
+    return client, SessionLocal, user_id, url, headers
+
+
+def reload_revocations(SessionLocal):
+    from backend.core.revocation import revocation_list
+    db = SessionLocal()
+    try:
+        revocation_list.load(db)
+    finally:
+        db.close()
+
+
+def test_deactivation_outside_the_orm_revokes_tokens(signed_in):
+    from backend.models.user import User
+    client, SessionLocal, user_id, url, headers = signed_in
+    db = SessionLocal()
+    db.execute(update(User).where(User.id == user_id).values(is_active=False))
+    db.commit()
+    db.close()
+
+    reload_revocations(SessionLocal)
+
+    assert client.get(url, headers=headers).status_code == 401
+
+
+def test_deleting_a_user_revokes_tokens(signed_in):
+    from backend.models.user import User
+    client, SessionLocal, user_id, url, headers = signed_in
+    db = SessionLocal()
+    db.delete(db.get(User, user_id))
+    db.commit()
+    db.close()
+
+    reload_revocations(SessionLocal)
+
+    assert client.get(url, headers=headers).status_code == 401
@@ -0,0 +1,84 @@
+"""
+Query count of the withdrawal listing
+Lists pages of different sizes through WithdrawalService (converting every
+withdrawal to its schema, like the API does) and through
+GET /api/v1/withdrawals/warehouse/{id}; the number of statements must not
+grow with the page size.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scripts.bench_utils import auth_headers, seed_warehouse, QueryCounter
+
+WITHDRAWALS = 300
+LINES = 3
+# One query for the page of withdrawals, one for the lines and items of all of them
+STATEMENTS = 2
+PAGE_SIZES = [1, 10, 50, 200]
+
+
+@pytest.fixture(scope="module")
+def listing(api):
+    """(app, engine, SessionLocal, warehouse id, auth headers) with WITHDRAWALS withdrawals seeded"""
+    from backend.models import Withdrawal
+    from backend.models.withdrawal import WithdrawalItem
+    app, engine, SessionLocal = api
+
+    rng = random.Random(11)
+    db = SessionLocal()
+    user, warehouse, items = seed_warehouse(db, 200)
+    start = datetime.utcnow() - timedelta(days=90)
+    for i in range(WITHDRAWALS):
+        withdrawal = Withdrawal(
+            obra="Obra Bench", user_id=user.id, warehouse_id=warehouse.id,
+            withdrawal_date=start + timedelta(minutes=rng.randrange(90 * 1440))
+        )
+        withdrawal.items = [WithdrawalItem(item_id=item.id, quantity=1) for item in rng.sample(items, LINES)]
+        db.add(withdrawal)
+    db.commit()
+    headers = auth_headers(user)
+    warehouse_id = warehouse.id
+    db.close()
+    # The first authenticated request also loads the token revocation list
+    TestClient(app).get(f"/api/v1/withdrawals/warehouse/{warehouse_id}", headers=headers)
+    return app, engine, SessionLocal, warehouse_id, headers
+
+
+@pytest.mark.parametrize("per_page", PAGE_SIZES)
+def test_service_page_statement_count(listing, per_page):
+    from backend.services.withdrawal_service import WithdrawalService
+    app, engine, SessionLocal, warehouse_id, headers = listing
+
+    db = SessionLocal()
+    try:
+        with QueryCounter(engine) as counter:
+            service = WithdrawalService(db)
+            withdrawals, _ = service.get_withdrawals_by_warehouse(warehouse_id, per_page=per_page)
+            page = [service.convert_to_withdrawal_schema(withdrawal) for withdrawal in withdrawals]
+    finally:
+        db.close()
+
+    assert len(page) == min(per_page, WITHDRAWALS)
+    assert all(len(withdrawal.items) == LINES for withdrawal in page)
+    assert counter.statements == STATEMENTS
+
+
+@pytest.mark.parametrize("per_page", PAGE_SIZES)
+def test_endpoint_statement_count(listing, per_page, monkeypatch):
+    from backend.core.revocation import revocation_list
+    app, engine, SessionLocal, warehouse_id, headers = listing
+    # The revocation list was loaded by the warm-up request; keep its periodic reload out of the count
+    monkeypatch.setattr(revocation_list, "refresh", float("inf"))
+    client = TestClient(app)
+    url = f"/api/v1/withdrawals/warehouse/{warehouse_id}"
+
+    with QueryCounter(engine) as counter:
+        response = client.get(url, params={"per_page": per_page}, headers=headers)
+
+    assert response.status_code == 200, response.text
+    assert len(response.json()["items"]) == min(per_page, WITHDRAWALS)
+    assert counter.statements == STATEMENTS